@@ -0,0 +1,207 @@
+"""
+End-to-end benchmark of the connector operations against the local stand-in Komoot server.
+
+For each operation, reports the latency percentiles, the throughput, the errors and the peak memory allocated by
+Python. Run with `python -m benchmarks.bench_connector`, see `--help` for the dataset size, latency and error rate.
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+from typing import (
+    Callable,
+    Dict,
+    List,
+)
+
+from kompy.constants.hydration_targets import HydrationTargets
+from kompy.constants.tour_constants import TourSortField
+from kompy.constants.tour_object_types import TourObjectTypes
+from kompy.hedging import HedgingPolicy
+from kompy.komoot_connector import KomootConnector
+from kompy.metrics import (
+    InMemoryMetrics,
+    to_prometheus,
+)
+from kompy.pipeline import (
+    Pipeline,
+    hydrate_stage,
+    parse_stage,
+    tour_pages_stage,
+)
+from kompy.tracing import Tracer
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+
+
+def percentiles(durations: List[float]) -> Dict[str, float]:
+    """
+    Compute the latency percentiles of a list of durations, with the nearest rank method.
+    :param durations: The durations, in seconds.
+    :return: The 50th, 95th and 99th percentiles, in seconds.
+    """
+    ordered = sorted(durations)
+    return {
+        f'p{percentile}': ordered[min(len(ordered) - 1, max(0, -(-percentile * len(ordered) // 100) - 1))]
+        for percentile in (50, 95, 99)
+    }
+
+
+def run_operation(name: str, operation: Callable[[int], object], iterations: int, requests_per_call: int = 1) -> None:
+    """
+    Run an operation several times and print its statistics.
+    :param name: The name of the operation.
+    :param operation: The operation, called with the number of the iteration.
+    :param iterations: The number of calls.
+    :param requests_per_call: The number of HTTP requests sent by each call, used for the throughput.
+    """
+    durations = []
+    errors = 0
+    start = time.perf_counter()
+    for iteration in range(iterations):
+        call_start = time.perf_counter()
+        try:
+            operation(iteration)
+        except Exception:
+            errors += 1
+        durations.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        operation(iterations)
+    except Exception:
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = percentiles(durations)
+    print(
+        f'{name:<28} p50 {latencies["p50"] * 1000:8.2f} ms   p95 {latencies["p95"] * 1000:8.2f} ms   '
+        f'p99 {latencies["p99"] * 1000:8.2f} ms   {iterations * requests_per_call / elapsed:8.1f} req/s   '
+        f'errors {errors:3d}   peak {peak / 2 ** 20:7.1f} MiB'
+    )
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arguments.add_argument('--tours', type=int, default=200, help='number of tours of the account')
+    arguments.add_argument('--points', type=int, default=2000, help='number of points of each track')
+    arguments.add_argument('--page-size', type=int, default=50, help='number of tours per page')
+    arguments.add_argument('--latency', type=float, default=0.0, help='latency added to each response, in seconds')
+    arguments.add_argument('--jitter', type=float, default=0.0, help='maximum random latency added, in seconds')
+    arguments.add_argument('--tail-rate', type=float, default=0.0, help='probability of a slow response')
+    arguments.add_argument('--tail-latency', type=float, default=0.0, help='delay of slow responses, in seconds')
+    arguments.add_argument('--error-rate', type=float, default=0.0, help='probability of a 500 response')
+    arguments.add_argument('--compression', action='store_true', help='gzip the responses of the server')
+    arguments.add_argument('--iterations', type=int, default=20, help='number of calls of each operation')
+    arguments.add_argument('--concurrency', type=int, default=8, help='concurrency of the hydration')
+    arguments.add_argument('--hedge', action='store_true', help='hedge the slow requests of tours and tracks')
+    arguments.add_argument('--metrics', action='store_true', help='print the metrics recorded by the connector')
+    arguments.add_argument('--trace', help='path of the Chrome trace of the spans recorded by the connector')
+    options = arguments.parse_args()
+
+    # The connector warns about missing parameters on every call, which is noise here.
+    logging.disable(logging.WARNING)
+    config = ServerConfig(
+        tours=options.tours,
+        points=options.points,
+        page_size=options.page_size,
+        latency=options.latency,
+        jitter=options.jitter,
+        tail_rate=options.tail_rate,
+        tail_latency=options.tail_latency,
+        error_rate=options.error_rate,
+        compression=options.compression,
+    )
+    iterations = options.iterations
+    with KomootServer(config) as server:
+        print(f'Stand-in server at {server.url}: {config.tours} tours of {config.points} points, '
+              f'latency {config.latency * 1000:.0f} ms, error rate {config.error_rate:.0%}')
+        metrics = InMemoryMetrics() if options.metrics else None
+        tracer = Tracer() if options.trace else None
+        hedging = HedgingPolicy() if options.hedge else None
+        connector = KomootConnector(email=config.email, password=config.password, metrics=metrics, tracer=tracer,
+                                    hedging=hedging)
+        tracks_session = hedging.session() if hedging is not None else None
+        tour_id = server.dataset.tour_ids[0]
+        tour = connector.get_tour_by_id(tour_identifier=tour_id)
+        gpx = server.dataset.gpx(tour_id)
+        pages = -(-config.tours // config.page_size)
+
+        run_operation('login', lambda _: KomootConnector(email=config.email, password=config.password), iterations)
+        run_operation(
+            f'get_tours ({pages} pages)',
+            lambda _: connector.get_tours(user_identifier=config.username, sort_field=TourSortField.DATE),
+            max(1, iterations // 4),
+            requests_per_call=pages,
+        )
+        for object_type in (TourObjectTypes.KOMPY, TourObjectTypes.GPX, TourObjectTypes.GPX_COLUMNS,
+                            TourObjectTypes.FIT, TourObjectTypes.FIT_RECORDS):
+            run_operation(
+                f'get_tour_by_id ({object_type})',
+                lambda _, object_type=object_type: connector.get_tour_by_id(tour_id, object_type=object_type),
+                iterations,
+            )
+        run_operation(
+            'generate_coordinates',
+            lambda _: tour.generate_coordinates(authentication=connector.authentication, as_array=True,
+                                                session=tracks_session),
+            iterations,
+        )
+        run_operation(
+            'upload_tour (gpx)',
+            lambda _: connector.upload_tour(tour_object=gpx, activity_type='hike', tour_name='Upload'),
+            iterations,
+        )
+        run_operation(
+            'change_tour',
+            lambda iteration: connector.change_tour(tour_id=tour_id, tour_name=f'Renamed {iteration}'),
+            iterations,
+        )
+        hydrated = min(config.tours, 50)
+        tours = connector.get_tours(user_identifier=config.username, sort_field=TourSortField.DATE)[:hydrated]
+        run_operation(
+            f'hydrate ({hydrated} tours)',
+            lambda _: connector.hydrate(tours=tours, what=[HydrationTargets.COORDINATES],
+                                        concurrency=options.concurrency),
+            max(1, iterations // 4),
+            requests_per_call=hydrated,
+        )
+        # Listing then hydrating the whole account, against the pipeline hydrating the tours of the first pages while
+        # the next pages are fetched.
+        run_operation(
+            f'get_tours, hydrate ({config.tours})',
+            lambda _: connector.hydrate(
+                tours=connector.get_tours(user_identifier=config.username, sort_field=TourSortField.DATE),
+                what=[HydrationTargets.COORDINATES], concurrency=options.concurrency,
+            ),
+            max(1, iterations // 4),
+            requests_per_call=pages + config.tours,
+        )
+        run_operation(
+            f'pipeline ({config.tours})',
+            lambda _: list(Pipeline([
+                tour_pages_stage(connector, sort_field=TourSortField.DATE),
+                parse_stage(),
+                hydrate_stage(connector, workers=options.concurrency),
+            ]).run([config.username])),
+            max(1, iterations // 4),
+            requests_per_call=pages + config.tours,
+        )
+        deleted = server.dataset.tour_ids[-iterations - 1:]
+        run_operation('delete_tour', lambda iteration: connector.delete_tour(tour_id=deleted[iteration]), iterations)
+        print(f'{server.requests} requests served')
+        if hedging is not None:
+            print(f'{hedging.hedges} of {hedging.requests} requests hedged, {hedging.hedge_wins} hedges answered first')
+        if metrics is not None:
+            print(to_prometheus(metrics), end='')
+        if tracer is not None:
+            tracer.write_chrome_trace(options.trace)
+            print(f'{len(tracer.spans)} spans written to {options.trace}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark of the coordinate archive: opening it and slicing a track, against reading the track from a GPX file.
+
+Run with `python -m benchmarks.bench_coordinate_archive`.
+"""
+import os
+import random
+import tempfile
+from array import array
+
+from benchmarks.utils import (
+    measure,
+    report,
+)
+from kompy.coordinate_array import CoordinateArray
+from kompy.coordinate_archive import CoordinateArchive
+from kompy.gpx_reader import read_gpx
+from kompy.gpx_writer import write_gpx
+
+
+def _track(points: int, seed: int) -> CoordinateArray:
+    lat = array('d', [44.2 + seed * 1e-3 + i * 1e-6 for i in range(points)])
+    lon = array('d', [7.3 + i * 1e-6 for i in range(points)])
+    alt = array('d', [980.0 + i % 500 for i in range(points)])
+    time = array('d', [i * 1000.0 for i in range(points)])
+    return CoordinateArray(lat=lat, lon=lon, alt=alt, time=time)
+
+
+def main(tours: int = 20_000, points: int = 500) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'tracks.kmpa')
+        track = _track(points=points, seed=0)
+        with CoordinateArchive(path) as archive:
+            archive.extend((str(tour_id), track) for tour_id in range(tours))
+        gpx_path = os.path.join(directory, 'track.gpx')
+        write_gpx(destination=gpx_path, coordinates=track)
+        print(f'Archive of {tours} tours of {points} points, {os.path.getsize(path) / 2 ** 20:.1f} MiB')
+
+        report('open archive', measure(lambda: CoordinateArchive(path).close(), repeat=20))
+        archive = CoordinateArchive(path)
+        tour_ids = [str(random.randrange(tours)) for _ in range(1000)]
+
+        def view_tracks():
+            for tour_id in tour_ids:
+                archive.view(tour_id).release()
+
+        timings = measure(view_tracks)
+        report('view 1000 tracks', timings, f'{timings["best"] * 1e3:.2f} µs per track')
+        timings = measure(lambda: [archive.get(tour_id) for tour_id in tour_ids])
+        report('copy 1000 tracks', timings, f'{timings["best"] * 1e3:.2f} µs per track')
+        report('read_gpx 1 track', measure(lambda: read_gpx(gpx_path)))
+        report('append 1 track', measure(lambda: archive.append(str(tours), track)))
+        archive.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Speed, peak memory and time-to-first-point benchmark of the incremental coordinates reader against decoding the whole
+response with `json.loads`, as `Tour.generate_coordinates` used to do.
+
+Run with `python -m benchmarks.bench_coordinates_reader`.
+"""
+import json
+import time
+import tracemalloc
+
+from benchmarks.utils import fixture_tour
+from kompy import Coordinate
+from kompy.coordinates_reader import (
+    iter_coordinate_items,
+    read_coordinates,
+)
+from kompy.streaming import iter_chunks
+
+
+def _decode_whole(content: bytes):
+    # The body is first received entirely, as response.content does
+    body = b''.join(bytes(chunk) for chunk in iter_chunks(content))
+    return [
+        Coordinate(lat=item['lat'], lon=item['lng'], alt=item.get('alt'), time=item.get('t'))
+        for item in json.loads(body.decode('utf-8'))['items']
+    ]
+
+
+def _profile(name: str, function) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{name:<30} {duration * 1000:10.2f} ms   peak memory {peak / 2 ** 20:8.1f} MiB')
+
+
+def _time_to_first_point(name: str, function) -> None:
+    start = time.perf_counter()
+    function()
+    print(f'{name:<30} first point after {(time.perf_counter() - start) * 1000:10.3f} ms')
+
+
+def main(points: int = 200_000) -> None:
+    tour = fixture_tour(points=points)
+    content = json.dumps({
+        'items': [{'lat': c.lat, 'lng': c.lon, 'alt': c.alt, 't': c.time} for c in tour.coordinates],
+    }).encode('utf-8')
+    del tour
+
+    print(f'Coordinates response of {points} points, {len(content) / 2 ** 20:.1f} MiB')
+    _profile('json.loads + Coordinate list', lambda: _decode_whole(content))
+    _profile('read_coordinates', lambda: read_coordinates(content))
+    _time_to_first_point('json.loads', lambda: _decode_whole(content)[0])
+    _time_to_first_point('iter_coordinate_items', lambda: next(iter(iter_coordinate_items(content))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""
+Speed benchmark of the columnar FIT record decoder against `FitFile.from_bytes`.
+
+Run with `python -m benchmarks.bench_fit_reader`.
+"""
+from fit_tool.fit_file import FitFile
+
+from benchmarks.utils import (
+    measure,
+    report,
+)
+from kompy.fit_reader import read_fit_records
+from tests.resources.fit_file_builder import fit_file_builder
+
+
+def main(records: int = 20_000) -> None:
+    content = fit_file_builder(records=records)
+    assert len(read_fit_records(content)) == records
+
+    print(f'FIT file of {records} records, {len(content)} bytes')
+    report('FitFile.from_bytes', measure(lambda: FitFile.from_bytes(content), repeat=3))
+    report('read_fit_records', measure(lambda: read_fit_records(content), repeat=3))
+
+
+if __name__ == '__main__':
+    main()
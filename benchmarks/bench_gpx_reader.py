@@ -0,0 +1,40 @@
+"""
+Speed and peak memory benchmark of the incremental GPX reader against `gpxpy.parse`.
+
+Run with `python -m benchmarks.bench_gpx_reader`.
+"""
+import io
+import time
+import tracemalloc
+
+import gpxpy
+
+from benchmarks.utils import fixture_tour
+from kompy.gpx_reader import read_gpx
+from kompy.gpx_writer import write_gpx
+
+
+def _profile(name: str, function) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{name:<20} {duration * 1000:10.2f} ms   peak memory {peak / 2 ** 20:8.1f} MiB')
+
+
+def main(points: int = 300_000) -> None:
+    tour = fixture_tour(points=points)
+    destination = io.BytesIO()
+    write_gpx(destination=destination, coordinates=tour.coordinates, name=tour.name, start_time=tour.start_date)
+    content = destination.getvalue()
+    del tour
+
+    print(f'GPX document of {points} points, {len(content) / 2 ** 20:.1f} MiB')
+    _profile('gpxpy.parse', lambda: gpxpy.parse(content.decode('utf-8')))
+    _profile('read_gpx', lambda: read_gpx(content))
+
+
+if __name__ == '__main__':
+    main()
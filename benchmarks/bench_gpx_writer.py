@@ -0,0 +1,55 @@
+"""
+Speed benchmark of the streaming GPX writer against building a gpxpy object and calling `GPX.to_xml()`.
+
+Run with `python -m benchmarks.bench_gpx_writer`.
+"""
+import io
+from datetime import timedelta
+
+import gpxpy.gpx
+
+from benchmarks.utils import (
+    fixture_tour,
+    measure,
+    report,
+)
+from kompy import CoordinateArray
+from kompy.gpx_writer import write_gpx
+
+
+def _to_xml_with_gpxpy(tour) -> bytes:
+    gpx = gpxpy.gpx.GPX()
+    track = gpxpy.gpx.GPXTrack(name=tour.name)
+    segment = gpxpy.gpx.GPXTrackSegment()
+    gpx.tracks.append(track)
+    track.segments.append(segment)
+    for coordinate in tour.coordinates:
+        segment.points.append(gpxpy.gpx.GPXTrackPoint(
+            latitude=coordinate.lat,
+            longitude=coordinate.lon,
+            elevation=coordinate.alt,
+            time=tour.start_date + timedelta(milliseconds=coordinate.time),
+        ))
+    return gpx.to_xml().encode('utf-8')
+
+
+def _to_xml_with_kompy(coordinates, tour) -> bytes:
+    destination = io.BytesIO()
+    write_gpx(destination=destination, coordinates=coordinates, name=tour.name, start_time=tour.start_date)
+    return destination.getvalue()
+
+
+def main(points: int = 100_000) -> None:
+    tour = fixture_tour(points=points)
+    coordinates = CoordinateArray.from_coordinates(tour.coordinates)
+    parsed = gpxpy.parse(_to_xml_with_kompy(coordinates, tour).decode('utf-8'))
+    assert len(parsed.tracks[0].segments[0].points) == points
+
+    print(f'GPX export of {points} points')
+    report('gpxpy GPX.to_xml', measure(lambda: _to_xml_with_gpxpy(tour), repeat=3))
+    report('write_gpx (Coordinate list)', measure(lambda: _to_xml_with_kompy(tour.coordinates, tour), repeat=3))
+    report('write_gpx (CoordinateArray)', measure(lambda: _to_xml_with_kompy(coordinates, tour), repeat=3))
+
+
+if __name__ == '__main__':
+    main()
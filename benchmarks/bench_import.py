@@ -0,0 +1,44 @@
+"""
+Benchmark of the import time of the package and of its main entry points, each measured in a fresh interpreter.
+
+Run with `python -m benchmarks.bench_import`.
+"""
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = (
+    'import kompy',
+    'from kompy.constants import SupportedActivities',
+    'from kompy import Tour',
+    'from kompy import KomootImage',
+    'from kompy import KomootConnector',
+)
+
+_TIMER = 'import time\nstart = time.perf_counter()\n{statement}\nprint(time.perf_counter() - start)'
+
+
+def _import_time(statement: str) -> float:
+    """
+    Measure the time taken by a statement in a fresh interpreter.
+    :param statement: The statement.
+    :return: The duration, in seconds.
+    """
+    output = subprocess.run(
+        [sys.executable, '-c', _TIMER.format(statement=statement)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output)
+
+
+def main(repeat: int = 5) -> None:
+    for statement in STATEMENTS:
+        timings = [_import_time(statement) for _ in range(repeat)]
+        median = statistics.median(timings)
+        print(f'{statement:<50} best {min(timings) * 1000:8.2f} ms   median {median * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
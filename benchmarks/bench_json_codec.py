@@ -0,0 +1,37 @@
+"""
+Benchmark of the JSON codecs on a page of tours.
+
+Run with `python -m benchmarks.bench_json_codec`.
+"""
+import json
+
+from benchmarks.utils import (
+    RESOURCES_DIRECTORY,
+    measure,
+    report,
+)
+from kompy.json_codec import (
+    JsonCodec,
+    OrjsonCodec,
+)
+
+
+def main(repeat: int = 200) -> None:
+    with open(f'{RESOURCES_DIRECTORY}/fetch_tours.json', 'rb') as f:
+        content = f.read()
+    print(f'Page of tours of {len(content) / 1024:.1f} KiB, decoded {repeat} times')
+
+    report('response.json() + json.loads', measure(
+        lambda: [(json.loads(content), json.loads(content.decode('utf-8'))) for _ in range(repeat)]
+    ))
+    codecs = [JsonCodec()]
+    try:
+        codecs.append(OrjsonCodec())
+    except ImportError:
+        print('orjson is not installed')
+    for codec in codecs:
+        report(f'{codec.name} loads', measure(lambda: [codec.loads(content) for _ in range(repeat)]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Size and speed benchmark of encoded polylines against the JSON representation of the coordinates endpoint.
+
+Run with `python -m benchmarks.bench_polyline`.
+"""
+import json
+
+from benchmarks.utils import (
+    fixture_tour,
+    measure,
+    report,
+)
+from kompy import CoordinateArray
+from kompy.polyline import (
+    decode_coordinates,
+    encode_coordinates,
+)
+
+
+def main(points: int = 100_000) -> None:
+    tour = fixture_tour(points=points)
+    coordinates = CoordinateArray.from_coordinates(tour.coordinates)
+    items = [{'lat': c.lat, 'lng': c.lon, 'alt': c.alt, 't': c.time} for c in tour.coordinates]
+    as_json = json.dumps({'items': items})
+
+    for with_altitude, with_time in [(False, False), (True, True)]:
+        encoded = encode_coordinates(coordinates, with_altitude=with_altitude, with_time=with_time)
+        label = '4D' if with_time else '2D'
+        print(f'{label} polyline of {points} points: {len(encoded)} bytes, JSON {len(as_json)} bytes '
+              f'({len(as_json) / len(encoded):.1f}x smaller)')
+        report(f'encode_coordinates {label}', measure(
+            lambda: encode_coordinates(coordinates, with_altitude=with_altitude, with_time=with_time)
+        ))
+        report(f'decode_coordinates {label}', measure(
+            lambda: decode_coordinates(encoded, with_altitude=with_altitude, with_time=with_time)
+        ))
+    report('json.dumps', measure(lambda: json.dumps({'items': items})))
+    report('json.loads', measure(lambda: json.loads(as_json)))
+
+
+if __name__ == '__main__':
+    main()
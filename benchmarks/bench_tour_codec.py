@@ -0,0 +1,40 @@
+"""
+Round-trip and speed benchmark of the binary tour codec against pickle.
+
+Run with `python -m benchmarks.bench_tour_codec`.
+"""
+import pickle
+
+from benchmarks.utils import (
+    fixture_tour,
+    measure,
+    report,
+)
+from kompy.tour_codec import (
+    decode_coordinates,
+    decode_tour,
+    decode_tour_header,
+    encode_tour,
+)
+
+
+def main(points: int = 100_000) -> None:
+    tour = fixture_tour(points=points)
+
+    encoded = encode_tour(tour)
+    pickled = pickle.dumps(tour)
+    decoded = decode_tour(encoded)
+    assert [c.__dict__ for c in decoded.coordinates] == [c.__dict__ for c in tour.coordinates]
+    assert decoded.name == tour.name and len(decoded.path) == len(tour.path)
+
+    print(f'Tour with {points} points: codec {len(encoded)} bytes, pickle {len(pickled)} bytes')
+    report('pickle.dumps', measure(lambda: pickle.dumps(tour)))
+    report('encode_tour', measure(lambda: encode_tour(tour)))
+    report('pickle.loads', measure(lambda: pickle.loads(pickled)))
+    report('decode_tour', measure(lambda: decode_tour(encoded)))
+    report('decode_tour_header', measure(lambda: decode_tour_header(encoded)))
+    report('decode_coordinates', measure(lambda: decode_coordinates(encoded)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+Benchmark of the parsing of a large tour listing, in the current process and in a pool of processes.
+
+Run with `python -m benchmarks.bench_tour_parsing`.
+"""
+import json
+import os
+
+from benchmarks.utils import (
+    RESOURCES_DIRECTORY,
+    measure,
+    report,
+)
+from kompy.tour_parsing import parse_tours
+
+
+def main(tours: int = 20_000) -> None:
+    with open(f'{RESOURCES_DIRECTORY}/fetch_tours.json') as f:
+        page = json.load(f)['_embedded']['tours']
+    tour_dicts = (page * (tours // len(page) + 1))[:tours]
+    print(f'Listing of {len(tour_dicts)} tours, {os.cpu_count()} CPUs')
+
+    report('serial', measure(lambda: parse_tours(tour_dicts), repeat=3))
+    for processes in sorted({2, 4, os.cpu_count() or 1}):
+        report(f'{processes} processes', measure(lambda: parse_tours(tour_dicts, processes=processes), repeat=3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import json
+import os
+import statistics
+import time
+from typing import (
+    Callable,
+    Dict,
+)
+
+from kompy import (
+    Coordinate,
+    Tour,
+)
+
+RESOURCES_DIRECTORY = f'{os.path.dirname(os.path.dirname(os.path.realpath(__file__)))}/tests/resources'
+
+
+def measure(function: Callable[[], object], repeat: int = 5) -> Dict[str, float]:
+    """
+    Time several calls of a function.
+    :param function: The function to time, called without arguments.
+    :param repeat: The number of calls.
+    :return: The best and median durations, in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return {
+        'best': min(durations),
+        'median': statistics.median(durations),
+    }
+
+
+def report(name: str, timings: Dict[str, float], extra: str = '') -> None:
+    """
+    Print the result of a measurement.
+    :param name: The name of the measured operation.
+    :param timings: The timings returned by `measure`.
+    :param extra: Additional information to print.
+    """
+    print(f'{name:<40} best {timings["best"] * 1000:10.2f} ms   median {timings["median"] * 1000:10.2f} ms   {extra}')
+
+
+def fixture_tour(points: int) -> Tour:
+    """
+    Build a tour from the test fixtures with a synthetic track.
+    :param points: The number of points of the track.
+    :return: The tour.
+    """
+    with open(f'{RESOURCES_DIRECTORY}/get_tour_by_id_response.json') as f:
+        tour = Tour(json.load(f))
+    tour.coordinates = [
+        Coordinate(lat=44.2 + i * 1e-6, lon=7.3 + i * 1e-6, alt=980.0 + i % 500, time=i * 1000)
+        for i in range(points)
+    ]
+    return tour
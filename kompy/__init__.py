@@ -1,18 +1,60 @@
 __docformat__ = "restructuredtext"
 
-from .authentication import Authentication
-from .coordinate import Coordinate
-from .difficulty import Difficulty
-from .image import KomootImage
-from .komoot_connector import KomootConnector
-from .segment import (
-    Segment,
-    SegmentInformation,
+import importlib
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    List,
 )
-from .surface import Surface
-from .tour import (
-    Tour,
-    TourInformation,
-    TourSummary,
-)
-from .way_type import WayType
+
+# The public classes are imported on first access, so that `import kompy` stays fast and the modules (and their
+# dependencies) that are not used are never loaded.
+_LAZY_ATTRIBUTES = {
+    'Authentication': 'kompy.authentication',
+    'Coordinate': 'kompy.coordinate',
+    'CoordinateArray': 'kompy.coordinate_array',
+    'Difficulty': 'kompy.difficulty',
+    'KomootImage': 'kompy.image',
+    'KomootConnector': 'kompy.komoot_connector',
+    'Segment': 'kompy.segment',
+    'SegmentInformation': 'kompy.segment',
+    'Surface': 'kompy.surface',
+    'Tour': 'kompy.tour',
+    'TourInformation': 'kompy.tour',
+    'TourSummary': 'kompy.tour',
+    'WayType': 'kompy.way_type',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+if TYPE_CHECKING:
+    from .authentication import Authentication
+    from .coordinate import Coordinate
+    from .coordinate_array import CoordinateArray
+    from .difficulty import Difficulty
+    from .image import KomootImage
+    from .komoot_connector import KomootConnector
+    from .segment import (
+        Segment,
+        SegmentInformation,
+    )
+    from .surface import Surface
+    from .tour import (
+        Tour,
+        TourInformation,
+        TourSummary,
+    )
+    from .way_type import WayType
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
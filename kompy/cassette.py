@@ -0,0 +1,251 @@
+"""
+Recording and replay of the HTTP exchanges of a connector.
+
+A cassette records the requests sent through its adapter and their responses to a file, and replays them later
+without any network access:
+
+    with Cassette('account.cassette', mode=CassetteModes.RECORD) as cassette:
+        connector = KomootConnector(email=email, password=password, cassette=cassette)
+        connector.hydrate(connector.get_tours())
+
+    with Cassette('account.cassette') as cassette:
+        connector = KomootConnector(email=email, password=password, cassette=cassette)
+        tours = connector.get_tours()
+
+The connector sends all its requests through the cassette, including the downloads of `hydrate`. The tracks fetched
+with the methods of Tour are recorded when the session of the connector is passed, e.g.
+`tour.generate_coordinates(..., session=connector.session)`.
+
+Requests are matched on their method, their url and, unless disabled, their query parameters. When the same request
+was recorded several times, the responses are replayed in the order they were recorded, the last one being repeated.
+Responses are stored decoded, and bodies in base64, one JSON document per exchange and per line. Cassettes contain
+the responses of the login endpoint, with the token of the account: they must be kept as private as the password.
+"""
+import base64
+import os
+import threading
+from datetime import timedelta
+from typing import (
+    IO,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import (
+    parse_qsl,
+    urlsplit,
+)
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from kompy.constants.cassette_modes import CassetteModes
+from kompy.errors.cassette_errors import CassetteMissError
+from kompy.json_codec import (
+    dumps,
+    loads,
+)
+from kompy.log import get_logger
+
+logger = get_logger('KomootCassette')
+
+# Headers describing the encoding of the body on the wire, or the connection, which do not apply to the replay.
+_DROPPED_HEADERS = frozenset({'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive',
+                              'set-cookie'})
+
+_Key = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+class Cassette:
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        mode: str = CassetteModes.REPLAY,
+        match_query: bool = True,
+        ignore_parameters: Iterable[str] = (),
+    ):
+        """
+        Cassette of recorded HTTP exchanges.
+        :param path: The file of the cassette.
+        :param mode: The mode, one of CassetteModes: RECORD sends the requests and records them, replacing the
+        content of the file, REPLAY answers the requests from the file and raises CassetteMissError for the
+        requests that were not recorded, REPLAY_OR_RECORD answers from the file and records the other requests.
+        :param match_query: Whether requests must have the same query parameters to match.
+        :param ignore_parameters: The query parameters ignored when matching requests, e.g. a share token.
+        """
+        if mode not in CassetteModes.list_all():
+            raise ValueError(f'Invalid mode provided: {mode}. Please provide one of {CassetteModes.list_all()}.')
+        self.path = path
+        self.mode = mode
+        self.match_query = match_query
+        self.ignore_parameters = frozenset(ignore_parameters)
+        self.replayed = 0
+        self.recorded = 0
+        # Recorded exchanges and their decoded bodies, by key.
+        self._interactions: Dict[_Key, List[Tuple[dict, bytes]]] = {}
+        self._cursors: Dict[_Key, int] = {}
+        self._lock = threading.Lock()
+        self._file: Optional[IO[bytes]] = None
+        if mode != CassetteModes.RECORD and os.path.exists(path):
+            self._load()
+        elif mode == CassetteModes.REPLAY:
+            raise FileNotFoundError(f'Cassette not found: {path}. Please record it first.')
+        if mode == CassetteModes.RECORD:
+            self._file = open(path, 'wb')
+        elif mode == CassetteModes.REPLAY_OR_RECORD:
+            self._file = open(path, 'ab')
+
+    def _load(self) -> None:
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    interaction = loads(line)
+                    self._interactions.setdefault(self._key(interaction['method'], interaction['url']), []).append(
+                        (interaction, base64.b64decode(interaction['body']))
+                    )
+
+    def _key(self, method: str, url: str) -> _Key:
+        """
+        Get the key requests are matched on.
+        :param method: The HTTP method.
+        :param url: The url, with its query.
+        :return: The method, the url without its query and the sorted query parameters, empty if they are not
+        matched.
+        """
+        parts = urlsplit(url)
+        query: Tuple[Tuple[str, str], ...] = ()
+        if self.match_query:
+            query = tuple(sorted(
+                (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                if name not in self.ignore_parameters
+            ))
+        return method.upper(), f'{parts.scheme}://{parts.netloc}{parts.path}', query
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(interactions) for interactions in self._interactions.values())
+
+    def find(self, request: requests.PreparedRequest) -> Optional[Tuple[dict, bytes]]:
+        """
+        Find the recorded exchange answering a request.
+        :param request: The request.
+        :return: The next recorded exchange matching the request and the body of its response, or None if there is
+        none.
+        """
+        key = self._key(request.method, request.url)
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                return None
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            self.replayed += 1
+            return interactions[min(cursor, len(interactions) - 1)]
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response) -> None:
+        """
+        Record an exchange. The body of the response must have been read.
+        :param request: The request.
+        :param response: The response.
+        """
+        body = response.content or b''
+        interaction = {
+            'method': request.method.upper(),
+            'url': request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {name: value for name, value in response.headers.items()
+                        if name.lower() not in _DROPPED_HEADERS},
+            'body': base64.b64encode(body).decode('ascii'),
+        }
+        line = dumps(interaction) + b'\n'
+        with self._lock:
+            key = self._key(request.method, request.url)
+            self._interactions.setdefault(key, []).append((interaction, body))
+            # Requests recorded during a replay are answered from the recording the next time they are sent.
+            self._cursors[key] = len(self._interactions[key])
+            self.recorded += 1
+            if self._file is not None:
+                self._file.write(line)
+                self._file.flush()
+
+    def adapter(self, pool_size: int = 10) -> 'CassetteAdapter':
+        """
+        Create a transport adapter sending requests through the cassette.
+        :param pool_size: The maximum number of connections kept per host, when requests are recorded.
+        :return: The adapter.
+        """
+        return CassetteAdapter(cassette=self, pool_connections=pool_size, pool_maxsize=pool_size)
+
+    def session(self, pool_size: int = 10) -> requests.Session:
+        """
+        Create a session sending its requests through the cassette.
+        :param pool_size: The maximum number of connections kept per host, when requests are recorded.
+        :return: The session.
+        """
+        session = requests.Session()
+        adapter = self.adapter(pool_size=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def __enter__(self) -> 'Cassette':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the file of the cassette.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class CassetteAdapter(HTTPAdapter):
+    def __init__(self, cassette: Cassette, **kwargs):
+        """
+        Transport adapter recording or replaying the requests of a session.
+        :param cassette: The cassette.
+        :param kwargs: The arguments of HTTPAdapter.
+        """
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if self.cassette.mode != CassetteModes.RECORD:
+            recorded = self.cassette.find(request)
+            if recorded is not None:
+                return self._replay(request, *recorded)
+            if self.cassette.mode == CassetteModes.REPLAY:
+                raise CassetteMissError(method=request.method, url=request.url)
+            logger.debug(f'Recording {request.method} {request.url}.')
+        response = super().send(request, **kwargs)
+        # The body is read to be recorded, streamed responses are then read from memory.
+        response.content
+        self.cassette.record(request, response)
+        return response
+
+    def _replay(self, request: requests.PreparedRequest, interaction: dict, body: bytes) -> requests.Response:
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction['reason']
+        response.headers = CaseInsensitiveDict(interaction['headers'])
+        response.headers['Content-Length'] = str(len(body))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response._content_consumed = True
+        response.raw = None
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(0)
+        return response
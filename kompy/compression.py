@@ -0,0 +1,73 @@
+"""
+Compression of the bodies sent to and received from the API.
+
+Downloads negotiate the best encoding that can be decoded locally: gzip and deflate always, brotli when `brotli` (or
+`brotlicffi`) is installed and zstd when `zstandard` is installed. Responses are decoded transparently, including
+while they are streamed.
+
+Uploads are not compressed by default, since the server has to accept compressed bodies. With
+`KomootConnector(..., upload_encoding=ContentEncodings.GZIP)`, the GPX and FIT files are compressed before they are
+sent, with a `Content-Encoding` header. GPX documents typically shrink about ten times.
+"""
+import functools
+import gzip
+from typing import TYPE_CHECKING
+
+from kompy.constants.content_encodings import ContentEncodings
+
+if TYPE_CHECKING:
+    import requests
+
+# Bodies smaller than this are sent as they are, compressing them would save less than the header costs.
+MIN_COMPRESSED_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=None)
+def accept_encoding() -> str:
+    """
+    Get the value of the Accept-Encoding header of the requests.
+    :return: The encodings that can be decoded by the installed version of urllib3 and compression libraries.
+    """
+    from urllib3.util.request import ACCEPT_ENCODING
+
+    return ACCEPT_ENCODING
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compress a request body.
+    :param data: The body.
+    :param encoding: The content encoding, one of ContentEncodings.
+    :return: The compressed body.
+    """
+    if encoding == ContentEncodings.GZIP:
+        return gzip.compress(data, compresslevel=6)
+    if encoding == ContentEncodings.BROTLI:
+        try:
+            import brotli
+        except ImportError:
+            raise ImportError('Brotli compression requires the brotli package, please install it.')
+        return brotli.compress(data, quality=5)
+    if encoding == ContentEncodings.ZSTD:
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('Zstandard compression requires the zstandard package, please install it.')
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f'Invalid content encoding provided: {encoding}. Please provide one of '
+                     f'{ContentEncodings.list_all()}.')
+
+
+def wire_bytes(response: 'requests.Response', streamed: bool) -> int:
+    """
+    Get the number of bytes of the body of a response received over the wire, before it is decoded.
+    :param response: The response.
+    :param streamed: Whether the response is streamed, in which case its body is not read yet.
+    :return: The number of bytes read from the connection for responses whose body was read, otherwise the announced
+    Content-Length, 0 if unknown.
+    """
+    tell = getattr(response.raw, 'tell', None)
+    if not streamed and tell is not None:
+        return tell()
+    length = response.headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else 0
@@ -0,0 +1,202 @@
+"""
+Pool of connectors serving many accounts from one process.
+
+The connectors of all the accounts send their requests through one shared session, so the connections to the API are
+reused across accounts instead of being opened per account. An account is logged in on its first use only, and its
+connector is cached until it stays idle for longer than `idle_timeout`. Each account gets its own scheduler, limiting
+its concurrency and rate:
+
+    pool = ConnectorPool(rate=5)
+    pool.add_account('alice', email='alice@example.com', password=password)
+    tours = pool.get('alice').get_tours()
+"""
+import threading
+import time
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from kompy.komoot_connector import KomootConnector
+from kompy.log import get_logger
+from kompy.metrics import MetricsHook
+from kompy.scheduler import RequestScheduler
+from kompy.single_flight import SingleFlight
+from kompy.tracing import Tracer
+
+logger = get_logger('KomootConnectorPool')
+
+
+class ConnectorPool:
+    def __init__(
+        self,
+        pool_size: int = 32,
+        max_concurrency: int = 4,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        idle_timeout: Optional[float] = 600.0,
+        metrics: Optional[MetricsHook] = None,
+        tracer: Optional[Tracer] = None,
+    ):
+        """
+        Pool of connectors keyed by account, sharing one session.
+        :param pool_size: The maximum number of connections to the API kept open, shared by all the accounts.
+        :param max_concurrency: The maximum number of requests in flight per account.
+        :param rate: The maximum number of requests started per second per account, optional. If not provided, only
+        the concurrency is limited.
+        :param burst: The number of requests an account can start at once after an idle period, when the rate is
+        limited. If not provided, the maximum concurrency.
+        :param idle_timeout: The time after which the connector of an account that is not used is dropped, in seconds,
+        optional. The account is logged in again on its next use. If not provided, connectors are never dropped.
+        :param metrics: The hook receiving the metrics of all the connectors, optional.
+        :param tracer: The tracer recording the spans of all the connectors, optional.
+        """
+        if pool_size < 1:
+            raise ValueError(f'Invalid pool size provided: {pool_size}. Please provide a positive number.')
+        if idle_timeout is not None and idle_timeout <= 0:
+            raise ValueError(f'Invalid idle timeout provided: {idle_timeout}. Please provide a positive number.')
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.idle_timeout = idle_timeout
+        self.metrics = metrics
+        self.tracer = tracer
+        self.logins = 0
+        self.evictions = 0
+        self.session = requests.Session()
+        # Accounts are authenticated on each request, cookies set for one account must not be sent for another one.
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._credentials: Dict[str, Tuple[str, str]] = {}
+        # Connectors and the time they were last used, least recently used first.
+        self._connectors: 'OrderedDict[str, Tuple[KomootConnector, float]]' = OrderedDict()
+        self._logins = SingleFlight()
+        self._lock = threading.Lock()
+
+    def add_account(self, account: str, email: str, password: str) -> None:
+        """
+        Register the credentials of an account. The account is not logged in until it is used.
+        :param account: The key of the account.
+        :param email: The email address used to log in to Komoot.
+        :param password: The password used to log in to Komoot.
+        """
+        with self._lock:
+            if self._credentials.get(account) != (email, password):
+                self._connectors.pop(account, None)
+            self._credentials[account] = (email, password)
+
+    def remove_account(self, account: str) -> None:
+        """
+        Forget an account and drop its connector.
+        :param account: The key of the account.
+        """
+        with self._lock:
+            self._credentials.pop(account, None)
+            self._connectors.pop(account, None)
+
+    def accounts(self) -> List[str]:
+        """
+        List the registered accounts.
+        :return: The keys of the accounts.
+        """
+        with self._lock:
+            return list(self._credentials)
+
+    def logged_in(self) -> List[str]:
+        """
+        List the accounts whose connector is cached.
+        :return: The keys of the accounts, least recently used first.
+        """
+        with self._lock:
+            return list(self._connectors)
+
+    def get(self, account: str) -> KomootConnector:
+        """
+        Get the connector of an account, logging it in if it is not cached. Concurrent calls for an account that is
+        not logged in share a single login.
+        :param account: The key of the account.
+        :return: The connector.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            if account not in self._credentials:
+                raise ValueError(f'Unknown account provided: {account}. Please add it with add_account first.')
+            cached = self._connectors.get(account)
+            if cached is not None:
+                self._connectors[account] = (cached[0], now)
+                self._connectors.move_to_end(account)
+                return cached[0]
+            credentials = self._credentials[account]
+        return self._logins.do(account, self._login, account, credentials)
+
+    def _login(self, account: str, credentials: Tuple[str, str]) -> KomootConnector:
+        with self._lock:
+            # Another login of the account may have completed since the connector was looked up.
+            cached = self._connectors.get(account)
+            if cached is not None:
+                return cached[0]
+        email, password = credentials
+        connector = KomootConnector(
+            email=email,
+            password=password,
+            metrics=self.metrics,
+            tracer=self.tracer,
+            scheduler=RequestScheduler(max_concurrency=self.max_concurrency, rate=self.rate, burst=self.burst),
+            session=self.session,
+        )
+        with self._lock:
+            self.logins += 1
+            # The account may have been removed or its credentials changed during the login.
+            if self._credentials.get(account) == credentials:
+                self._connectors[account] = (connector, time.monotonic())
+                self._connectors.move_to_end(account)
+        return connector
+
+    def _evict_idle(self, now: float) -> None:
+        """
+        Drop the connectors that were not used within the idle timeout. The lock must be held.
+        :param now: The current monotonic time.
+        """
+        if self.idle_timeout is None:
+            return
+        while self._connectors:
+            account, (_, last_used) = next(iter(self._connectors.items()))
+            if now - last_used <= self.idle_timeout:
+                break
+            del self._connectors[account]
+            self.evictions += 1
+            logger.debug(f'Dropped the idle connector of {account}.')
+
+    def evict_idle(self) -> int:
+        """
+        Drop the connectors that were not used within the idle timeout.
+        :return: The number of dropped connectors.
+        """
+        with self._lock:
+            evictions = self.evictions
+            self._evict_idle(time.monotonic())
+            return self.evictions - evictions
+
+    def __enter__(self) -> 'ConnectorPool':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Drop all the connectors and close the shared connections.
+        """
+        with self._lock:
+            self._connectors.clear()
+        self.session.close()
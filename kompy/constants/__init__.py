@@ -1,5 +1,6 @@
 from .activities import SupportedActivities
 from .difficulty_grade import DifficultyGrade
+from .hydration_targets import HydrationTargets
 from .privacy_status import PrivacyStatus
 from .query_parameters import TourQueryParameters
 from .segment_type import SegmentType
@@ -0,0 +1,23 @@
+from typing import (
+    Final,
+    List,
+)
+
+
+class CassetteModes:
+    """
+    Modes of a cassette recording and replaying the HTTP exchanges of a connector.
+    """
+    RECORD: Final[str] = 'record'
+    REPLAY: Final[str] = 'replay'
+    REPLAY_OR_RECORD: Final[str] = 'replay_or_record'
+
+    @classmethod
+    def list_all(cls) -> List[str]:
+        """
+        List all cassette modes.
+        :return: A list of all cassette modes
+        """
+        return [
+            getattr(cls, attr) for attr in dir(cls) if not attr.startswith('__') and not callable(getattr(cls, attr))
+        ]
@@ -0,0 +1,23 @@
+from typing import (
+    Final,
+    List,
+)
+
+
+class ContentEncodings:
+    """
+    Content encodings of compressed request and response bodies.
+    """
+    GZIP: Final[str] = 'gzip'
+    BROTLI: Final[str] = 'br'
+    ZSTD: Final[str] = 'zstd'
+
+    @classmethod
+    def list_all(cls) -> List[str]:
+        """
+        List all content encodings.
+        :return: A list of all content encodings
+        """
+        return [
+            getattr(cls, attr) for attr in dir(cls) if not attr.startswith('__') and not callable(getattr(cls, attr))
+        ]
@@ -0,0 +1,48 @@
+from typing import (
+    Final,
+    List,
+)
+from urllib.parse import urlsplit
+
+
+class Endpoints:
+    """
+    Endpoints of the Komoot API, used to label the metrics of the requests.
+    """
+    LOGIN: Final[str] = 'login'
+    LIST_TOURS: Final[str] = 'list_tours'
+    TOUR: Final[str] = 'tour'
+    TOUR_GPX: Final[str] = 'tour_gpx'
+    TOUR_FIT: Final[str] = 'tour_fit'
+    TOUR_COORDINATES: Final[str] = 'tour_coordinates'
+    UPLOAD_TOUR: Final[str] = 'upload_tour'
+
+    @classmethod
+    def list_all(cls) -> List[str]:
+        """
+        List all endpoints.
+        :return: A list of all endpoints
+        """
+        return [
+            getattr(cls, attr) for attr in dir(cls) if not attr.startswith('__') and not callable(getattr(cls, attr))
+        ]
+
+    @classmethod
+    def of_url(cls, url: str) -> str:
+        """
+        Find the endpoint of the url of a request.
+        :param url: The url.
+        :return: The endpoint.
+        """
+        path = urlsplit(url).path
+        if path.endswith('/coordinates'):
+            return cls.TOUR_COORDINATES
+        if path.endswith('.gpx'):
+            return cls.TOUR_GPX
+        if path.endswith('.fit'):
+            return cls.TOUR_FIT
+        if '/account/' in path:
+            return cls.LOGIN
+        if path.rstrip('/').endswith('/tours'):
+            return cls.LIST_TOURS if '/users/' in path else cls.UPLOAD_TOUR
+        return cls.TOUR
@@ -0,0 +1,23 @@
+from typing import (
+    Final,
+    List,
+)
+
+
+class HydrationTargets:
+    """
+    Tracks that can be fetched for a collection of tours.
+    """
+    COORDINATES: Final[str] = 'coordinates'
+    GPX: Final[str] = 'gpx'
+    GPX_COLUMNS: Final[str] = 'gpx_columns'
+
+    @classmethod
+    def list_all(cls) -> List[str]:
+        """
+        List all hydration targets.
+        :return: A list of all supported hydration targets
+        """
+        return [
+            getattr(cls, attr) for attr in dir(cls) if not attr.startswith('__') and not callable(getattr(cls, attr))
+        ]
@@ -0,0 +1,23 @@
+from typing import (
+    Final,
+    List,
+)
+
+
+class ImportOutcomes:
+    """
+    Outcomes of the import of a file with KomootConnector.import_files.
+    """
+    UPLOADED: Final[str] = 'uploaded'
+    DUPLICATE: Final[str] = 'duplicate'
+    FAILED: Final[str] = 'failed'
+
+    @classmethod
+    def list_all(cls) -> List[str]:
+        """
+        List all import outcomes.
+        :return: A list of all import outcomes
+        """
+        return [
+            getattr(cls, attr) for attr in dir(cls) if not attr.startswith('__') and not callable(getattr(cls, attr))
+        ]
@@ -0,0 +1,22 @@
+from typing import (
+    Final,
+    List,
+)
+
+
+class PriorityClasses:
+    """
+    Priority classes of the requests sent through a RequestScheduler.
+    """
+    INTERACTIVE: Final[str] = 'interactive'
+    BULK: Final[str] = 'bulk'
+
+    @classmethod
+    def list_all(cls) -> List[str]:
+        """
+        List all priority classes.
+        :return: A list of all priority classes
+        """
+        return [
+            getattr(cls, attr) for attr in dir(cls) if not attr.startswith('__') and not callable(getattr(cls, attr))
+        ]
@@ -11,6 +11,8 @@ class TourObjectTypes:
     KOMPY: Final[str] = 'kompy'
     GPX: Final[str] = 'gpx'
     FIT: Final[str] = 'fit'
+    GPX_COLUMNS: Final[str] = 'gpx_columns'
+    FIT_RECORDS: Final[str] = 'fit_records'
 
     @classmethod
     def list_all(cls) -> List[str]:
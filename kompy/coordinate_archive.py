@@ -0,0 +1,401 @@
+"""
+Append-only, memory-mapped archive of the coordinates of many tours.
+
+The archive is a single file laid out as follows (all integers and doubles are little endian):
+
+- preamble: magic bytes, format version, offset and number of entries of the index
+- tracks: for each tour, its id (UTF-8, padded to 8 bytes) followed by its packed columns of doubles (lat, lon, alt,
+  time), each aligned to 8 bytes
+- index: one entry per tour (hash of the id, offset of the track, length of the id, number of points), sorted by hash
+
+Opening the archive only reads the preamble, and a track is found with a binary search over the memory-mapped index,
+so neither depends on the number of tours stored. On little endian hosts, tracks are returned as views over the
+mapped file, without copying them.
+
+The file is only ever appended to: appending writes the new tracks past the end of the file, followed by a new index
+of all the tracks, and the preamble, the only data written in place, is updated last, once the data it points to is
+written. A failed append leaves the archive as it was, and the tracks and indexes seen by other open archives, in this
+process or another, are never overwritten: they keep reading the tracks stored when they were opened, or last
+refreshed with `refresh`. Appending a tour which is already stored replaces its track, the previous track is left
+unused in the file, as are the previous indexes. Tracks are appended most efficiently in batches with `extend`.
+
+`compact` rewrites the archive without the unused data, into a new file replacing the previous one. It is run by
+`extend` once the unused data outweighs the tracks, so the size of the archive stays linear in the size of its tracks.
+Appends from several processes at once are not supported, an archive should have a single writer at a time.
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import (
+    IO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from kompy.coordinate import Coordinate
+from kompy.coordinate_array import CoordinateArray
+from kompy.errors.codec_errors import CoordinateArchiveError
+
+MAGIC = b'KMPA'
+FORMAT_VERSION = 1
+
+_PREAMBLE = struct.Struct('<4sB3xQQ')
+_INDEX_ENTRY = struct.Struct('<QQII')
+_HASH = struct.Struct('<Q')
+_BIG_ENDIAN = sys.byteorder == 'big'
+_COLUMNS = ('lat', 'lon', 'alt', 'time')
+
+
+def _tour_hash(tour_id: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(tour_id, digest_size=8).digest(), 'little')
+
+
+def _padded(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class TrackView:
+    def __init__(
+        self,
+        lat: Union[memoryview, array],
+        lon: Union[memoryview, array],
+        alt: Union[memoryview, array],
+        time: Union[memoryview, array],
+    ):
+        """
+        Columns of an archived track, as views over the archive when possible.
+
+        Missing altitudes and times are NaN, as in CoordinateArray. The views are only valid while the archive is open.
+        :param lat: Latitudes of the points.
+        :param lon: Longitudes of the points.
+        :param alt: Altitudes of the points.
+        :param time: Times of the points.
+        """
+        self.lat = lat
+        self.lon = lon
+        self.alt = alt
+        self.time = time
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def __getitem__(self, index: int) -> Coordinate:
+        alt = self.alt[index]
+        time = self.time[index]
+        return Coordinate(
+            lat=self.lat[index],
+            lon=self.lon[index],
+            alt=None if math.isnan(alt) else alt,
+            time=None if math.isnan(time) else time,
+        )
+
+    def to_coordinate_array(self) -> CoordinateArray:
+        """
+        Copy the track into a CoordinateArray, which stays valid once the archive is closed.
+        :return: The track.
+        """
+        columns = []
+        for column in _COLUMNS:
+            values = getattr(self, column)
+            if isinstance(values, memoryview):
+                copied = array('d')
+                copied.frombytes(values.cast('B'))
+                values = copied
+            columns.append(values)
+        return CoordinateArray(*columns)
+
+    def to_numpy(self) -> Tuple['numpy.ndarray', ...]:  # noqa: F821
+        """
+        Get the columns as NumPy arrays, without copying them. Requires NumPy to be installed.
+        :return: The lat, lon, alt and time columns, as arrays of float64.
+        """
+        import numpy
+
+        return tuple(numpy.frombuffer(getattr(self, column), dtype=numpy.float64) for column in _COLUMNS)
+
+    def release(self) -> None:
+        """
+        Release the views, required before closing the archive if the track is still referenced.
+        """
+        for column in _COLUMNS:
+            view = getattr(self, column)
+            if isinstance(view, memoryview):
+                view.release()
+
+
+class CoordinateArchive:
+    def __init__(self, path: Union[str, os.PathLike]):
+        """
+        Open a coordinate archive, creating it if it does not exist.
+        :param path: The path of the archive.
+        """
+        self.path = path
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, _PREAMBLE.size, 0))
+        self._file = open(path, 'rb')
+        self._map: Optional[mmap.mmap] = None
+        self._index_offset = 0
+        self._count = 0
+        try:
+            self._remap()
+        except CoordinateArchiveError:
+            self._file.close()
+            raise
+
+    def _remap(self) -> None:
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _PREAMBLE.size:
+            raise CoordinateArchiveError('the preamble is truncated.')
+        magic, version, index_offset, count = _PREAMBLE.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise CoordinateArchiveError(f'unknown magic bytes {magic!r}.')
+        if version != FORMAT_VERSION:
+            raise CoordinateArchiveError(f'unsupported format version {version}.')
+        if index_offset + count * _INDEX_ENTRY.size > len(self._map):
+            if os.fstat(self._file.fileno()).st_size > len(self._map):
+                # Another archive appended to the file after it was mapped, the new data is mapped as well.
+                self._remap()
+                return
+            raise CoordinateArchiveError('the index is truncated.')
+        self._index_offset = index_offset
+        self._count = count
+
+    def refresh(self) -> bool:
+        """
+        Read the tracks appended, or the compaction made, by other archives opened on the same file since this one was
+        opened or last refreshed. Views returned by `view` stay valid.
+        :return: Whether the archive changed.
+        """
+        if os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino:
+            # The file was compacted into a new file, the previous mapping stays alive while views refer to it.
+            self._file.close()
+            self._file = open(self.path, 'rb')
+        else:
+            # The mapping is shared, it shows the preamble as last written.
+            preamble = _PREAMBLE.unpack_from(self._map, 0)
+            if preamble[2:] == (self._index_offset, self._count):
+                return False
+        self._remap()
+        return True
+
+    def __enter__(self) -> 'CoordinateArchive':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the archive. Views returned by `view` must have been released.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, tour_id: str) -> bool:
+        return self._find(str(tour_id).encode('utf-8')) is not None
+
+    def _entry(self, position: int) -> Tuple[int, int, int, int]:
+        return _INDEX_ENTRY.unpack_from(self._map, self._index_offset + position * _INDEX_ENTRY.size)
+
+    def _find(self, tour_id: bytes) -> Optional[Tuple[int, int, int]]:
+        """
+        Find a track in the index.
+        :param tour_id: The encoded tour id.
+        :return: The offset of the track, length of the id and number of points, or None if the tour is not stored.
+        """
+        target = _tour_hash(tour_id)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            (value,) = _HASH.unpack_from(self._map, self._index_offset + middle * _INDEX_ENTRY.size)
+            if value < target:
+                low = middle + 1
+            else:
+                high = middle
+        # Ids with the same hash are adjacent, the stored id tells them apart.
+        for position in range(low, self._count):
+            value, offset, id_length, points = self._entry(position)
+            if value != target:
+                break
+            if self._map[offset:offset + id_length] == tour_id:
+                return offset, id_length, points
+        return None
+
+    def tour_ids(self) -> Iterator[str]:
+        """
+        Iterate over the ids of the stored tours, in index order.
+        :return: An iterator over the tour ids.
+        """
+        for position in range(self._count):
+            _, offset, id_length, _ = self._entry(position)
+            yield self._map[offset:offset + id_length].decode('utf-8')
+
+    def view(self, tour_id: str) -> TrackView:
+        """
+        Get the track of a tour. On little endian hosts, the columns are views over the archive and nothing is copied.
+        :param tour_id: The id of the tour.
+        :return: The track.
+        """
+        found = self._find(str(tour_id).encode('utf-8'))
+        if found is None:
+            raise KeyError(tour_id)
+        offset, id_length, points = found
+        start = offset + _padded(id_length)
+        size = points * 8
+        columns = []
+        for index in range(len(_COLUMNS)):
+            column = memoryview(self._map)[start + index * size:start + (index + 1) * size].cast('d')
+            if _BIG_ENDIAN:
+                copied = array('d', column)
+                column.release()
+                copied.byteswap()
+                column = copied
+            columns.append(column)
+        return TrackView(*columns)
+
+    def get(self, tour_id: str) -> CoordinateArray:
+        """
+        Get a copy of the track of a tour.
+        :param tour_id: The id of the tour.
+        :return: The track.
+        """
+        track = self.view(tour_id)
+        try:
+            return track.to_coordinate_array()
+        finally:
+            track.release()
+
+    def append(self, tour_id: str, coordinates: Union[CoordinateArray, List[Coordinate]]) -> None:
+        """
+        Append the track of a tour to the archive, see `extend`.
+        :param tour_id: The id of the tour.
+        :param coordinates: The track.
+        """
+        self.extend([(tour_id, coordinates)])
+
+    def extend(self, tracks: Iterable[Tuple[str, Union[CoordinateArray, List[Coordinate]]]]) -> None:
+        """
+        Append the tracks of many tours to the archive, writing the index once.
+        :param tracks: The ids and tracks of the tours. Tracks of tours already stored are replaced.
+        """
+        # The tracks appended by other archives are kept in the new index.
+        self.refresh()
+        entries = self._entries()
+        try:
+            with open(self.path, 'r+b') as f:
+                start = _padded(f.seek(0, os.SEEK_END))
+                f.seek(start)
+                for tour_id, coordinates in tracks:
+                    if not isinstance(coordinates, CoordinateArray):
+                        coordinates = CoordinateArray.from_coordinates(coordinates)
+                    encoded_id = str(tour_id).encode('utf-8')
+                    entries[encoded_id] = (_tour_hash(encoded_id), start, len(encoded_id), len(coordinates))
+                    start += self._write_track(f, encoded_id, coordinates)
+                f.write(b''.join(_INDEX_ENTRY.pack(*entry) for entry in sorted(entries.values())))
+                self._commit(f, start, len(entries))
+            size = start + len(entries) * _INDEX_ENTRY.size
+        finally:
+            # Views over the previous mapping keep it alive until they are released.
+            self._remap()
+        if size > 2 * self._live_size(entries.values()):
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Rewrite the archive without the replaced tracks and the previous indexes. The compacted archive replaces the
+        file, other archives opened on it keep reading the previous file until they are refreshed.
+        """
+        self.refresh()
+        entries = []
+        path = f'{os.fspath(self.path)}.compact'
+        try:
+            with open(path, 'wb') as f:
+                f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, _PREAMBLE.size, 0))
+                start = _PREAMBLE.size
+                for value, offset, id_length, points in sorted(map(self._entry, range(self._count)),
+                                                               key=lambda entry: entry[1]):
+                    size = _padded(id_length) + points * 8 * len(_COLUMNS)
+                    f.write(self._map[offset:offset + size])
+                    entries.append((value, start, id_length, points))
+                    start += size
+                f.write(b''.join(_INDEX_ENTRY.pack(*entry) for entry in sorted(entries)))
+                self._commit(f, start, len(entries))
+            os.replace(path, self.path)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        self._file.close()
+        self._file = open(self.path, 'rb')
+        self._remap()
+
+    def _entries(self) -> Dict[bytes, Tuple[int, int, int, int]]:
+        """
+        Read the index.
+        :return: The index entries (hash of the id, offset of the track, length of the id, number of points), by id.
+        """
+        entries = {}
+        for position in range(self._count):
+            value, offset, id_length, points = self._entry(position)
+            entries[self._map[offset:offset + id_length]] = (value, offset, id_length, points)
+        return entries
+
+    @staticmethod
+    def _live_size(entries: Iterable[Tuple[int, int, int, int]]) -> int:
+        """
+        Get the size of the archive once compacted.
+        :param entries: The index entries.
+        :return: The size of the preamble, of the tracks and of the index.
+        """
+        size = _PREAMBLE.size
+        for _, _, id_length, points in entries:
+            size += _padded(id_length) + points * 8 * len(_COLUMNS) + _INDEX_ENTRY.size
+        return size
+
+    @staticmethod
+    def _write_track(f: IO[bytes], encoded_id: bytes, coordinates: CoordinateArray) -> int:
+        """
+        Write a track at the current position of the archive file.
+        :param f: The archive file.
+        :param encoded_id: The encoded tour id.
+        :param coordinates: The track.
+        :return: The number of bytes written.
+        """
+        f.write(encoded_id.ljust(_padded(len(encoded_id)), b'\0'))
+        for column in _COLUMNS:
+            values = getattr(coordinates, column)
+            if _BIG_ENDIAN:
+                values = array('d', values)
+                values.byteswap()
+            f.write(values.tobytes())
+        return _padded(len(encoded_id)) + len(coordinates) * 8 * len(_COLUMNS)
+
+    @staticmethod
+    def _commit(f: IO[bytes], index_offset: int, count: int) -> None:
+        """
+        Point the preamble to an index, once the index and the tracks it refers to are written.
+        :param f: The archive file.
+        :param index_offset: The offset of the index.
+        :param count: The number of entries of the index.
+        """
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(0)
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, index_offset, count))
+        f.flush()
+        os.fsync(f.fileno())
@@ -0,0 +1,108 @@
+import math
+from array import array
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+
+from kompy.coordinate import Coordinate
+
+
+class CoordinateArray:
+    def __init__(
+        self,
+        lat: Optional[Iterable[float]] = None,
+        lon: Optional[Iterable[float]] = None,
+        alt: Optional[Iterable[float]] = None,
+        time: Optional[Iterable[float]] = None,
+    ):
+        """
+        Columnar representation of a track, storing each dimension as a packed array of doubles.
+
+        Missing altitudes and times are stored as NaN and returned as None when converted back to Coordinate objects.
+        :param lat: Latitudes of the points.
+        :param lon: Longitudes of the points.
+        :param alt: Altitudes of the points (optional), same length as lat if provided.
+        :param time: Times of the points (optional), same length as lat if provided.
+        """
+        self.lat: array = array('d', lat if lat is not None else ())
+        self.lon: array = array('d', lon if lon is not None else ())
+        self.alt: array = array('d', alt) if alt is not None else array('d', [math.nan]) * len(self.lat)
+        self.time: array = array('d', time) if time is not None else array('d', [math.nan]) * len(self.lat)
+        if not len(self.lat) == len(self.lon) == len(self.alt) == len(self.time):
+            raise ValueError(
+                f'Invalid columns provided: lat ({len(self.lat)}), lon ({len(self.lon)}), alt ({len(self.alt)}) '
+                f'and time ({len(self.time)}) must have the same length.'
+            )
+
+    @classmethod
+    def from_coordinates(cls, coordinates: Iterable[Coordinate]) -> 'CoordinateArray':
+        """
+        Build a CoordinateArray from Coordinate objects.
+        :param coordinates: The coordinates to pack.
+        :return: A CoordinateArray containing the coordinates.
+        """
+        coordinate_array = cls()
+        for coordinate in coordinates:
+            coordinate_array.append(
+                lat=coordinate.lat,
+                lon=coordinate.lon,
+                alt=coordinate.alt,
+                time=coordinate.time,
+            )
+        return coordinate_array
+
+    def append(
+        self,
+        lat: float,
+        lon: float,
+        alt: Optional[float] = None,
+        time: Optional[float] = None,
+    ) -> None:
+        """
+        Append a point to the array.
+        :param lat: Latitude of the point.
+        :param lon: Longitude of the point.
+        :param alt: Altitude of the point (optional).
+        :param time: Time of the point (optional).
+        """
+        self.lat.append(lat)
+        self.lon.append(lon)
+        self.alt.append(math.nan if alt is None else alt)
+        self.time.append(math.nan if time is None else time)
+
+    def to_coordinates(self) -> List[Coordinate]:
+        """
+        Unpack the array into Coordinate objects.
+        :return: A list of Coordinate objects.
+        """
+        return list(self)
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def __getitem__(self, index: int) -> Coordinate:
+        alt = self.alt[index]
+        time = self.time[index]
+        return Coordinate(
+            lat=self.lat[index],
+            lon=self.lon[index],
+            alt=None if math.isnan(alt) else alt,
+            time=None if math.isnan(time) else time,
+        )
+
+    def __iter__(self) -> Iterator[Coordinate]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CoordinateArray):
+            return NotImplemented
+        return (
+            self.lat == other.lat
+            and self.lon == other.lon
+            and self.alt.tobytes() == other.alt.tobytes()
+            and self.time.tobytes() == other.time.tobytes()
+        )
@@ -0,0 +1,163 @@
+"""
+Incremental reader of the coordinates endpoint.
+
+The response body, `{"items": [{"lat": ..., "lng": ..., "alt": ..., "t": ...}, ...], ...}`, is decoded chunk by chunk:
+the top level object is walked key by key and each item of the `items` array is decoded on its own with
+`json.JSONDecoder.raw_decode` as soon as it is complete, then the consumed text is dropped. Neither the whole body nor
+the list of item dictionaries is ever held in memory.
+"""
+import codecs
+import json
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+)
+
+from kompy.coordinate_array import CoordinateArray
+from kompy.streaming import (
+    DEFAULT_CHUNK_SIZE,
+    StreamSource,
+    iter_chunks,
+)
+
+ItemCallback = Callable[[Dict[str, Any]], None]
+
+_WHITESPACE = ' \t\n\r'
+_COMPACT_THRESHOLD = 64 * 1024
+
+
+class _TextStream:
+    def __init__(self, source: StreamSource, chunk_size: int):
+        """
+        Buffered text over a stream of UTF-8 encoded chunks.
+        :param source: The source of the chunks.
+        :param chunk_size: The size of the chunks read from the source, in bytes.
+        """
+        self._chunks = iter(iter_chunks(source=source, chunk_size=chunk_size))
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._decode = json.JSONDecoder().raw_decode
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+
+    def _fill(self) -> bool:
+        """
+        Read the next chunk into the buffer, dropping the consumed text.
+        :return: False if the stream is exhausted.
+        """
+        if self.exhausted:
+            return False
+        if self.position > _COMPACT_THRESHOLD:
+            self.buffer = self.buffer[self.position:]
+            self.position = 0
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.exhausted = True
+            self.buffer += self._decoder.decode(b'', final=True)
+            return False
+        self.buffer += self._decoder.decode(bytes(chunk))
+        return True
+
+    def peek(self) -> str:
+        """
+        Skip the whitespaces and get the next character, without consuming it.
+        :return: The next character, or an empty string at the end of the stream.
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in _WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ''
+
+    def expect(self, characters: str) -> str:
+        """
+        Consume the next character, which must be one of the given ones.
+        :param characters: The accepted characters.
+        :return: The consumed character.
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f'Invalid coordinates response: expected one of {characters!r}, got {character!r}.')
+        self.position += 1
+        return character
+
+    def value(self) -> Any:
+        """
+        Decode the next JSON value, reading more chunks until it is complete.
+        :return: The decoded value.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise ValueError('Invalid coordinates response: truncated or malformed JSON.')
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.position = end
+            return value
+
+
+def iter_coordinate_items(source: StreamSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Decode the items of a coordinates response one by one, as soon as they are received.
+    :param source: The response body: bytes, a path, a binary file-like object, a (streamed) response or an iterable
+    of chunks of bytes.
+    :param chunk_size: The size of the chunks read from the source, in bytes.
+    :return: An iterator over the item dictionaries.
+    """
+    stream = _TextStream(source=source, chunk_size=chunk_size)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == 'items':
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.position += 1
+            else:
+                while True:
+                    yield stream.value()
+                    if stream.expect(',]') == ']':
+                        break
+        else:
+            stream.value()
+        if stream.expect(',}') == '}':
+            return
+
+
+def read_coordinates(
+    source: StreamSource,
+    item_callback: Optional[ItemCallback] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> CoordinateArray:
+    """
+    Decode a coordinates response into a CoordinateArray.
+    :param source: The response body, see `iter_coordinate_items`.
+    :param item_callback: A function called with each item dictionary as soon as it is decoded, optional.
+    :param chunk_size: The size of the chunks read from the source, in bytes.
+    :return: The coordinates.
+    """
+    coordinates = CoordinateArray()
+    append = coordinates.append
+    for item in iter_coordinate_items(source=source, chunk_size=chunk_size):
+        if item_callback is not None:
+            item_callback(item)
+        append(
+            lat=item['lat'],
+            lon=item['lng'],
+            alt=item.get('alt'),
+            time=item.get('t'),
+        )
+    return coordinates
@@ -0,0 +1,8 @@
+class CassetteMissError(Exception):
+    """Raised when a request replayed from a cassette was not recorded."""
+
+    def __init__(self, method: str, url: str):
+        self.method = method
+        self.url = url
+        self.message = f'No recorded response for {method} {url}. Please record the cassette again.'
+        super().__init__(self.message)
@@ -0,0 +1,16 @@
+class TourCodecError(Exception):
+    """Raised when a binary tour payload cannot be decoded."""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        self.message = f'Invalid tour payload: {self.reason}'
+        super().__init__(self.message)
+
+
+class CoordinateArchiveError(Exception):
+    """Raised when a coordinate archive cannot be read."""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        self.message = f'Invalid coordinate archive: {self.reason}'
+        super().__init__(self.message)
@@ -0,0 +1,290 @@
+"""
+Columnar decoder for the record messages of FIT files.
+
+Only the definition and record messages are interpreted: every definition of a record message is compiled once into a
+`struct.Struct` covering the whole data message, so each data message is decoded with a single `unpack_from` call and
+its values appended to packed columns. Files on disk are memory-mapped instead of being read into memory. The full
+`fit_tool.fit_file.FitFile` can still be built on demand with `FitRecords.to_fit_file`.
+"""
+import math
+import mmap
+import os
+import struct
+from array import array
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from fit_tool.fit_file import FitFile
+
+FIT_EPOCH_OFFSET = 631065600
+
+_RECORD_MESSAGE = 20
+_TIMESTAMP_FIELD = 253
+_ENHANCED_ALTITUDE_FIELD = 78
+_COLUMNS = (
+    'timestamp',
+    'lat',
+    'lon',
+    'altitude',
+    'heart_rate',
+    'power',
+    'cadence',
+)
+# field definition number: (column, scale, offset)
+_RECORD_FIELDS = {
+    _TIMESTAMP_FIELD: ('timestamp', 1, -FIT_EPOCH_OFFSET),
+    0: ('lat', 2 ** 31 / 180, 0),
+    1: ('lon', 2 ** 31 / 180, 0),
+    2: ('altitude', 5, 500),
+    3: ('heart_rate', 1, 0),
+    4: ('cadence', 1, 0),
+    7: ('power', 1, 0),
+    _ENHANCED_ALTITUDE_FIELD: ('altitude', 5, 500),
+}
+# base type: (struct code, invalid value)
+_BASE_TYPES = {
+    0x00: ('B', 0xFF),
+    0x01: ('b', 0x7F),
+    0x02: ('B', 0xFF),
+    0x83: ('h', 0x7FFF),
+    0x84: ('H', 0xFFFF),
+    0x85: ('i', 0x7FFFFFFF),
+    0x86: ('I', 0xFFFFFFFF),
+    0x0A: ('B', 0x00),
+    0x8B: ('H', 0x0000),
+    0x8C: ('I', 0x00000000),
+}
+
+
+class FitRecords:
+    def __init__(self, source: Optional[Union[bytes, str, os.PathLike]] = None):
+        """
+        Record messages of a FIT file stored as packed columns.
+
+        It contains the following attributes, with NaN for missing or invalid values:
+        - timestamp: the times of the records as POSIX timestamps
+        - lat: the latitudes of the records, in degrees
+        - lon: the longitudes of the records, in degrees
+        - altitude: the altitudes of the records, in meters (enhanced altitude when available)
+        - heart_rate: the heart rates of the records, in beats per minute
+        - power: the powers of the records, in watts
+        - cadence: the cadences of the records, in revolutions per minute
+        :param source: The FIT file the records were decoded from, used to build the full FitFile on demand.
+        """
+        self.timestamp: array = array('d')
+        self.lat: array = array('d')
+        self.lon: array = array('d')
+        self.altitude: array = array('d')
+        self.heart_rate: array = array('d')
+        self.power: array = array('d')
+        self.cadence: array = array('d')
+        self._source = source
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def to_numpy(self) -> Dict[str, 'numpy.ndarray']:  # noqa: F821
+        """
+        Get the columns as NumPy arrays, without copying them. Requires NumPy to be installed.
+        :return: A dictionary mapping each column name to a NumPy array of float64.
+        """
+        import numpy
+
+        return {column: numpy.frombuffer(getattr(self, column), dtype=numpy.float64) for column in _COLUMNS}
+
+    def to_fit_file(self) -> 'FitFile':
+        """
+        Decode the complete FIT file with fit_tool.
+        :return: The FitFile object.
+        """
+        if self._source is None:
+            raise ValueError('No FIT file attached to these records, cannot build the FitFile.')
+        from fit_tool.fit_file import FitFile
+
+        if isinstance(self._source, (str, os.PathLike)):
+            with open(self._source, 'rb') as f:
+                return FitFile.from_bytes(f.read())
+        return FitFile.from_bytes(bytes(self._source))
+
+
+class _MessageLayout:
+    def __init__(
+        self,
+        size: int,
+        structure: Optional[struct.Struct] = None,
+        columns: Optional[List[Tuple[int, str, float, float, int]]] = None,
+        timestamp_position: Optional[int] = None,
+        timestamp_structure: Optional[struct.Struct] = None,
+    ):
+        """
+        Compiled layout of the data messages of a definition.
+        :param size: The size of the data messages, in bytes.
+        :param structure: For record messages, the structure of the whole message.
+        :param columns: For record messages, the position in the unpacked values, column, scale, offset and invalid
+        value of each decoded field.
+        :param timestamp_position: For record messages, the position of the timestamp in the unpacked values.
+        :param timestamp_structure: For other messages with a timestamp, a structure reading only the timestamp.
+        """
+        self.size = size
+        self.structure = structure
+        self.columns = columns
+        self.timestamp_position = timestamp_position
+        self.timestamp_structure = timestamp_structure
+
+
+def _compile_definition(
+    fields: List[Tuple[int, int, int]],
+    developer_size: int,
+    big_endian: bool,
+    global_message: int,
+) -> _MessageLayout:
+    """
+    Compile a definition message.
+    :param fields: The field number, size and base type of each field.
+    :param developer_size: The total size of the developer fields.
+    :param big_endian: Whether the data messages are big endian.
+    :param global_message: The global message number.
+    :return: The layout of the data messages.
+    """
+    endian = '>' if big_endian else '<'
+    size = sum(field_size for _, field_size, _ in fields) + developer_size
+    if global_message != _RECORD_MESSAGE:
+        # Only the timestamp of other messages is needed, to resolve compressed timestamps.
+        byte_offset = 0
+        for field_number, field_size, _ in fields:
+            if field_number == _TIMESTAMP_FIELD and field_size == 4:
+                return _MessageLayout(size=size, timestamp_structure=struct.Struct(f'{endian}{byte_offset}xI'))
+            byte_offset += field_size
+        return _MessageLayout(size=size)
+
+    codes = []
+    columns = []
+    # The enhanced altitude takes precedence over the altitude when a message contains both, it is decoded last so
+    # that it overwrites it.
+    enhanced_altitude = []
+    timestamp_position = None
+    position = 0
+    for field_number, field_size, base_type in fields:
+        code, invalid = _BASE_TYPES.get(base_type, (None, None))
+        column = _RECORD_FIELDS.get(field_number)
+        if column is None or code is None or struct.calcsize(code) != field_size:
+            codes.append(f'{field_size}x')
+            continue
+        codes.append(code)
+        name, scale, offset = column
+        if field_number == _TIMESTAMP_FIELD:
+            timestamp_position = position
+        entry = (position, name, scale, offset, invalid)
+        (enhanced_altitude if field_number == _ENHANCED_ALTITUDE_FIELD else columns).append(entry)
+        position += 1
+    if developer_size:
+        codes.append(f'{developer_size}x')
+    return _MessageLayout(
+        size=size,
+        structure=struct.Struct(endian + ''.join(codes)),
+        columns=columns + enhanced_altitude,
+        timestamp_position=timestamp_position,
+    )
+
+
+def _decode(buffer: Union[bytes, memoryview, mmap.mmap], records: FitRecords) -> None:
+    if len(buffer) < 12:
+        raise ValueError('Invalid FIT file provided: the header is truncated.')
+    header_size = buffer[0]
+    (data_size,) = struct.unpack_from('<I', buffer, 4)
+    if bytes(buffer[8:12]) != b'.FIT':
+        raise ValueError('Invalid FIT file provided: missing ".FIT" signature.')
+    end = header_size + data_size
+    if end > len(buffer):
+        raise ValueError('Invalid FIT file provided: the data is truncated.')
+
+    layouts: Dict[int, _MessageLayout] = {}
+    columns = [getattr(records, name) for name in _COLUMNS]
+    column_indices = {name: index for index, name in enumerate(_COLUMNS)}
+    empty_row = [math.nan] * len(_COLUMNS)
+    last_timestamp = 0
+    offset = header_size
+    while offset < end:
+        record_header = buffer[offset]
+        offset += 1
+        compressed_timestamp = None
+        if record_header & 0x80:
+            local_message = (record_header >> 5) & 0x03
+            time_offset = record_header & 0x1F
+            compressed_timestamp = (last_timestamp & ~0x1F) + time_offset
+            if time_offset < (last_timestamp & 0x1F):
+                compressed_timestamp += 0x20
+        elif record_header & 0x40:
+            big_endian = buffer[offset + 1] == 1
+            global_message, field_count = struct.unpack_from('>HB' if big_endian else '<HB', buffer, offset + 2)
+            offset += 5
+            fields = [
+                (buffer[offset + 3 * i], buffer[offset + 3 * i + 1], buffer[offset + 3 * i + 2])
+                for i in range(field_count)
+            ]
+            offset += 3 * field_count
+            developer_size = 0
+            if record_header & 0x20:
+                developer_count = buffer[offset]
+                offset += 1
+                developer_size = sum(buffer[offset + 3 * i + 1] for i in range(developer_count))
+                offset += 3 * developer_count
+            layouts[record_header & 0x0F] = _compile_definition(
+                fields=fields,
+                developer_size=developer_size,
+                big_endian=big_endian,
+                global_message=global_message,
+            )
+            continue
+        else:
+            local_message = record_header & 0x0F
+
+        layout = layouts.get(local_message)
+        if layout is None:
+            raise ValueError(f'Invalid FIT file provided: data message without definition at byte {offset - 1}.')
+        if compressed_timestamp is not None:
+            last_timestamp = compressed_timestamp
+        if layout.structure is not None:
+            values = layout.structure.unpack_from(buffer, offset)
+            row = empty_row.copy()
+            for position, name, scale, value_offset, invalid in layout.columns:
+                value = values[position]
+                if value != invalid:
+                    row[column_indices[name]] = value / scale - value_offset
+            if layout.timestamp_position is not None and values[layout.timestamp_position] != 0xFFFFFFFF:
+                last_timestamp = values[layout.timestamp_position]
+            elif compressed_timestamp is not None:
+                row[0] = compressed_timestamp + FIT_EPOCH_OFFSET
+            for column, value in zip(columns, row):
+                column.append(value)
+        elif layout.timestamp_structure is not None:
+            (timestamp,) = layout.timestamp_structure.unpack_from(buffer, offset)
+            if timestamp != 0xFFFFFFFF:
+                last_timestamp = timestamp
+        offset += layout.size
+
+
+def read_fit_records(source: Union[bytes, bytearray, memoryview, str, os.PathLike]) -> FitRecords:
+    """
+    Decode the record messages of a FIT file into packed columns.
+    :param source: The content of the FIT file, or its path, in which case the file is memory-mapped.
+    :return: The decoded records.
+    """
+    records = FitRecords(source=source)
+    try:
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    _decode(buffer=mapped, records=records)
+        else:
+            _decode(buffer=memoryview(source), records=records)
+    except (IndexError, struct.error) as e:
+        raise ValueError(f'Invalid FIT file provided: {e}')
+    return records
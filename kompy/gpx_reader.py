@@ -0,0 +1,176 @@
+"""
+Incremental GPX reader.
+
+The document is fed chunk by chunk to an `xml.etree.ElementTree.XMLPullParser` and every point is copied into packed
+columns as soon as it is parsed, then dropped from the tree. Unlike `gpxpy.parse`, no object is kept per point and the
+whole document never needs to be in memory.
+"""
+import math
+from array import array
+from datetime import (
+    datetime,
+    timezone,
+)
+from typing import (
+    Callable,
+    List,
+    Optional,
+)
+from xml.etree.ElementTree import (
+    Element,
+    ParseError,
+    XMLPullParser,
+)
+
+from kompy.coordinate_array import CoordinateArray
+from kompy.streaming import (
+    DEFAULT_CHUNK_SIZE,
+    StreamSource,
+    iter_chunks,
+)
+
+PointCallback = Callable[[float, float, Optional[float], Optional[datetime]], None]
+
+_POINT_TAGS = {'trkpt', 'rtept'}
+
+
+class GpxColumns:
+    def __init__(self):
+        """
+        Points of a GPX document stored as packed columns.
+
+        It contains the following attributes:
+        - lat: the latitudes of the track and route points
+        - lon: the longitudes of the track and route points
+        - ele: the elevations of the points, NaN when missing
+        - time: the times of the points as POSIX timestamps, NaN when missing
+        - name: the name of the first track or route, if any
+        - waypoints: the waypoints of the document as a CoordinateArray, without time
+        """
+        self.lat: array = array('d')
+        self.lon: array = array('d')
+        self.ele: array = array('d')
+        self.time: array = array('d')
+        self.name: Optional[str] = None
+        self.waypoints: CoordinateArray = CoordinateArray()
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @property
+    def start_time(self) -> Optional[datetime]:
+        """
+        Get the time of the first timed point.
+        :return: The start time, or None if no point has a time.
+        """
+        for timestamp in self.time:
+            if not math.isnan(timestamp):
+                return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+        return None
+
+    def to_coordinate_array(self) -> CoordinateArray:
+        """
+        Convert the points to a CoordinateArray. As for the Komoot coordinates endpoint, times are converted to offsets
+        in milliseconds from `start_time`.
+        :return: The points as a CoordinateArray.
+        """
+        start_time = self.start_time
+        if start_time is None:
+            times = None
+        else:
+            start = start_time.timestamp()
+            times = array('d', [(timestamp - start) * 1000 for timestamp in self.time])
+        return CoordinateArray(lat=self.lat, lon=self.lon, alt=self.ele, time=times)
+
+
+class _LocalNames(dict):
+    """
+    Cache of the tag names without their namespace.
+    """
+
+    def __missing__(self, tag: str) -> str:
+        name = tag.rpartition('}')[2]
+        self[tag] = name
+        return name
+
+
+def _child_text(element: Element, name: str, local_names: _LocalNames) -> Optional[str]:
+    for child in element:
+        if local_names[child.tag] == name:
+            return child.text
+    return None
+
+
+def _parse_time(text: Optional[str]) -> Optional[datetime]:
+    if not text:
+        return None
+    parsed = datetime.fromisoformat(text.strip())
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def read_gpx(
+    source: StreamSource,
+    point_callback: Optional[PointCallback] = None,
+    store_points: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> GpxColumns:
+    """
+    Read the track and route points of a GPX document into packed columns.
+    :param source: The document: bytes, a path, a binary file-like object, a (streamed) response or an iterable of
+    chunks of bytes.
+    :param point_callback: A function called with the latitude, longitude, elevation and time of each point as soon
+    as it is parsed, optional.
+    :param store_points: Whether to store the points in the returned columns, can be disabled when only the callback
+    is needed.
+    :param chunk_size: The size of the chunks read from the source, in bytes.
+    :return: The points of the document.
+    """
+    columns = GpxColumns()
+    parser = XMLPullParser(events=('start', 'end'))
+    parents: List[Element] = []
+    local_names = _LocalNames()
+    nan = math.nan
+    try:
+        for chunk in iter_chunks(source=source, chunk_size=chunk_size):
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == 'start':
+                    parents.append(element)
+                    continue
+                parents.pop()
+                name = local_names[element.tag]
+                if name in _POINT_TAGS:
+                    lat = float(element.get('lat'))
+                    lon = float(element.get('lon'))
+                    ele_text = _child_text(element, 'ele', local_names)
+                    ele = float(ele_text) if ele_text else None
+                    time = _parse_time(_child_text(element, 'time', local_names))
+                    if point_callback is not None:
+                        point_callback(lat, lon, ele, time)
+                    if store_points:
+                        columns.lat.append(lat)
+                        columns.lon.append(lon)
+                        columns.ele.append(nan if ele is None else ele)
+                        columns.time.append(nan if time is None else time.timestamp())
+                elif name == 'wpt':
+                    ele_text = _child_text(element, 'ele', local_names)
+                    columns.waypoints.append(
+                        lat=float(element.get('lat')),
+                        lon=float(element.get('lon')),
+                        alt=float(ele_text) if ele_text else None,
+                    )
+                elif name == 'name' and columns.name is None and parents and \
+                        local_names[parents[-1].tag] in ('trk', 'rte'):
+                    columns.name = element.text
+                    continue
+                else:
+                    continue
+                # Points are dropped from the tree once copied, so memory does not grow with the document.
+                if parents:
+                    parents[-1].remove(element)
+        parser.close()
+    except (ParseError, TypeError, ValueError) as e:
+        raise ValueError(f'Invalid GPX document provided: {e}')
+    return columns
@@ -0,0 +1,196 @@
+"""
+Streaming GPX writer.
+
+Tracks are serialized point by point and written in chunks, without building a `gpxpy.gpx.GPX` object first. The
+output is a GPX 1.1 document that can be read back with `gpxpy.parse` and uploaded with
+`kompy.komoot_connector.KomootConnector.upload_tour`.
+"""
+import os
+from datetime import (
+    datetime,
+    timezone,
+)
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    Union,
+)
+from xml.sax.saxutils import escape
+
+from kompy.constants.waypoint import Waypoint
+from kompy.coordinate import Coordinate
+from kompy.coordinate_array import CoordinateArray
+from kompy.tour import Tour
+
+DEFAULT_CHUNK_POINTS = 4096
+
+_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<gpx version="1.1" creator="kompy" xmlns="http://www.topografix.com/GPX/1/1">\n'
+)
+
+
+class _TimeFormatter:
+    def __init__(self, start_time: datetime):
+        """
+        Format offsets from a start time as GPX times, caching the date part which is shared by consecutive points.
+        :param start_time: The start time, naive datetimes are considered UTC.
+        """
+        if start_time.tzinfo is None:
+            start_time = start_time.replace(tzinfo=timezone.utc)
+        self._start_milliseconds = round(start_time.timestamp() * 1000)
+        self._days = {}
+
+    def __call__(self, offset_milliseconds: float) -> str:
+        day, milliseconds = divmod(self._start_milliseconds + round(offset_milliseconds), 86_400_000)
+        date = self._days.get(day)
+        if date is None:
+            date = datetime.fromtimestamp(day * 86_400, tz=timezone.utc).strftime('%Y-%m-%d')
+            self._days[day] = date
+        hours, milliseconds = divmod(milliseconds, 3_600_000)
+        minutes, milliseconds = divmod(milliseconds, 60_000)
+        seconds, milliseconds = divmod(milliseconds, 1000)
+        if milliseconds:
+            return f'{date}T{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}Z'
+        return f'{date}T{hours:02d}:{minutes:02d}:{seconds:02d}Z'
+
+
+def _iter_points(coordinates: Union[CoordinateArray, Iterable[Coordinate]]) -> Iterator[tuple]:
+    if isinstance(coordinates, CoordinateArray):
+        for lat, lon, alt, time in zip(coordinates.lat, coordinates.lon, coordinates.alt, coordinates.time):
+            yield lat, lon, None if alt != alt else alt, None if time != time else time
+    else:
+        for coordinate in coordinates:
+            yield coordinate.lat, coordinate.lon, coordinate.alt, coordinate.time
+
+
+def iter_gpx(
+    coordinates: Union[CoordinateArray, Iterable[Coordinate]],
+    waypoints: Optional[Iterable[Waypoint]] = None,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    chunk_points: int = DEFAULT_CHUNK_POINTS,
+) -> Iterator[bytes]:
+    """
+    Serialize a track as a GPX document, chunk by chunk.
+    :param coordinates: The points of the track, either a CoordinateArray or an iterable (or generator) of Coordinate.
+    :param waypoints: Waypoints to add to the document, e.g. Tour.path, optional.
+    :param name: The name of the track, optional.
+    :param start_time: The start time of the track. The time of each coordinate is an offset in milliseconds from it,
+    as returned by the Komoot coordinates endpoint. If not provided, times are not written.
+    :param chunk_points: The number of points serialized in each chunk.
+    :return: An iterator over the UTF-8 encoded chunks of the document.
+    """
+    if chunk_points <= 0:
+        raise ValueError(f'Invalid chunk size provided: {chunk_points}. Please provide a positive number of points.')
+    # The arguments are checked when the function is called, the document is serialized as the chunks are iterated.
+    return _iter_gpx(
+        coordinates=coordinates,
+        waypoints=waypoints,
+        name=name,
+        format_time=_TimeFormatter(start_time) if start_time is not None else None,
+        chunk_points=chunk_points,
+    )
+
+
+def _iter_gpx(
+    coordinates: Union[CoordinateArray, Iterable[Coordinate]],
+    waypoints: Optional[Iterable[Waypoint]],
+    name: Optional[str],
+    format_time: Optional[_TimeFormatter],
+    chunk_points: int,
+) -> Iterator[bytes]:
+    parts = [_HEADER]
+    if name is not None:
+        parts.append(f'<metadata><name>{escape(name)}</name></metadata>\n')
+    for waypoint in waypoints or []:
+        parts.append(f'<wpt lat="{waypoint.location.lat!r}" lon="{waypoint.location.lon!r}">')
+        if waypoint.location.alt is not None:
+            parts.append(f'<ele>{waypoint.location.alt!r}</ele>')
+        if waypoint.reference is not None:
+            parts.append(f'<name>{escape(waypoint.reference)}</name>')
+        parts.append('</wpt>\n')
+    parts.append('<trk>')
+    if name is not None:
+        parts.append(f'<name>{escape(name)}</name>')
+    parts.append('<trkseg>\n')
+
+    pending = 0
+    for lat, lon, alt, time in _iter_points(coordinates):
+        if alt is None and (time is None or format_time is None):
+            parts.append(f'<trkpt lat="{lat!r}" lon="{lon!r}"/>\n')
+        else:
+            point = f'<trkpt lat="{lat!r}" lon="{lon!r}">'
+            if alt is not None:
+                point += f'<ele>{alt!r}</ele>'
+            if time is not None and format_time is not None:
+                point += f'<time>{format_time(time)}</time>'
+            parts.append(point + '</trkpt>\n')
+        pending += 1
+        if pending == chunk_points:
+            yield ''.join(parts).encode('utf-8')
+            parts = []
+            pending = 0
+    parts.append('</trkseg></trk>\n</gpx>\n')
+    yield ''.join(parts).encode('utf-8')
+
+
+def write_gpx(
+    destination: Union[str, os.PathLike, BinaryIO],
+    coordinates: Union[CoordinateArray, Iterable[Coordinate]],
+    waypoints: Optional[Iterable[Waypoint]] = None,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    chunk_points: int = DEFAULT_CHUNK_POINTS,
+) -> int:
+    """
+    Write a track as a GPX document to a file or a socket, chunk by chunk.
+    :param destination: A path, a binary file-like object or a connected socket.
+    :param coordinates: The points of the track, either a CoordinateArray or an iterable (or generator) of Coordinate.
+    :param waypoints: Waypoints to add to the document, e.g. Tour.path, optional.
+    :param name: The name of the track, optional.
+    :param start_time: The start time of the track, see `iter_gpx`.
+    :param chunk_points: The number of points serialized in each chunk.
+    :return: The number of bytes written.
+    """
+    chunks = iter_gpx(
+        coordinates=coordinates,
+        waypoints=waypoints,
+        name=name,
+        start_time=start_time,
+        chunk_points=chunk_points,
+    )
+    if isinstance(destination, (str, os.PathLike)):
+        with open(destination, 'wb') as f:
+            return _write_chunks(write=f.write, chunks=chunks)
+    if hasattr(destination, 'sendall'):
+        return _write_chunks(write=destination.sendall, chunks=chunks)
+    return _write_chunks(write=destination.write, chunks=chunks)
+
+
+def _write_chunks(write: Callable[[bytes], Any], chunks: Iterator[bytes]) -> int:
+    written = 0
+    for chunk in chunks:
+        write(chunk)
+        written += len(chunk)
+    return written
+
+
+def tour_to_gpx(tour: Tour, chunk_points: int = DEFAULT_CHUNK_POINTS) -> Iterator[bytes]:
+    """
+    Serialize the coordinates and path of a tour as a GPX document, chunk by chunk.
+    :param tour: The tour, its coordinates must have been fetched with Tour.generate_coordinates.
+    :param chunk_points: The number of points serialized in each chunk.
+    :return: An iterator over the UTF-8 encoded chunks of the document.
+    """
+    return iter_gpx(
+        coordinates=tour.coordinates,
+        waypoints=tour.path,
+        name=tour.name,
+        start_time=tour.start_date,
+        chunk_points=chunk_points,
+    )
@@ -0,0 +1,233 @@
+"""
+Hedged requests, to cut the tail latency of idempotent GET requests.
+
+When a request has not answered within a percentile of the latencies observed for its endpoint, a second identical
+request is sent, and the first response wins, the other one is closed. A token budget caps the extra load: each
+request earns `budget` tokens and each hedge spends one, so at most a `budget` fraction of the requests is hedged.
+
+Hedging is opt-in, with `KomootConnector(..., hedging=HedgingPolicy())`, or by sending the requests through a session
+with a HedgingAdapter, e.g. for `Tour.generate_coordinates(..., session=policy.session())`.
+"""
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Optional,
+    TypeVar,
+)
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from kompy.constants.endpoints import Endpoints
+from kompy.log import get_logger
+
+logger = get_logger('KomootHedging')
+
+Result = TypeVar('Result')
+
+# Endpoints hedged by default: the GET requests of a single tour and its tracks.
+DEFAULT_HEDGED_ENDPOINTS = (
+    Endpoints.TOUR,
+    Endpoints.TOUR_GPX,
+    Endpoints.TOUR_FIT,
+    Endpoints.TOUR_COORDINATES,
+)
+
+
+class HedgingPolicy:
+    def __init__(
+        self,
+        percentile: float = 95,
+        budget: float = 0.05,
+        burst: int = 10,
+        min_samples: int = 20,
+        window: int = 1000,
+        initial_delay: Optional[float] = None,
+        min_delay: float = 0.0,
+        endpoints: Iterable[str] = DEFAULT_HEDGED_ENDPOINTS,
+        max_workers: int = 32,
+    ):
+        """
+        Policy deciding when to hedge a request.
+        :param percentile: The percentile of the observed latencies after which a request is hedged, between 0 and 100.
+        :param budget: The fraction of the requests that can be hedged, e.g. 0.05 for at most 5% extra requests.
+        :param burst: The maximum number of hedges that can be saved up and sent in a row.
+        :param min_samples: The number of latencies to observe for an endpoint before hedging its requests.
+        :param window: The number of most recent latencies the percentile is computed on, per endpoint.
+        :param initial_delay: The delay after which requests are hedged until enough latencies are observed, in
+        seconds, optional. If not provided, requests are not hedged until then.
+        :param min_delay: The minimum delay after which a request is hedged, in seconds.
+        :param endpoints: The endpoints whose GET requests are hedged, among Endpoints.
+        :param max_workers: The maximum number of requests in flight through the policy.
+        """
+        if not 0 < percentile < 100:
+            raise ValueError(f'Invalid percentile provided: {percentile}. Please provide a value between 0 and 100.')
+        if not 0 <= budget <= 1:
+            raise ValueError(f'Invalid budget provided: {budget}. Please provide a fraction between 0 and 1.')
+        self.percentile = percentile
+        self.budget = budget
+        self.burst = burst
+        self.min_samples = min_samples
+        self.window = window
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.endpoints = frozenset(endpoints)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._tokens = 0.0
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='kompy-hedging')
+
+    def applies(self, method: str, url: str) -> bool:
+        """
+        Check whether requests to a url can be hedged.
+        :param method: The HTTP method.
+        :param url: The url.
+        :return: Whether the request is an idempotent request to a hedged endpoint.
+        """
+        return method.upper() == 'GET' and Endpoints.of_url(url) in self.endpoints
+
+    def observe(self, endpoint: str, latency: float) -> None:
+        """
+        Record the latency of a request.
+        :param endpoint: The endpoint of the request.
+        :param latency: The latency, in seconds.
+        """
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(latency)
+
+    def delay(self, endpoint: str) -> Optional[float]:
+        """
+        Compute the delay after which a request is hedged.
+        :param endpoint: The endpoint of the request.
+        :return: The delay, in seconds, or None if the request must not be hedged.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, ()))
+        if len(latencies) < self.min_samples:
+            return self.initial_delay
+        rank = max(0, math.ceil(self.percentile / 100 * len(latencies)) - 1)
+        return max(self.min_delay, latencies[rank])
+
+    def _spend_token(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedges += 1
+            return True
+
+    def call(
+        self,
+        endpoint: str,
+        function: Callable[[], Result],
+        discard: Optional[Callable[[Result], Any]] = None,
+        on_hedge: Optional[Callable[[str], Any]] = None,
+    ) -> Result:
+        """
+        Call a function, and call it a second time if the first call is slower than the hedging delay.
+        :param endpoint: The endpoint of the request sent by the function.
+        :param function: The function, sending the request.
+        :param discard: A function called with the result of the losing call, if any, e.g. to close a response.
+        :param on_hedge: A function called with the endpoint when the request is sent a second time, optional.
+        :return: The result of the first successful call, or the error of the primary call if both failed.
+        """
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+        def timed() -> Result:
+            start = time.perf_counter()
+            result = function()
+            self.observe(endpoint, time.perf_counter() - start)
+            return result
+
+        primary = self._executor.submit(timed)
+        delay = self.delay(endpoint)
+        if delay is None or primary in wait([primary], timeout=delay).done or not self._spend_token():
+            return primary.result()
+
+        logger.debug(f'Hedging a request to {endpoint} after {delay * 1000:.1f} ms.')
+        hedge = self._executor.submit(timed)
+        if on_hedge is not None:
+            on_hedge(endpoint)
+        done, pending = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = primary if primary in done else hedge
+        loser = hedge if winner is primary else primary
+        if winner.exception() is not None:
+            # The first call failed, the answer of the other one is used, unless it fails too.
+            if loser.exception() is None:
+                winner, loser = loser, winner
+            else:
+                return primary.result()
+        if winner is hedge:
+            with self._lock:
+                self.hedge_wins += 1
+        if discard is not None:
+            loser.add_done_callback(lambda future: _discard(future, discard))
+        return winner.result()
+
+    def session(self, pool_size: int = 10, on_hedge: Optional[Callable[[str], Any]] = None) -> requests.Session:
+        """
+        Create a session whose GET requests are hedged with this policy.
+        :param pool_size: The maximum number of connections kept per host.
+        :param on_hedge: A function called with the endpoint of each request sent a second time, optional.
+        :return: The session.
+        """
+        session = requests.Session()
+        adapter = HedgingAdapter(policy=self, on_hedge=on_hedge, pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self) -> None:
+        """
+        Stop the threads of the policy, once the requests in flight are done.
+        """
+        self._executor.shutdown(wait=True)
+
+
+def _discard(future: Future, discard: Callable[[Any], Any]) -> None:
+    if future.exception() is None:
+        discard(future.result())
+
+
+class HedgingAdapter(HTTPAdapter):
+    def __init__(self, policy: HedgingPolicy, on_hedge: Optional[Callable[[str], Any]] = None, **kwargs):
+        """
+        Transport adapter hedging the GET requests of a session.
+        :param policy: The hedging policy.
+        :param on_hedge: A function called with the endpoint of each request sent a second time, optional.
+        :param kwargs: The arguments of HTTPAdapter.
+        """
+        super().__init__(**kwargs)
+        self.policy = policy
+        self.on_hedge = on_hedge
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if not self.policy.applies(method=request.method, url=request.url):
+            return super().send(request, **kwargs)
+        return self.policy.call(
+            endpoint=Endpoints.of_url(request.url),
+            function=lambda: super(HedgingAdapter, self).send(request.copy(), **kwargs),
+            discard=lambda response: response.close(),
+            on_hedge=self.on_hedge,
+        )
@@ -1,15 +1,28 @@
 import logging
+import re
 from io import BytesIO
-from typing import Optional
+from typing import (
+    TYPE_CHECKING,
+    Optional,
+    Union,
+)
+from urllib.parse import (
+    parse_qsl,
+    urlencode,
+    urlsplit,
+    urlunsplit,
+)
 
-import requests
-from PIL import Image
+from kompy.image_cache import ImageCache
+from kompy.log import get_logger
 
-logger = logging.getLogger('KomootImage')
-ch = logging.StreamHandler()
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-ch.setFormatter(formatter)
-logger.addHandler(ch)
+if TYPE_CHECKING:
+    import requests
+    from PIL import Image
+
+logger = get_logger('KomootImage')
+
+_TEMPLATE_VARIABLE = re.compile(r'{(\w+)}')
 
 
 class KomootImage:
@@ -37,19 +50,126 @@ class KomootImage:
         self.attribution: Optional[str] = attribution
         self.attribution_url: Optional[str] = attribution_url
         self.media_type: Optional[str] = media_type
-        self.image: Optional[Image] = None
+        self.image: Optional['Image.Image'] = None
+
+    def expand_url(
+        self,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        crop: bool = False,
+    ) -> str:
+        """
+        Expand the template variables of the image url.
+
+        Query parameters whose variable is not provided are removed, so that the server returns the original image.
+        :param width: The requested width of the image, in pixels, optional.
+        :param height: The requested height of the image, in pixels, optional.
+        :param crop: Whether the server should crop the image to the requested size instead of fitting it.
+        :return: The expanded url, or the image url itself if it is not templated.
+        """
+        if not self.templated:
+            return self.image_url
+        values = {
+            'width': width,
+            'height': height,
+            'crop': ('true' if crop else 'false') if width is not None or height is not None else None,
+        }
+
+        def substitute(text: str) -> Optional[str]:
+            missing = False
 
-    def load_image(self):
+            def replace(match: re.Match) -> str:
+                nonlocal missing
+                value = values.get(match.group(1))
+                if value is None:
+                    missing = True
+                    return ''
+                return str(value)
+
+            expanded = _TEMPLATE_VARIABLE.sub(replace, text)
+            return None if missing else expanded
+
+        parts = urlsplit(self.image_url)
+        query = []
+        for key, value in parse_qsl(parts.query, keep_blank_values=True):
+            expanded = substitute(value)
+            if expanded is not None:
+                query.append((key, expanded))
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+    def load_image(
+        self,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        crop: bool = False,
+        cache: Optional[ImageCache] = None,
+        session: Optional['requests.Session'] = None,
+    ) -> bool:
         """
         Load the image from the image url.
+        :param width: The width the image is rendered at, in pixels, optional. If the url is templated, only this
+        resolution is downloaded, otherwise the image is reduced while decoding.
+        :param height: The height the image is rendered at, in pixels, optional.
+        :param crop: Whether the server should crop the image to the requested size instead of fitting it.
+        :param cache: A disk cache of the downloaded images, optional.
+        :param session: The session to send the request with, optional. If not provided, a new connection is used.
+        :return: True if the image was loaded, False otherwise.
         """
+        import requests
+
+        url = self.expand_url(width=width, height=height, crop=crop)
+        key = ImageCache.key(url=url, client_hash=self.client_hash) if cache is not None else None
+        content = cache.get(key) if cache is not None else None
+        if content is not None:
+            try:
+                self.image = _decode_image(content=content, width=width, height=height)
+                return True
+            except OSError:
+                logging.warning(f'The cached image of {url} cannot be decoded, downloading it again.')
         try:
-            response = requests.get(self.image_url)
+            response = (session or requests).get(url)
             response.raise_for_status()
-            self.image = Image.open(BytesIO(response.content))
+            content = response.content
+            # Only images which can be decoded are cached.
+            self.image = _decode_image(content=content, width=width, height=height)
+            if cache is not None:
+                cache.put(key, content)
+            return True
         except requests.exceptions.HTTPError as http_err:
             logging.error(f'HTTP error occurred: {http_err}')
         except requests.exceptions.ConnectionError:
-            logging.error(f'Connection to {self.image_url} failed. Please check your internet connection.')
+            logging.error(f'Connection to {url} failed. Please check your internet connection.')
         except requests.exceptions.RequestException as e:
             logging.error(f'Request error: {e}')
+        except OSError as e:
+            # Raised by PIL for truncated bodies and unknown formats, e.g. an error page.
+            logging.error(f'Could not decode the image of {url}: {e}')
+        return False
+
+
+def _decode_image(
+    content: Union[bytes, bytearray],
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+) -> 'Image.Image':
+    """
+    Decode an image, reducing it while decoding when it is much larger than the requested size.
+    :param content: The encoded image.
+    :param width: The requested width, in pixels, optional.
+    :param height: The requested height, in pixels, optional.
+    :return: The decoded image.
+    """
+    from PIL import Image
+
+    image = Image.open(BytesIO(content))
+    if width is not None or height is not None:
+        target = (width or image.width * height // image.height, height or image.height * width // image.width)
+        # JPEG images are decoded directly at a reduced scale, other formats are reduced by an integer factor
+        # afterwards.
+        image.draft(image.mode, target)
+        factor = min(image.width // max(target[0], 1), image.height // max(target[1], 1))
+        if factor >= 2:
+            image = image.reduce(factor)
+    # Images are opened lazily, loading them reports truncated data now rather than when they are used.
+    image.load()
+    return image
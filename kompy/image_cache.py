@@ -0,0 +1,143 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from kompy.log import get_logger
+
+logger = get_logger('KomootImageCache')
+
+DEFAULT_MAX_BYTES = 256 * 2 ** 20
+
+
+class ImageCache:
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        """
+        Size-capped, least recently used cache of downloaded images, stored on disk.
+
+        Entries are keyed by image url and client hash, and written atomically so that several processes can share the
+        same directory. The recency of the entries is tracked with the modification time of their files.
+        :param directory: The directory storing the images, created if needed.
+        :param max_bytes: The maximum total size of the cached images, in bytes.
+        """
+        if max_bytes <= 0:
+            raise ValueError(f'Invalid maximum size provided: {max_bytes}. Please provide a positive number of bytes.')
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        self._size = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self) -> None:
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.img'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._size += size
+
+    @staticmethod
+    def key(url: str, client_hash: Optional[str] = None) -> str:
+        """
+        Compute the key of an image.
+        :param url: The url the image is downloaded from.
+        :param client_hash: The client hash of the image, optional.
+        :return: The key of the image.
+        """
+        return hashlib.sha256(f'{client_hash or ""}\n{url}'.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.img')
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get an image from the cache, marking it as recently used.
+        :param key: The key of the image.
+        :return: The content of the image, or None if it is not cached.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._size -= self._entries.pop(f'{key}.img', 0)
+            return None
+        with self._lock:
+            if f'{key}.img' not in self._entries:
+                self._size += len(content)
+            self._entries[f'{key}.img'] = len(content)
+            self._entries.move_to_end(f'{key}.img')
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        """
+        Store an image in the cache, evicting the least recently used images if the cache is full.
+        :param key: The key of the image.
+        :param content: The content of the image.
+        """
+        if len(content) > self.max_bytes:
+            logger.warning(f'Image of {len(content)} bytes is larger than the cache, not caching it.')
+            return
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(content)
+            os.replace(temporary_path, self._path(key))
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+        with self._lock:
+            self._size += len(content) - self._entries.pop(f'{key}.img', 0)
+            self._entries[f'{key}.img'] = len(content)
+            evicted = []
+            while self._size > self.max_bytes:
+                name, size = self._entries.popitem(last=False)
+                self._size -= size
+                evicted.append(name)
+        for name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        """
+        Remove every image from the cache.
+        """
+        with self._lock:
+            names = list(self._entries)
+            self._entries.clear()
+            self._size = 0
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """
+        Get the total size of the cached images.
+        :return: The size, in bytes.
+        """
+        return self._size
@@ -0,0 +1,175 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    as_completed,
+)
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from kompy.image import KomootImage
+from kompy.image_cache import ImageCache
+from kompy.log import get_logger
+from kompy.tour import Tour
+
+logger = get_logger('KomootImagePrefetch')
+
+DEFAULT_MEMORY_BUDGET = 512 * 2 ** 20
+
+PrefetchProgressCallback = Callable[[int, int, KomootImage, Optional[Exception]], None]
+
+
+def decoded_size(image: KomootImage) -> int:
+    """
+    Estimate the memory used by a decoded image.
+    :param image: The image.
+    :return: The size of its pixels, in bytes, 0 if it is not loaded.
+    """
+    if image.image is None:
+        return 0
+    return image.image.width * image.image.height * len(image.image.getbands())
+
+
+class ImageMemoryBudget:
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_BUDGET):
+        """
+        Keep decoded images in memory up to a total size, unloading the least recently used ones beyond it.
+
+        Unloaded images have their `image` attribute reset to None, they can be loaded again from their url or from a
+        disk cache.
+        :param max_bytes: The maximum total size of the decoded images, in bytes.
+        """
+        if max_bytes <= 0:
+            raise ValueError(f'Invalid memory budget provided: {max_bytes}. Please provide a positive number of bytes.')
+        self.max_bytes: int = max_bytes
+        self._lock = threading.Lock()
+        self._images: 'OrderedDict[int, KomootImage]' = OrderedDict()
+        self._sizes: Dict[int, int] = {}
+        self._size = 0
+
+    def add(self, image: KomootImage) -> None:
+        """
+        Account for a loaded image, or mark it as recently used if it is already accounted for.
+        :param image: The loaded image.
+        """
+        size = decoded_size(image)
+        with self._lock:
+            key = id(image)
+            self._size += size - self._sizes.get(key, 0)
+            self._images[key] = image
+            self._images.move_to_end(key)
+            self._sizes[key] = size
+            while self._size > self.max_bytes and len(self._images) > 1:
+                evicted_key, evicted = self._images.popitem(last=False)
+                self._size -= self._sizes.pop(evicted_key)
+                evicted.image = None
+
+    def __contains__(self, image: KomootImage) -> bool:
+        return id(image) in self._images
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    @property
+    def size(self) -> int:
+        """
+        Get the total size of the decoded images.
+        :return: The size, in bytes.
+        """
+        return self._size
+
+
+def prefetch_images(
+    images: Iterable[KomootImage],
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    crop: bool = False,
+    cache: Optional[ImageCache] = None,
+    budget: Optional[ImageMemoryBudget] = None,
+    concurrency: int = 16,
+    progress_callback: Optional[PrefetchProgressCallback] = None,
+) -> List[KomootImage]:
+    """
+    Download and decode many images in parallel, over a shared session.
+    :param images: The images to load, the decoded images are stored on the KomootImage objects.
+    :param width: The width the images are rendered at, in pixels, optional, see `KomootImage.load_image`.
+    :param height: The height the images are rendered at, in pixels, optional.
+    :param crop: Whether the server should crop the images to the requested size instead of fitting them.
+    :param cache: A disk cache of the downloaded images, optional.
+    :param budget: The memory budget of the decoded images. If not provided, a budget of DEFAULT_MEMORY_BUDGET bytes
+    is used.
+    :param concurrency: The maximum number of concurrent downloads.
+    :param progress_callback: A function called after each image with the number of completed and total images, the
+    image and the exception raised, if any.
+    :return: The images that could not be loaded.
+    """
+    if concurrency < 1:
+        raise ValueError(f'Invalid concurrency provided: {concurrency}. Please provide a positive number.')
+    if budget is None:
+        budget = ImageMemoryBudget()
+    images = list(images)
+    failed = []
+
+    def load(image: KomootImage, session: requests.Session) -> None:
+        if not image.load_image(width=width, height=height, crop=crop, cache=cache, session=session):
+            raise ValueError(f'Could not load image {image.image_url}.')
+
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        futures = {executor.submit(load, image, session): image for image in images}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            image = futures[future]
+            error = future.exception()
+            if error is None:
+                budget.add(image)
+            else:
+                failed.append(image)
+                logger.error(f'Failed to load image {image.image_url}: {error}')
+            if progress_callback is not None:
+                progress_callback(completed, len(images), image, error)
+    logger.info(f'Loaded {len(images) - len(failed)} of {len(images)} images.')
+    return failed
+
+
+def prefetch_map_images(
+    tours: Iterable[Tour],
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    crop: bool = False,
+    cache: Optional[ImageCache] = None,
+    budget: Optional[ImageMemoryBudget] = None,
+    concurrency: int = 16,
+    progress_callback: Optional[PrefetchProgressCallback] = None,
+) -> List[KomootImage]:
+    """
+    Download and decode the vector map images of many tours in parallel, see `prefetch_images`.
+    :param tours: The tours, tours without a vector map image are skipped.
+    :param width: The width the images are rendered at, in pixels, optional.
+    :param height: The height the images are rendered at, in pixels, optional.
+    :param crop: Whether the server should crop the images to the requested size instead of fitting them.
+    :param cache: A disk cache of the downloaded images, optional.
+    :param budget: The memory budget of the decoded images, optional.
+    :param concurrency: The maximum number of concurrent downloads.
+    :param progress_callback: A function called after each image, see `prefetch_images`.
+    :return: The images that could not be loaded.
+    """
+    return prefetch_images(
+        images=[tour.vector_map_image for tour in tours if getattr(tour, 'vector_map_image', None) is not None],
+        width=width,
+        height=height,
+        crop=crop,
+        cache=cache,
+        budget=budget,
+        concurrency=concurrency,
+        progress_callback=progress_callback,
+    )
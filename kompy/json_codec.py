@@ -0,0 +1,113 @@
+"""
+JSON decoding and encoding layer used by the connector and the models.
+
+The codec is chosen once: orjson when it is installed (`pip install kompy[fast]`), the standard library otherwise. It
+can be replaced with `set_codec`, e.g. to plug another backend or force the standard library.
+"""
+import json
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Union,
+)
+
+if TYPE_CHECKING:
+    import requests
+
+
+class JsonCodec:
+    """
+    JSON codec based on the standard library.
+    """
+    name = 'json'
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """
+        Decode a JSON document.
+        :param data: The document, UTF-8 encoded bytes or text.
+        :return: The decoded value.
+        """
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+    def dumps(self, value: Any) -> bytes:
+        """
+        Encode a value as a JSON document.
+        :param value: The value.
+        :return: The UTF-8 encoded document.
+        """
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    JSON codec based on orjson.
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return self._orjson.loads(data)
+
+    def dumps(self, value: Any) -> bytes:
+        return self._orjson.dumps(value)
+
+
+def _default_codec() -> JsonCodec:
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        return JsonCodec()
+
+
+_codec: JsonCodec = _default_codec()
+
+
+def get_codec() -> JsonCodec:
+    """
+    Get the codec in use.
+    :return: The codec.
+    """
+    return _codec
+
+
+def set_codec(codec: JsonCodec) -> None:
+    """
+    Replace the codec in use.
+    :param codec: The new codec.
+    """
+    global _codec
+    _codec = codec
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    Decode a JSON document with the codec in use.
+    :param data: The document, UTF-8 encoded bytes or text.
+    :return: The decoded value.
+    """
+    return _codec.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode a value as a JSON document with the codec in use.
+    :param value: The value.
+    :return: The UTF-8 encoded document.
+    """
+    return _codec.dumps(value)
+
+
+def response_json(response: 'requests.Response') -> Any:
+    """
+    Decode the body of a response with the codec in use. Decode each body once and keep the result, instead of calling
+    this function again.
+    :param response: The response.
+    :return: The decoded body.
+    """
+    return _codec.loads(response.content)
@@ -1,23 +1,45 @@
-import json
+import contextlib
 import logging
+import os
 import re
+import time
+from contextvars import copy_context
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    as_completed,
+)
 from typing import (
+    TYPE_CHECKING,
+    Callable,
+    ContextManager,
+    Iterable,
+    Iterator,
     List,
     Optional,
+    Tuple,
     Union,
     Any,
     Dict,
 )
 
-import dateutil.parser as parser
-import gpxpy
 import requests
-from fit_tool.fit_file import FitFile
-from gpxpy.gpx import GPX
+from requests.adapters import HTTPAdapter
 from email.utils import parseaddr
 
 from kompy.authentication import Authentication
+from kompy.cassette import Cassette
+from kompy.compression import (
+    MIN_COMPRESSED_SIZE,
+    accept_encoding,
+    compress,
+    wire_bytes,
+)
 from kompy.constants.activities import SupportedActivities
+from kompy.constants.content_encodings import ContentEncodings
+from kompy.constants.endpoints import Endpoints
+from kompy.constants.hydration_targets import HydrationTargets
+from kompy.constants.import_outcomes import ImportOutcomes
+from kompy.constants.priority_classes import PriorityClasses
 from kompy.constants.privacy_status import PrivacyStatus
 from kompy.constants.query_parameters import TourQueryParameters
 from kompy.constants.tour_constants import (
@@ -29,13 +51,48 @@ from kompy.constants.tour_object_types import TourObjectTypes
 from kompy.constants.urls import KomootUrl
 from kompy.errors.initialisation_errors import NotEmailError
 from kompy.errors.privacy_errors import PrivacyError
+from kompy.fit_reader import (
+    FitRecords,
+    read_fit_records,
+)
+from kompy.gpx_reader import (
+    GpxColumns,
+    read_gpx,
+)
+from kompy.hedging import (
+    HedgingAdapter,
+    HedgingPolicy,
+)
+from kompy.json_codec import (
+    dumps,
+    response_json,
+)
+from kompy.log import get_logger
+from kompy.metrics import (
+    MetricsHook,
+    measured,
+)
+from kompy.scheduler import RequestScheduler
+from kompy.single_flight import SingleFlight
 from kompy.tour import Tour
+from kompy.tour_parsing import parse_tours
+from kompy.tracing import (
+    Tracer,
+    maybe_span,
+    traced,
+)
+from kompy.upload_index import (
+    UploadIndex,
+    file_track_fingerprint,
+)
+
+if TYPE_CHECKING:
+    from fit_tool.fit_file import FitFile
+    from gpxpy.gpx import GPX
 
-logger = logging.getLogger('KomootConnector')
-ch = logging.StreamHandler()
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-ch.setFormatter(formatter)
-logger.addHandler(ch)
+logger = get_logger('KomootConnector')
+
+HydrationProgressCallback = Callable[[int, int, Tour, str, Optional[Exception]], None]
 
 
 class KomootConnector:
@@ -44,21 +101,76 @@ class KomootConnector:
         self,
         email: str,
         password: str,
+        metrics: Optional[MetricsHook] = None,
+        tracer: Optional[Tracer] = None,
+        coalesce: bool = True,
+        hedging: Optional[HedgingPolicy] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        session: Optional[requests.Session] = None,
+        upload_encoding: Optional[str] = None,
+        cassette: Optional[Cassette] = None,
     ):
         """
         Connector to Komoot API.
         :param email: email address used to log in to Komoot
         :param password: password used to log in to Komoot
+        :param metrics: The hook receiving the timings, sizes and status codes of the requests and operations,
+        optional. If not provided, nothing is measured.
+        :param tracer: The tracer recording the spans of the operations, their pages, requests and parsing, optional.
+        If not provided, no span is recorded.
+        :param coalesce: Whether concurrent calls of get_tour_by_id for the same tour, object type and share token share
+        a single request, in which case they return the same object.
+        :param hedging: The policy hedging the slow GET requests of tours and tracks, optional. If not provided,
+        requests are not hedged.
+        :param scheduler: The scheduler limiting the concurrency and rate of the requests, and sharing them between
+        interactive and bulk operations, optional. It can be shared by several connectors. If not provided, requests
+        are sent as soon as they are made.
+        :param session: The session sending the requests, optional. It can be shared by several connectors to reuse
+        their connections, see kompy.connector_pool. If not provided, each request opens its own connection.
+        :param upload_encoding: The content encoding the uploaded files are compressed with, one of ContentEncodings,
+        optional. The server must accept compressed bodies. If not provided, uploads are not compressed.
+        :param cassette: The cassette recording or replaying the requests of the connector, optional, see
+        kompy.cassette. It provides the session of the connector, and requests are not hedged. If not provided,
+        requests are sent to the API.
         """
         if '@' not in parseaddr(email)[1]:
             raise NotEmailError(email)
+        if upload_encoding is not None and upload_encoding not in ContentEncodings.list_all():
+            raise ValueError(f'Invalid upload encoding provided: {upload_encoding}. Please provide one of '
+                             f'{ContentEncodings.list_all()}.')
+        if cassette is not None:
+            if session is not None:
+                raise ValueError('A session cannot be provided with a cassette, the cassette provides the session.')
+            session = cassette.session()
 
+        self.metrics = metrics
+        self.tracer = tracer
+        self.coalesce = coalesce
+        self._tour_fetches = SingleFlight()
+        self.hedging = hedging
+        self._hedged_session = (
+            hedging.session(on_hedge=self._record_retry) if hedging is not None and cassette is None else None
+        )
+        self.scheduler = scheduler
+        self.session = session
+        self.upload_encoding = upload_encoding
+        self.cassette = cassette
         self.authentication = Authentication(
             email_address=email,
             password=password,
         )
+        self._login()
+
+    @measured('login')
+    @traced('login')
+    def _login(self) -> None:
+        """
+        Log in and store the token and the username of the user.
+        """
         try:
-            response = requests.get(
+            response = self._request(
+                endpoint=Endpoints.LOGIN,
+                method='get',
                 url=KomootUrl.USER_LOGIN_URL.format(email_address=self.authentication.get_email_address()),
                 auth=(self.authentication.get_email_address(), self.authentication.get_password()),
             )
@@ -70,14 +182,130 @@ class KomootConnector:
             raise ConnectionError(
                 'Connection to Komoot API failed. Please check your internet connection.'
             )
+        user = response_json(response)
         self.authentication.set_token(
-            token=response.json()['password']
+            token=user['password']
         )
         self.authentication.set_username(
-            username=json.loads(response.content.decode('utf-8'))['username']
+            username=user['username']
         )
         logger.info(f'Logged in as {self.authentication.get_username()}.')
 
+    def _slot(self, priority: str) -> ContextManager:
+        """
+        Hold a slot of the scheduler, if any.
+        :param priority: The default priority class of the requests, one of PriorityClasses.
+        :return: A context manager.
+        """
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+        return self.scheduler.slot(priority)
+
+    def _request(
+        self,
+        endpoint: str,
+        method: str,
+        priority: str = PriorityClasses.INTERACTIVE,
+        compress_body: bool = False,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a request, once the scheduler grants it a slot, and report it to the metrics hook and the tracer, if any.
+        :param endpoint: The endpoint, one of Endpoints, used to label the metrics and the span.
+        :param method: The HTTP method, the name of the matching function of requests.
+        :param priority: The default priority class of the request, one of PriorityClasses.
+        :param compress_body: Whether to compress the body of the request with the upload encoding, if any.
+        :param kwargs: The arguments of the request.
+        :return: The response.
+        """
+        kwargs['headers'] = {'Accept-Encoding': accept_encoding(), **(kwargs.get('headers') or {})}
+        data = kwargs.get('data')
+        body_size = len(data) if isinstance(data, (bytes, bytearray, str)) else 0
+        if compress_body and self.upload_encoding is not None and body_size >= MIN_COMPRESSED_SIZE:
+            kwargs['data'] = compress(data=bytes(data), encoding=self.upload_encoding)
+            kwargs['headers']['Content-Encoding'] = self.upload_encoding
+        with self._slot(priority):
+            if self.tracer is None:
+                return self._send(endpoint=endpoint, method=method, body_size=body_size, **kwargs)
+            with self.tracer.span('request', category='http', endpoint=endpoint, method=method) as span:
+                response = self._send(endpoint=endpoint, method=method, body_size=body_size, **kwargs)
+                span.attributes['status_code'] = response.status_code
+                return response
+
+    def _send(self, endpoint: str, method: str, body_size: int, **kwargs) -> requests.Response:
+        """
+        Send a request, and report it to the metrics hook, if any.
+        :param endpoint: The endpoint, one of Endpoints, used to label the metrics.
+        :param method: The HTTP method, the name of the matching function of requests.
+        :param body_size: The size of the body of the request before compression, in bytes.
+        :param kwargs: The arguments of the request.
+        :return: The response.
+        """
+        send = getattr(self.session if self.session is not None else requests, method)
+        if self._hedged_session is not None and self.hedging.applies(method=method, url=kwargs['url']):
+            send = getattr(self._hedged_session, method)
+        if self.metrics is None:
+            return send(**kwargs)
+        start = time.perf_counter()
+        data = kwargs.get('data')
+        wire_bytes_sent = len(data) if isinstance(data, (bytes, bytearray, str)) else 0
+        try:
+            response = send(**kwargs)
+        except requests.exceptions.RequestException:
+            self.metrics.record_request(endpoint=endpoint, method=method, status_code=None,
+                                        duration=time.perf_counter() - start, bytes_sent=body_size, bytes_received=0)
+            self.metrics.record_wire_bytes(endpoint=endpoint, bytes_sent=wire_bytes_sent, bytes_received=0)
+            raise
+        streamed = kwargs.get('stream', False)
+        self.metrics.record_request(
+            endpoint=endpoint,
+            method=method,
+            status_code=response.status_code,
+            duration=time.perf_counter() - start,
+            bytes_sent=body_size,
+            bytes_received=_received_bytes(response, streamed=streamed),
+        )
+        self.metrics.record_wire_bytes(endpoint=endpoint, bytes_sent=wire_bytes_sent,
+                                       bytes_received=wire_bytes(response, streamed=streamed))
+        return response
+
+    def _record_response(self, response: requests.Response, *args, **kwargs) -> None:
+        """
+        Report a response received through a session to the metrics hook and the tracer, used as a response hook of
+        the session. The duration of the request is the time until the headers of the response were received.
+        :param response: The response.
+        """
+        endpoint = Endpoints.of_url(response.request.url)
+        method = response.request.method.lower()
+        duration = response.elapsed.total_seconds()
+        if self.tracer is not None:
+            self.tracer.add_span('request', duration=duration, category='http', endpoint=endpoint, method=method,
+                                 status_code=response.status_code)
+        if self.metrics is not None:
+            body = response.request.body
+            self.metrics.record_request(
+                endpoint=endpoint,
+                method=method,
+                status_code=response.status_code,
+                duration=duration,
+                bytes_sent=len(body) if body else 0,
+                bytes_received=_received_bytes(response, streamed=True),
+            )
+            self.metrics.record_wire_bytes(endpoint=endpoint, bytes_sent=len(body) if body else 0,
+                                           bytes_received=wire_bytes(response, streamed=True))
+
+    def _record_retry(self, endpoint: str) -> None:
+        """
+        Report a request sent again, e.g. hedged, to the metrics hook, if any.
+        :param endpoint: The endpoint of the request.
+        """
+        if self.metrics is not None:
+            self.metrics.record_retry(endpoint=endpoint)
+
+    def _record_parse(self, operation: str, start: float, items: int) -> None:
+        if self.metrics is not None:
+            self.metrics.record_parse(operation=operation, duration=time.perf_counter() - start, items=items)
+
     @staticmethod
     def _validate_sport_types(sport_types: List[str]) -> None:
         if not isinstance(sport_types, list):
@@ -88,6 +316,8 @@ class KomootConnector:
             if sport_type not in SupportedActivities.list_all():
                 raise ValueError(f'Invalid sport type provided: {sport_type}. Please provide a valid sport type.')
 
+    @measured('get_tours')
+    @traced('get_tours')
     def get_tours(
         self,
         limit: Optional[int] = None,
@@ -104,6 +334,7 @@ class KomootConnector:
         tour_name: Optional[str] = None,
         sort: Optional[str] = None,
         sort_field: Optional[str] = None,
+        parse_processes: Optional[int] = None,
     ) -> List[Tour]:
         """
         Get a list of tours.
@@ -121,8 +352,97 @@ class KomootConnector:
         :param tour_name: The tour name to filter by, if not provided, return all tours
         :param sort: The sort direction, if not provided, return all tours
         :param sort_field: The field to sort by, if not provided, return all tours
+        :param parse_processes: The number of processes parsing the tours, useful for large accounts. If not provided,
+        the tours are parsed in the current process.
         :return: A list of tour objects
         """
+        query_parameters, user_identifier = self._tour_query(
+            limit=limit,
+            user_identifier=user_identifier,
+            page=page,
+            status=status,
+            tour_type=tour_type,
+            only_unlocked=only_unlocked,
+            center=center,
+            max_distance=max_distance,
+            sport_types=sport_types,
+            start_date=start_date,
+            end_date=end_date,
+            tour_name=tour_name,
+            sort=sort,
+            sort_field=sort_field,
+        )
+        tours = [
+            tour
+            for tour_list in self._iter_tour_pages(query_parameters=query_parameters, user_identifier=user_identifier,
+                                                   limit=limit)
+            for tour in tour_list
+        ]
+        # Skip tours that cannot be parsed into Tour objects, but surface
+        # an aggregate error if the API returned tours and none could be parsed.
+        parse_start = time.perf_counter()
+        with maybe_span(self.tracer, 'parse', category='parse', tours=len(tours)):
+            tour_objects, parse_failures = parse_tours(tour_dicts=tours, processes=parse_processes)
+        self._record_parse(operation='get_tours', start=parse_start, items=len(tour_objects))
+        if tours and not tour_objects:
+            failed_tour_ids = ', '.join(str(tour_id) for tour_id, _ in parse_failures)
+            raise ValueError(
+                f'Failed to parse all {len(tours)} returned tours. '
+                f'This may indicate an API/schema change. '
+                f'Failed tour ids: {failed_tour_ids}'
+            )
+        return tour_objects
+
+    def iter_tour_pages(
+        self,
+        user_identifier: Optional[str] = None,
+        **filters,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over the pages of a list of tours, each page being fetched when the previous one was consumed.
+        :param user_identifier: The user identifier, if not provided, the logged in user is used
+        :param filters: The filters of get_tours, e.g. sport_types or sort_field
+        :return: An iterator over the pages, each one a list of tour dictionaries to parse with parse_tours
+        """
+        query_parameters, user_identifier = self._tour_query(user_identifier=user_identifier, **filters)
+        return self._iter_tour_pages(query_parameters=query_parameters, user_identifier=user_identifier,
+                                     limit=filters.get('limit'))
+
+    def _tour_query(
+        self,
+        limit: Optional[int] = None,
+        user_identifier: Optional[str] = None,
+        page: Optional[int] = None,
+        status: Optional[str] = PrivacyStatus.PUBLIC,
+        tour_type: Optional[str] = None,
+        only_unlocked: Optional[bool] = False,
+        center: Optional[str] = None,
+        max_distance: Optional[int] = None,
+        sport_types: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        tour_name: Optional[str] = None,
+        sort: Optional[str] = None,
+        sort_field: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Validate the filters of a list of tours.
+        :param limit: The maximum number of tours to retrieve, if not provided, all tours are returned
+        :param user_identifier: The user identifier, if not provided, the logged in user is used
+        :param page: The page to retrieve, if not provided, the first page is used
+        :param status: The privacy status of the tour, if not provided, only public tours are returned
+        :param tour_type: The tour type, if not provided, return all tours
+        :param only_unlocked: Whether to only return unlocked tours, if not provided, return all tours
+        :param center: The center of the search area, if not provided, return all tours
+        :param max_distance: The maximum distance to the center, if not provided, return all tours
+        :param sport_types: The sport types to filter by, if not provided, return all tours
+        :param start_date: The start date to filter by, if not provided, return all tours
+        :param end_date: The end date to filter by, if not provided, return all tours
+        :param tour_name: The tour name to filter by, if not provided, return all tours
+        :param sort: The sort direction, if not provided, return all tours
+        :param sort_field: The field to sort by, if not provided, return all tours
+        :return: The query parameters and the user identifier
+        """
         if user_identifier is None:
             logger.warning(f'No user identifier provided, '
                            f'using the currently logged user: {self.authentication.get_username()}')
@@ -148,6 +468,8 @@ class KomootConnector:
             logger.warning('Max distance provided but no center, ignoring max distance.')
         if sport_types is not None:
             self._validate_sport_types(sport_types)
+        if start_date is not None or end_date is not None:
+            import dateutil.parser as parser
         if start_date is not None:
             start_date = parser.parse(start_date)
         if end_date is not None:
@@ -180,75 +502,113 @@ class KomootConnector:
             sort_field=sort_field,
         )
 
+        return query_parameters, user_identifier
+
+    def _iter_tour_pages(
+        self,
+        query_parameters: Dict[str, Any],
+        user_identifier: str,
+        limit: Optional[int],
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Fetch the pages of a list of tours.
+        :param query_parameters: The query parameters
+        :param user_identifier: The user identifier
+        :param limit: The maximum number of tours to retrieve, only the first page is fetched if provided
+        :return: An iterator over the tour dictionaries of each page
+        """
         fetch_more = True
         current_page = 0
-        tours = []
         while fetch_more:
             query_parameters[TourQueryParameters.PAGE] = current_page
-            response = self._get_page_of_tours(
-                query_parameters=query_parameters,
-                user_identifier=user_identifier,
-            ).json()
-            tour_list = response['_embedded']
-            tours.extend(tour_list['tours'])
+            with maybe_span(self.tracer, 'page', page=current_page):
+                response = response_json(self._get_page_of_tours(
+                    query_parameters=query_parameters,
+                    user_identifier=user_identifier,
+                ))
             max_page = response['page']['totalPages']
             current_page = response['page']['number'] + 1
             logger.info(f'Fetched page {current_page} of {max_page}.')
             fetch_more = (current_page < max_page) if limit is None else False
-        # Skip tours that cannot be parsed into Tour objects, but surface
-        # an aggregate error if the API returned tours and none could be parsed.
-        tour_objects = []
-        parse_failures = []
-        for tour_dict in tours:
-            try:
-                tour_objects.append(Tour(tour_dict))
-            except (KeyError, TypeError, ValueError) as e:
-                tour_id = tour_dict.get('id', 'unknown') if isinstance(tour_dict, dict) else 'unknown'
-                parse_failures.append((tour_id, str(e)))
-                logger.exception(f'Failed to parse tour {tour_id}: {e}')
-        if tours and not tour_objects:
-            failed_tour_ids = ', '.join(str(tour_id) for tour_id, _ in parse_failures)
-            raise ValueError(
-                f'Failed to parse all {len(tours)} returned tours. '
-                f'This may indicate an API/schema change. '
-                f'Failed tour ids: {failed_tour_ids}'
-            )
-        return tour_objects
+            yield response['_embedded']['tours']
 
+    @measured('get_tour_by_id')
+    @traced('get_tour_by_id')
     def get_tour_by_id(
         self,
         tour_identifier: str,
         share_token: Optional[str] = None,
         object_type: Optional[str] = None,
-    ) -> Union[Tour, GPX, FitFile]:
+    ) -> Union[Tour, 'GPX', 'FitFile', GpxColumns, FitRecords]:
         """
         Get a tour by its ID.
         :param tour_identifier: The ID of the tour
         :param share_token: share token which always grants access to a specific tour, ignoring visibility rules.
         :param object_type: The type of tour object to return, if not provided, return the kompy object
-        :return: A tour object, gpx object or fit object depending on the object type provided
+        :return: A tour object, gpx object, fit object, gpx columns or fit records depending on the object type provided
         """
+        if not object_type:
+            object_type = TourObjectTypes.KOMPY
+        if object_type not in TourObjectTypes.list_all():
+            raise ValueError(f'Invalid object type provided: {object_type}. Please provide a valid object type.')
+        if not self.coalesce:
+            return self._fetch_tour(tour_identifier=tour_identifier, share_token=share_token, object_type=object_type)
+        return self._tour_fetches.do(
+            (str(tour_identifier), object_type, share_token),
+            self._fetch_tour,
+            tour_identifier=tour_identifier,
+            share_token=share_token,
+            object_type=object_type,
+        )
 
+    def _fetch_tour(
+        self,
+        tour_identifier: str,
+        share_token: Optional[str],
+        object_type: str,
+    ) -> Union[Tour, 'GPX', 'FitFile', GpxColumns, FitRecords]:
+        """
+        Download and parse a tour, see get_tour_by_id.
+        :param tour_identifier: The ID of the tour
+        :param share_token: share token which always grants access to a specific tour, ignoring visibility rules.
+        :param object_type: The type of tour object to return, one of TourObjectTypes
+        :return: A tour object, gpx object, fit object, gpx columns or fit records depending on the object type provided
+        """
+        # The slot is held until the response is parsed, since streamed responses are read while they are parsed.
+        with self._slot(PriorityClasses.INTERACTIVE):
+            return self._download_tour(tour_identifier=tour_identifier, share_token=share_token,
+                                       object_type=object_type)
+
+    def _download_tour(
+        self,
+        tour_identifier: str,
+        share_token: Optional[str],
+        object_type: str,
+    ) -> Union[Tour, 'GPX', 'FitFile', GpxColumns, FitRecords]:
         params = {
             'Type': 'application/hal+json',
         }
         if share_token:
             params['share_token'] = share_token
 
-        if not object_type or object_type == TourObjectTypes.KOMPY:
+        if object_type == TourObjectTypes.KOMPY:
             format_append = ''
-        elif object_type == TourObjectTypes.GPX:
+            endpoint = Endpoints.TOUR
+        elif object_type in (TourObjectTypes.GPX, TourObjectTypes.GPX_COLUMNS):
             format_append = '.gpx'
-        elif object_type == TourObjectTypes.FIT:
-            format_append = '.fit'
+            endpoint = Endpoints.TOUR_GPX
         else:
-            raise ValueError(f'Invalid object type provided: {object_type}. Please provide a valid object type.')
+            format_append = '.fit'
+            endpoint = Endpoints.TOUR_FIT
 
         try:
-            response = requests.get(
+            response = self._request(
+                endpoint=endpoint,
+                method='get',
                 url=KomootUrl.TOUR_URL.format(tour_identifier=tour_identifier) + format_append,
                 auth=(self.authentication.get_email_address(), self.authentication.get_password()),
                 params=params,
+                stream=object_type == TourObjectTypes.GPX_COLUMNS,
             )
             if response.status_code == 403:
                 raise ConnectionError(
@@ -266,17 +626,42 @@ class KomootConnector:
             raise ConnectionError(
                 'Connection to Komoot API failed. Please check your internet connection.'
             )
-        if not object_type or object_type == TourObjectTypes.KOMPY:
-            resp = json.loads(response.content.decode('utf-8'))
-            return Tour(resp)
+        parse_start = time.perf_counter()
+        with maybe_span(self.tracer, 'parse', category='parse', object_type=object_type):
+            tour_object = self._parse_tour_object(response=response, object_type=object_type)
+        self._record_parse(operation=f'get_tour_by_id_{object_type}', start=parse_start, items=1)
+        return tour_object
+
+    @staticmethod
+    def _parse_tour_object(
+        response: requests.Response,
+        object_type: str,
+    ) -> Union[Tour, 'GPX', 'FitFile', GpxColumns, FitRecords]:
+        """
+        Parse the response of the tour endpoint.
+        :param response: The response
+        :param object_type: The type of tour object to return
+        :return: A tour object, gpx object, fit object, gpx columns or fit records depending on the object type provided
+        """
+        if object_type == TourObjectTypes.KOMPY:
+            return Tour(response_json(response))
         if object_type == TourObjectTypes.GPX:
+            import gpxpy
+
             return gpxpy.parse(response.content)
         if object_type == TourObjectTypes.FIT:
+            from fit_tool.fit_file import FitFile
+
             return FitFile.from_bytes(response.content)
+        if object_type == TourObjectTypes.GPX_COLUMNS:
+            return read_gpx(response)
+        return read_fit_records(response.content)
 
+    @measured('upload_tour')
+    @traced('upload_tour')
     def upload_tour(
         self,
-        tour_object: Union[GPX, FitFile],
+        tour_object: Union['GPX', 'FitFile', bytes],
         activity_type: str,
         tour_name: str,
         time_in_motion: Optional[int] = None,
@@ -284,7 +669,7 @@ class KomootConnector:
     ) -> bool:
         """
         Upload a tour. It can be either a GPX or FIT file.
-        :param tour_object: The binary data of the file
+        :param tour_object: The GPX or FIT object, or the binary data of a GPX or FIT file
         :param activity_type: The sport type, one of SupportedActivities
         :param tour_name: The name of the tour
         :param time_in_motion: Only exists for GPX files, in other file types this can be specified in the file itself.
@@ -293,9 +678,42 @@ class KomootConnector:
         :param status: The privacy status of the tour, optional. If not provided, PrivacyStatus.FRIENDS will be used.
         :return: Whether the upload was successful
         """
+        resp = self._post_tour(
+            tour_object=tour_object,
+            activity_type=activity_type,
+            tour_name=tour_name,
+            time_in_motion=time_in_motion,
+            status=status,
+        )
+        if resp.status_code == 201:
+            logging.info(f'Tour uploaded successfully with ID: {response_json(resp)["id"]}.')
+            return True
+        elif resp.status_code == 202:
+            logging.warning(f'Tour not created due to the same tour being already present with ID: '
+                            f'{response_json(resp)["id"]}')
+            return True
+        else:
+            logging.error(f'Could not upload tour. Response status code: {resp.status_code}')
+            return False
+
+    def _post_tour(
+        self,
+        tour_object: Union['GPX', 'FitFile', bytes],
+        activity_type: str,
+        tour_name: str,
+        time_in_motion: Optional[int],
+        status: Optional[str],
+    ) -> requests.Response:
+        """
+        Send a tour to the upload endpoint, see upload_tour.
+        :return: The response of the upload endpoint.
+        """
         headers = {
             'User-Agent': 'Kompy',
         }
+        from fit_tool.fit_file import FitFile
+        from gpxpy.gpx import GPX
+
         params = {
             'sport': activity_type,
             'status': status,
@@ -303,28 +721,110 @@ class KomootConnector:
         if isinstance(tour_object, GPX):
             params['data_type'] = 'gpx'
             params['time_in_motion'] = time_in_motion
+            data = tour_object.to_xml().encode('utf-8')
         elif isinstance(tour_object, FitFile):
             params['data_type'] = 'fit'
+            data = tour_object.to_bytes()
+        elif isinstance(tour_object, (bytes, bytearray)):
+            # FIT files carry the '.FIT' signature in their header, anything else is expected to be a GPX document,
+            # e.g. the output of kompy.gpx_writer.
+            if tour_object[8:12] == b'.FIT':
+                params['data_type'] = 'fit'
+            else:
+                params['data_type'] = 'gpx'
+                params['time_in_motion'] = time_in_motion
+            data = bytes(tour_object)
         else:
             raise TypeError(f'Invalid tour object provided: {type(tour_object)}. Please provide a GPX or FIT file.')
         params['name'] = tour_name
-        resp = requests.post(
+        return self._request(
+            endpoint=Endpoints.UPLOAD_TOUR,
+            method='post',
+            priority=PriorityClasses.BULK,
             url=KomootUrl.UPLOAD_TOUR_URL.format(object_type=params['data_type']),
             auth=(self.authentication.get_email_address(), self.authentication.get_password()),
             headers=headers,
             params=params,
-            data=tour_object.to_xml().encode('utf-8') if isinstance(tour_object, GPX) else tour_object.to_bytes()
+            data=data,
+            compress_body=True,
         )
-        if resp.status_code == 201:
-            logging.info(f'Tour uploaded successfully with ID: {resp.json()["id"]}.')
-            return True
-        elif resp.status_code == 202:
-            logging.warning(f'Tour not created due to the same tour being already present with ID: {resp.json()["id"]}')
-            return True
-        else:
-            logging.error(f'Could not upload tour. Response status code: {resp.status_code}')
-            return False
 
+    @measured('import_files')
+    @traced('import_files')
+    def import_files(
+        self,
+        paths: Iterable[Union[str, os.PathLike]],
+        activity_type: str,
+        index: UploadIndex,
+        status: Optional[str] = PrivacyStatus.FRIENDS,
+        match_tracks: bool = True,
+    ) -> Dict[str, str]:
+        """
+        Upload GPX and FIT files, skipping the files whose tour is already in the index before sending them. The
+        uploaded tours are added to the index, named after their file.
+        :param paths: The paths of the files.
+        :param activity_type: The sport type of the tours, one of SupportedActivities
+        :param index: The index of the tours already on Komoot, see kompy.upload_index.
+        :param status: The privacy status of the tours, optional. If not provided, PrivacyStatus.FRIENDS will be used.
+        :param match_tracks: Whether to also skip the files whose track matches a tour of the index, e.g. the same
+        tour exported in another format. Reading the track of new files is then needed.
+        :return: The outcome of each file, one of ImportOutcomes, by path.
+        """
+        outcomes: Dict[str, str] = {}
+        for path in paths:
+            try:
+                outcomes[str(path)] = self._import_file(path=path, activity_type=activity_type, index=index,
+                                                        status=status, match_tracks=match_tracks)
+            except (OSError, requests.exceptions.RequestException) as e:
+                logger.error(f'Could not import {path}: {e}')
+                outcomes[str(path)] = ImportOutcomes.FAILED
+        counts = {outcome: list(outcomes.values()).count(outcome) for outcome in ImportOutcomes.list_all()}
+        logger.info(f'Imported {len(outcomes)} files: {counts[ImportOutcomes.UPLOADED]} uploaded, '
+                    f'{counts[ImportOutcomes.DUPLICATE]} duplicates, {counts[ImportOutcomes.FAILED]} failed.')
+        return outcomes
+
+    def _import_file(
+        self,
+        path: Union[str, os.PathLike],
+        activity_type: str,
+        index: UploadIndex,
+        status: Optional[str],
+        match_tracks: bool,
+    ) -> str:
+        """
+        Upload a file unless its tour is in the index, see import_files.
+        :return: The outcome, one of ImportOutcomes.
+        """
+        content = index.file_fingerprint(path)
+        if index.find(content=content) is not None:
+            return ImportOutcomes.DUPLICATE
+        with open(path, 'rb') as f:
+            data = f.read()
+        track = file_track_fingerprint(data) if match_tracks else None
+        existing = index.find(track=track)
+        if existing is not None:
+            index.add(tour_id=existing, content=content)
+            return ImportOutcomes.DUPLICATE
+        resp = self._post_tour(
+            tour_object=data,
+            activity_type=activity_type,
+            tour_name=os.path.splitext(os.path.basename(path))[0],
+            time_in_motion=None,
+            status=status,
+        )
+        if resp.status_code not in (201, 202):
+            logger.error(f'Could not upload {path}. Response status code: {resp.status_code}')
+            return ImportOutcomes.FAILED
+        try:
+            tour_id = response_json(resp)['id']
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f'Could not read the id of the tour uploaded from {path}: {e!r}')
+            return ImportOutcomes.FAILED
+        index.add(tour_id=tour_id, content=content, track=track)
+        return ImportOutcomes.UPLOADED if resp.status_code == 201 else ImportOutcomes.DUPLICATE
+
+    @measured('change_tour')
+    @traced('change_tour')
     def change_tour(
         self,
         tour_id: int,
@@ -353,11 +853,13 @@ class KomootConnector:
         }
         if status is not None:
             json['status'] = status
-        resp = requests.patch(
+        resp = self._request(
+            endpoint=Endpoints.TOUR,
+            method='patch',
             url=KomootUrl.TOUR_URL.format(tour_identifier=tour_id),
             auth=(self.authentication.get_email_address(), self.authentication.get_password()),
             headers=headers,
-            json=json,
+            data=dumps(json),
         )
         if resp.status_code == 200:
             logging.info(f'Tour with ID {tour_id} changed successfully.')
@@ -366,6 +868,8 @@ class KomootConnector:
             logging.error(f'Could not change tour with id {tour_id}. Response status code: {resp.status_code}')
             return False
 
+    @measured('delete_tour')
+    @traced('delete_tour')
     def delete_tour(
         self,
         tour_id: int,
@@ -380,7 +884,9 @@ class KomootConnector:
             'Accept': 'application/hal+json,application/json',
         }
 
-        resp = requests.delete(
+        resp = self._request(
+            endpoint=Endpoints.TOUR,
+            method='delete',
             url=KomootUrl.TOUR_URL.format(tour_identifier=tour_id),
             auth=(self.authentication.get_email_address(), self.authentication.get_password()),
             headers=headers,
@@ -392,6 +898,153 @@ class KomootConnector:
             logging.error(f'Could not delete tour with id {tour_id}. Response status code: {resp.status_code}')
             return False
 
+    @measured('hydrate')
+    @traced('hydrate')
+    def hydrate(
+        self,
+        tours: Iterable[Tour],
+        what: Optional[List[str]] = None,
+        concurrency: int = 8,
+        progress_callback: Optional[HydrationProgressCallback] = None,
+    ) -> Dict[str, Dict[str, Exception]]:
+        """
+        Fetch the tracks of many tours in parallel, over a shared session.
+        :param tours: The tours to hydrate, their tracks are stored on the Tour objects.
+        :param what: The tracks to fetch, a list of HydrationTargets. If not provided, only the coordinates are fetched.
+        :param concurrency: The maximum number of concurrent downloads.
+        :param progress_callback: A function called after each download with the number of completed and total
+        downloads, the tour, the hydration target and the exception raised, if any.
+        :return: The errors, as a dictionary mapping the id of each failed tour to the exception of each failed target.
+        """
+        if what is None:
+            what = [HydrationTargets.COORDINATES]
+        for target in what:
+            if target not in HydrationTargets.list_all():
+                raise ValueError(f'Invalid hydration target provided: {target}. Please provide one of '
+                                 f'{HydrationTargets.list_all()}.')
+        if concurrency < 1:
+            raise ValueError(f'Invalid concurrency provided: {concurrency}. Please provide a positive number.')
+
+        jobs = [(tour, target) for tour in tours for target in what]
+        errors: Dict[str, Dict[str, Exception]] = {}
+        with self.hydration_session(pool_size=concurrency) as session, \
+                ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # Each job runs in a copy of the current context, so that its spans are attached to the hydration.
+            futures = {
+                executor.submit(copy_context().run, self._hydrate_tour, tour=tour, target=target, session=session):
+                    (tour, target)
+                for tour, target in jobs
+            }
+            for completed, future in enumerate(as_completed(futures), start=1):
+                tour, target = futures[future]
+                error = future.exception()
+                if error is not None:
+                    errors.setdefault(tour.id, {})[target] = error
+                    logger.error(f'Failed to fetch {target} of tour {tour.id}: {error}')
+                if progress_callback is not None:
+                    progress_callback(completed, len(jobs), tour, target, error)
+        logger.info(f'Hydrated {len(jobs) - sum(len(e) for e in errors.values())} of {len(jobs)} tracks.')
+        return errors
+
+    @contextlib.contextmanager
+    def hydration_session(self, pool_size: int = 8) -> Iterator[requests.Session]:
+        """
+        Open the session shared by the concurrent downloads of tracks, see `hydrate_tour`. It sends the requests through
+        the session of the connector, if any, e.g. shared by a connector pool or provided by a cassette, and reuses its
+        connections. If the connector hedges its requests, or has no session, a session is created for the downloads,
+        with its own connections.
+        :param pool_size: The maximum number of connections kept open, when the session is created.
+        :return: A context manager giving the session, closed on exit if it was created for the downloads.
+        """
+        if self.session is not None and self._hedged_session is None:
+            # A copy of the session shares its adapters, cookies and settings, the hooks added below only apply to it.
+            session = requests.Session()
+            session.__setstate__(self.session.__getstate__())
+            session.hooks = {event: list(hooks) for event, hooks in self.session.hooks.items()}
+            self._add_response_hook(session)
+            yield session
+            return
+        if self.hedging is not None:
+            adapter = HedgingAdapter(policy=self.hedging, on_hedge=self._record_retry, pool_connections=pool_size,
+                                     pool_maxsize=pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        with requests.Session() as session:
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._add_response_hook(session)
+            yield session
+
+    def _add_response_hook(self, session: requests.Session) -> None:
+        """
+        Report the responses received through a session to the metrics hook and the tracer, if any.
+        :param session: The session.
+        """
+        if self.metrics is not None or self.tracer is not None:
+            session.hooks['response'].append(self._record_response)
+
+    def hydrate_tour(
+        self,
+        tour: Tour,
+        what: Optional[List[str]] = None,
+        session: Optional[requests.Session] = None,
+    ) -> Tour:
+        """
+        Fetch the tracks of a tour, e.g. in a worker of a pipeline, see `hydrate` to fetch the tracks of many tours.
+        :param tour: The tour to hydrate, its tracks are stored on the Tour object.
+        :param what: The tracks to fetch, a list of HydrationTargets. If not provided, only the coordinates are fetched.
+        :param session: The session shared by concurrent downloads, opened with `hydration_session`, optional. If not
+        provided, a session is opened for the tour.
+        :return: The tour.
+        """
+        if what is None:
+            what = [HydrationTargets.COORDINATES]
+        for target in what:
+            if target not in HydrationTargets.list_all():
+                raise ValueError(f'Invalid hydration target provided: {target}. Please provide one of '
+                                 f'{HydrationTargets.list_all()}.')
+        if session is None:
+            with self.hydration_session(pool_size=1) as session:
+                return self.hydrate_tour(tour=tour, what=what, session=session)
+        for target in what:
+            self._hydrate_tour(tour=tour, target=target, session=session)
+        return tour
+
+    def _hydrate_tour(
+        self,
+        tour: Tour,
+        target: str,
+        session: requests.Session,
+    ) -> None:
+        """
+        Fetch one track of a tour.
+        :param tour: The tour to hydrate
+        :param target: The track to fetch, one of HydrationTargets
+        :param session: The shared session
+        """
+        start = time.perf_counter()
+        fetched = False
+        try:
+            with self._slot(PriorityClasses.BULK), maybe_span(self.tracer, f'hydrate_{target}', tour_id=tour.id):
+                if target == HydrationTargets.COORDINATES:
+                    fetched = tour.generate_coordinates(
+                        authentication=self.authentication, session=session, coalesce=self.coalesce,
+                    )
+                elif target == HydrationTargets.GPX:
+                    fetched = tour.generate_gpx_track(
+                        authentication=self.authentication, session=session, coalesce=self.coalesce,
+                    )
+                else:
+                    fetched = tour.generate_gpx_columns(
+                        authentication=self.authentication, session=session, coalesce=self.coalesce,
+                    )
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_operation(operation=f'hydrate_{target}', duration=time.perf_counter() - start,
+                                              failed=not fetched)
+        if not fetched:
+            raise ValueError(f'Could not fetch {target} of tour {tour.id}.')
+
     def _get_page_of_tours(
         self,
         query_parameters: Dict[str, Any],
@@ -404,7 +1057,10 @@ class KomootConnector:
         :return: A page of tours as a response object
         """
         try:
-            response = requests.get(
+            response = self._request(
+                endpoint=Endpoints.LIST_TOURS,
+                method='get',
+                priority=PriorityClasses.BULK,
                 url=KomootUrl.LIST_TOURS_URL.format(user_identifier=user_identifier),
                 auth=(self.authentication.get_email_address(), self.authentication.get_password()),
                 params=query_parameters,
@@ -418,3 +1074,16 @@ class KomootConnector:
                 'Connection to Komoot API failed. Please check your internet connection.'
             )
         return response
+
+
+def _received_bytes(response: requests.Response, streamed: bool) -> int:
+    """
+    Get the size of the body of a response.
+    :param response: The response.
+    :param streamed: Whether the response is streamed, in which case its body is not read.
+    :return: The size of the body, the announced Content-Length for streamed responses, 0 if unknown.
+    """
+    if not streamed:
+        return len(response.content or b'')
+    length = response.headers.get('Content-Length', '')
+    return int(length) if length.isdigit() else 0
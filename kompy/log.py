@@ -0,0 +1,21 @@
+import logging
+from typing import Optional
+
+_handler: Optional[logging.Handler] = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Get a logger of the package. All the loggers share a single handler, writing to the standard error, which is
+    created the first time a logger is requested.
+    :param name: The name of the logger.
+    :return: The logger.
+    """
+    global _handler
+    if _handler is None:
+        _handler = logging.StreamHandler()
+        _handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger = logging.getLogger(name)
+    if _handler not in logger.handlers:
+        logger.addHandler(_handler)
+    return logger
@@ -0,0 +1,337 @@
+"""
+Metrics of the connector: latency of the requests and operations, bytes sent and received, before and after
+compression, status codes, retries and parse times.
+
+The connector reports its measurements to a MetricsHook, passed with `KomootConnector(..., metrics=hook)`. Without a
+hook, nothing is measured. InMemoryMetrics keeps the measurements as counters and histograms, and `to_prometheus`
+exports them in the Prometheus text format:
+
+    metrics = InMemoryMetrics()
+    connector = KomootConnector(email=email, password=password, metrics=metrics)
+    connector.get_tours(user_identifier=user)
+    print(to_prometheus(metrics))
+"""
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+# Upper bounds of the buckets of the histograms, in seconds.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+Function = TypeVar('Function', bound=Callable)
+
+
+class MetricsHook:
+    """
+    Receiver of the measurements of a connector. The methods of this class ignore the measurements, subclasses
+    override those they need. The methods can be called from several threads at once.
+    """
+
+    def record_request(
+        self,
+        endpoint: str,
+        method: str,
+        status_code: Optional[int],
+        duration: float,
+        bytes_sent: int,
+        bytes_received: int,
+    ) -> None:
+        """
+        Record an HTTP request.
+        :param endpoint: The endpoint, one of Endpoints.
+        :param method: The HTTP method, in lower case.
+        :param status_code: The status code of the response, None if no response was received.
+        :param duration: The duration of the request, in seconds. It includes the download of the body, unless the
+        response is streamed.
+        :param bytes_sent: The size of the body of the request, before compression, in bytes.
+        :param bytes_received: The size of the body of the response, after decompression, in bytes. For streamed
+        responses, the announced Content-Length, or 0 if unknown.
+        """
+
+    def record_wire_bytes(self, endpoint: str, bytes_sent: int, bytes_received: int) -> None:
+        """
+        Record the size of the bodies of an HTTP request and its response as transferred, i.e. compressed when a
+        content encoding is used. Called after record_request.
+        :param endpoint: The endpoint, one of Endpoints.
+        :param bytes_sent: The size of the body of the request on the wire, in bytes.
+        :param bytes_received: The size of the body of the response on the wire, in bytes. For streamed responses,
+        the announced Content-Length, or 0 if unknown.
+        """
+
+    def record_retry(self, endpoint: str) -> None:
+        """
+        Record a request sent again, e.g. a hedged request.
+        :param endpoint: The endpoint, one of Endpoints.
+        """
+
+    def record_operation(self, operation: str, duration: float, failed: bool) -> None:
+        """
+        Record an operation of the connector, e.g. `get_tours`, which can send several requests.
+        :param operation: The name of the operation.
+        :param duration: The duration of the operation, in seconds.
+        :param failed: Whether the operation raised an exception.
+        """
+
+    def record_parse(self, operation: str, duration: float, items: int) -> None:
+        """
+        Record the parsing of the responses of an operation.
+        :param operation: The name of the operation.
+        :param duration: The duration of the parsing, in seconds.
+        :param items: The number of parsed items, e.g. tours.
+        """
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Histogram of observed values, with fixed buckets.
+        :param buckets: The upper bounds of the buckets, in increasing order. A last bucket holds the values above
+        the last bound.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Add a value to the histogram.
+        :param value: The value.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> List[int]:
+        """
+        Count the values lower than or equal to each bound, the last count being the total count.
+        :return: The cumulative counts.
+        """
+        counts = []
+        total = 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile of the values, by linear interpolation within the bucket holding it.
+        :param q: The quantile, between 0 and 1.
+        :return: The estimated value, NaN if the histogram is empty. Values above the last bound are estimated as
+        the last bound.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f'Invalid quantile provided: {q}. Please provide a value between 0 and 1.')
+        if self.count == 0:
+            return math.nan
+        rank = q * self.count
+        previous_total = 0
+        for index, total in enumerate(self.cumulative_counts()):
+            if total >= rank and self.counts[index]:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - previous_total) / self.counts[index]
+            previous_total = total
+        return self.buckets[-1]
+
+
+class InMemoryMetrics(MetricsHook):
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Metrics hook keeping the measurements in memory.
+
+        It contains the following attributes, keyed by their labels:
+        - request_duration: histograms of the durations of the requests, by endpoint and method
+        - requests: counts of the requests, by endpoint, method and status code ('error' when no response)
+        - bytes_sent and bytes_received: sizes of the decoded bodies, by endpoint
+        - wire_bytes_sent and wire_bytes_received: sizes of the bodies as transferred, by endpoint
+        - retries: counts of the requests sent again, e.g. hedged, by endpoint
+        - operation_duration: histograms of the durations of the operations, by operation
+        - operation_errors: counts of the failed operations, by operation
+        - parse_duration: histograms of the parse times, by operation
+        - parsed_items: counts of the parsed items, by operation
+        :param buckets: The upper bounds of the buckets of the histograms, in seconds.
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Discard all the measurements.
+        """
+        with self._lock:
+            self.request_duration: Dict[Tuple[str, str], Histogram] = {}
+            self.requests: Dict[Tuple[str, str, str], int] = {}
+            self.bytes_sent: Dict[str, int] = {}
+            self.bytes_received: Dict[str, int] = {}
+            self.wire_bytes_sent: Dict[str, int] = {}
+            self.wire_bytes_received: Dict[str, int] = {}
+            self.retries: Dict[str, int] = {}
+            self.operation_duration: Dict[str, Histogram] = {}
+            self.operation_errors: Dict[str, int] = {}
+            self.parse_duration: Dict[str, Histogram] = {}
+            self.parsed_items: Dict[str, int] = {}
+
+    def _histogram(self, histograms: Dict, key) -> Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self.buckets)
+        return histogram
+
+    def record_request(
+        self,
+        endpoint: str,
+        method: str,
+        status_code: Optional[int],
+        duration: float,
+        bytes_sent: int,
+        bytes_received: int,
+    ) -> None:
+        status = 'error' if status_code is None else str(status_code)
+        with self._lock:
+            self._histogram(self.request_duration, (endpoint, method)).observe(duration)
+            self.requests[endpoint, method, status] = self.requests.get((endpoint, method, status), 0) + 1
+            self.bytes_sent[endpoint] = self.bytes_sent.get(endpoint, 0) + bytes_sent
+            self.bytes_received[endpoint] = self.bytes_received.get(endpoint, 0) + bytes_received
+
+    def record_wire_bytes(self, endpoint: str, bytes_sent: int, bytes_received: int) -> None:
+        with self._lock:
+            self.wire_bytes_sent[endpoint] = self.wire_bytes_sent.get(endpoint, 0) + bytes_sent
+            self.wire_bytes_received[endpoint] = self.wire_bytes_received.get(endpoint, 0) + bytes_received
+
+    def record_retry(self, endpoint: str) -> None:
+        with self._lock:
+            self.retries[endpoint] = self.retries.get(endpoint, 0) + 1
+
+    def record_operation(self, operation: str, duration: float, failed: bool) -> None:
+        with self._lock:
+            self._histogram(self.operation_duration, operation).observe(duration)
+            if failed:
+                self.operation_errors[operation] = self.operation_errors.get(operation, 0) + 1
+
+    def record_parse(self, operation: str, duration: float, items: int) -> None:
+        with self._lock:
+            self._histogram(self.parse_duration, operation).observe(duration)
+            self.parsed_items[operation] = self.parsed_items.get(operation, 0) + items
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _key(key) -> Tuple[str, ...]:
+    return key if isinstance(key, tuple) else (key,)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _counter_lines(name: str, help_text: str, labels: Sequence[str], values: Dict) -> List[str]:
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    for key, value in sorted(values.items()):
+        lines.append(f'{name}{_labels(labels, _key(key))} {_format_value(value)}')
+    return lines
+
+
+def _histogram_lines(
+    name: str,
+    help_text: str,
+    labels: Sequence[str],
+    histograms: Dict[object, Histogram],
+) -> List[str]:
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for key, histogram in sorted(histograms.items()):
+        values = _key(key)
+        bounds = histogram.buckets + (math.inf,)
+        for bound, count in zip(bounds, histogram.cumulative_counts()):
+            bucket_label = 'le="' + _format_value(bound) + '"'
+            lines.append(f'{name}_bucket{_labels(labels, values, bucket_label)} {count}')
+        lines.append(f'{name}_sum{_labels(labels, values)} {_format_value(histogram.sum)}')
+        lines.append(f'{name}_count{_labels(labels, values)} {histogram.count}')
+    return lines
+
+
+def to_prometheus(metrics: InMemoryMetrics, prefix: str = 'kompy') -> str:
+    """
+    Export metrics in the Prometheus text exposition format.
+    :param metrics: The metrics.
+    :param prefix: The prefix of the names of the metrics.
+    :return: The exported metrics.
+    """
+    with metrics._lock:
+        lines = [
+            *_histogram_lines(f'{prefix}_request_duration_seconds', 'Duration of the HTTP requests.',
+                              ('endpoint', 'method'), metrics.request_duration),
+            *_counter_lines(f'{prefix}_requests_total', 'HTTP requests, by status code.',
+                            ('endpoint', 'method', 'status'), metrics.requests),
+            *_counter_lines(f'{prefix}_request_bytes_total', 'Bytes sent in the bodies of the requests.',
+                            ('endpoint',), metrics.bytes_sent),
+            *_counter_lines(f'{prefix}_response_bytes_total', 'Bytes received in the bodies of the responses.',
+                            ('endpoint',), metrics.bytes_received),
+            *_counter_lines(f'{prefix}_request_wire_bytes_total', 'Bytes sent in the bodies of the requests, '
+                            'as transferred.', ('endpoint',), metrics.wire_bytes_sent),
+            *_counter_lines(f'{prefix}_response_wire_bytes_total', 'Bytes received in the bodies of the responses, '
+                            'as transferred.', ('endpoint',), metrics.wire_bytes_received),
+            *_counter_lines(f'{prefix}_retries_total', 'HTTP requests sent again, e.g. hedged.', ('endpoint',),
+                            metrics.retries),
+            *_histogram_lines(f'{prefix}_operation_duration_seconds', 'Duration of the connector operations.',
+                              ('operation',), metrics.operation_duration),
+            *_counter_lines(f'{prefix}_operation_errors_total', 'Connector operations that raised an exception.',
+                            ('operation',), metrics.operation_errors),
+            *_histogram_lines(f'{prefix}_parse_duration_seconds', 'Time spent parsing the responses.',
+                              ('operation',), metrics.parse_duration),
+            *_counter_lines(f'{prefix}_parsed_items_total', 'Items parsed from the responses.',
+                            ('operation',), metrics.parsed_items),
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def measured(operation: str) -> Callable[[Function], Function]:
+    """
+    Decorate a method to record its duration as an operation, with the metrics hook stored in the `metrics` attribute
+    of its object. Nothing is measured when the attribute is None.
+    :param operation: The name of the operation.
+    :return: The decorator.
+    """
+    def decorator(method: Function) -> Function:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics: Optional[MetricsHook] = self.metrics
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = method(self, *args, **kwargs)
+                failed = False
+                return result
+            finally:
+                metrics.record_operation(operation=operation, duration=time.perf_counter() - start, failed=failed)
+        return wrapper
+    return decorator
@@ -0,0 +1,485 @@
+"""
+Concurrent processing of many items, e.g. the tours of an account, as stages connected by bounded queues.
+
+Each stage runs its function in its own worker threads, taking items from the queue of the previous stage and putting
+its results in the queue of the next one. All the stages run at the same time: the tours of the first page are hydrated
+while the next pages are fetched, so processing an account takes about as long as its slowest stage instead of the sum
+of all stages. The queues are bounded, a stage whose downstream queue is full waits for room (backpressure), so a slow
+stage slows the stages before it down instead of letting items pile up in memory:
+
+    pipeline = Pipeline([
+        tour_pages_stage(connector, sort_field=TourSortField.DATE),
+        parse_stage(),
+        hydrate_stage(connector, workers=8),
+        Stage('metrics', compute_metrics, workers=4),
+        archive_stage(archive),
+    ])
+    for result in pipeline.run([username]):
+        ...
+    print(pipeline.stats)
+
+Items are emitted in the order they complete, which is not the order of the inputs when a stage has several workers.
+"""
+import contextlib
+import logging
+import queue
+import threading
+import time
+from contextvars import copy_context
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+
+from kompy.constants.hydration_targets import HydrationTargets
+from kompy.log import get_logger
+from kompy.tour import Tour
+from kompy.tour_parsing import parse_tours
+
+if TYPE_CHECKING:
+    import requests
+
+    from kompy.coordinate_archive import CoordinateArchive
+    from kompy.komoot_connector import KomootConnector
+
+logger = get_logger('KomootPipeline')
+
+# Marks the end of the items of a queue, one per worker of the stage reading it.
+_DONE = object()
+# How often blocked workers check whether the pipeline was cancelled, in seconds.
+_POLL_INTERVAL = 0.05
+
+
+class StageStats:
+    def __init__(self, name: str, workers: int):
+        """
+        Statistics of a stage of a pipeline run.
+        :param name: The name of the stage.
+        :param workers: The number of workers of the stage.
+        """
+        self.name = name
+        self.workers = workers
+        self.received = 0
+        self.emitted = 0
+        self.failed = 0
+        # Time spent in the function of the stage, summed over the workers, in seconds.
+        self.busy = 0.0
+        # Time spent waiting for room in the downstream queue, summed over the workers, in seconds.
+        self.blocked = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _add(self, received: int = 0, emitted: int = 0, failed: int = 0, busy: float = 0.0,
+             blocked: float = 0.0) -> None:
+        with self._lock:
+            self.received += received
+            self.emitted += emitted
+            self.failed += failed
+            self.busy += busy
+            self.blocked += blocked
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Get the time the stage has been running.
+        :return: The time since the stage started, until it finished, in seconds.
+        """
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """
+        Get the number of items processed per second.
+        :return: The number of received items per second of running time.
+        """
+        elapsed = self.elapsed
+        return self.received / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """
+        Get the share of the time the workers of the stage were busy. The bottleneck of a pipeline is the stage with
+        the highest utilization, adding workers to it speeds the whole pipeline up.
+        :return: The busy time divided by the running time of all the workers, between 0 and 1.
+        """
+        elapsed = self.elapsed
+        return min(self.busy / (elapsed * self.workers), 1.0) if elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (f'StageStats(name={self.name!r}, workers={self.workers}, received={self.received}, '
+                f'emitted={self.emitted}, failed={self.failed}, throughput={self.throughput:.1f}/s, '
+                f'utilization={self.utilization:.0%}, blocked={self.blocked:.2f}s)')
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        function: Callable[[Any], Any],
+        workers: int = 1,
+        expand: bool = False,
+        skip_errors: bool = False,
+        on_open: Optional[Callable[[], None]] = None,
+        on_close: Optional[Callable[[], None]] = None,
+        flush: Optional[Callable[[], Iterable[Any]]] = None,
+    ):
+        """
+        Stage of a pipeline.
+        :param name: The name of the stage, unique in its pipeline.
+        :param function: The function called with each item, returning the item passed to the next stage. Items for
+        which it returns None are dropped.
+        :param workers: The number of threads running the function concurrently.
+        :param expand: Whether the function returns an iterable of items, each passed to the next stage. The iterable
+        is consumed as the next stage takes its items, so a generator is only advanced when there is room downstream.
+        :param skip_errors: Whether items for which the function raises are logged and dropped. Otherwise, the first
+        error cancels the pipeline and is raised by `Pipeline.run`.
+        :param on_open: A function called when a run starts, before the workers of the stage, e.g. to open a session.
+        :param on_close: A function called once all the workers of the stage are done, e.g. to close a session.
+        :param flush: A function called once all the workers of the stage are done, before `on_close`, returning the
+        last items passed to the next stage, e.g. the items buffered by a stage processing them in batches. It is
+        called when the run is cancelled as well, its items are then dropped.
+        """
+        if workers < 1:
+            raise ValueError(f'Invalid number of workers provided: {workers}. Please provide a positive number.')
+        self.name = name
+        self.function = function
+        self.workers = workers
+        self.expand = expand
+        self.skip_errors = skip_errors
+        self.on_open = on_open
+        self.on_close = on_close
+        self.flush = flush
+
+
+class Pipeline:
+    def __init__(self, stages: Sequence[Stage], queue_size: int = 16):
+        """
+        Pipeline of stages running concurrently.
+        :param stages: The stages, in the order items go through them.
+        :param queue_size: The maximum number of items waiting between two stages.
+        """
+        if not stages:
+            raise ValueError('No stages provided. Please provide at least one stage.')
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f'Duplicate stage names provided: {names}. Please provide unique names.')
+        if queue_size < 1:
+            raise ValueError(f'Invalid queue size provided: {queue_size}. Please provide a positive number.')
+        self.stages: List[Stage] = list(stages)
+        self.queue_size = queue_size
+        self.stats: Dict[str, StageStats] = {stage.name: StageStats(stage.name, stage.workers) for stage in stages}
+        self._cancelled = threading.Event()
+        self._running = threading.Lock()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Check whether the last run was cancelled, by `cancel` or by an error.
+        :return: Whether it was cancelled.
+        """
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """
+        Cancel the current run. The workers stop once their current item is processed, the items still queued are
+        dropped and `run` stops.
+        """
+        self._cancelled.set()
+
+    def run(self, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Run the items through the stages.
+        :param items: The items passed to the first stage, consumed as the first stage takes them.
+        :return: An iterator over the items emitted by the last stage, in the order they complete. The stages start
+        when it is first iterated, the pipeline is cancelled if it is closed before it is exhausted, and it raises the
+        error of the first stage that failed, if any.
+        """
+        if not self._running.acquire(blocking=False):
+            raise RuntimeError('The pipeline is already running.')
+        self._cancelled.clear()
+        self._error = None
+        self.stats = {stage.name: StageStats(stage.name, stage.workers) for stage in self.stages}
+        # The input queue of each stage, followed by the queue of the results.
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = []
+        complete = False
+        try:
+            self._open()
+            threads = self._start(items, queues)
+            while True:
+                item = self._get(queues[-1])
+                if item is _DONE:
+                    break
+                yield item
+            complete = not self._cancelled.is_set()
+        finally:
+            if not complete:
+                # Stops the workers when the consumer stopped early.
+                self._cancelled.set()
+            for thread in threads:
+                thread.join()
+            self._running.release()
+        if self._error is not None:
+            raise self._error
+
+    def _open(self) -> None:
+        opened = []
+        try:
+            for stage in self.stages:
+                if stage.on_open is not None:
+                    stage.on_open()
+                opened.append(stage)
+        except BaseException:
+            # The stages opened before the failure are closed, the run does not start.
+            for stage in opened:
+                if stage.on_close is not None:
+                    try:
+                        stage.on_close()
+                    except Exception as e:
+                        logger.error(f'Failed to close stage {stage.name}: {e}')
+            raise
+
+    def _start(self, items: Iterable[Any], queues: List[queue.Queue]) -> List[threading.Thread]:
+        remaining = [stage.workers for stage in self.stages]
+        lock = threading.Lock()
+        start = time.perf_counter()
+        for stats in self.stats.values():
+            stats.started_at = start
+        # Each thread runs in a copy of the current context, so that the spans of the stages are attached to it.
+        threads = [threading.Thread(target=copy_context().run, args=(self._feed, items, queues[0]),
+                                    name='kompy-pipeline-feed', daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=copy_context().run, args=(self._work, index, queues, remaining, lock),
+                                 name=f'kompy-pipeline-{stage.name}-{worker}', daemon=True)
+                for worker in range(stage.workers)
+            )
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _get(self, source: queue.Queue) -> Any:
+        while not self._cancelled.is_set():
+            try:
+                return source.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return _DONE
+
+    def _put(self, target: queue.Queue, item: Any) -> bool:
+        while not self._cancelled.is_set():
+            try:
+                target.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _fail(self, error: BaseException) -> None:
+        if self._error is None:
+            self._error = error
+        self._cancelled.set()
+
+    def _feed(self, items: Iterable[Any], target: queue.Queue) -> None:
+        try:
+            for item in items:
+                if not self._put(target, item):
+                    return
+        except BaseException as e:
+            self._fail(e)
+            return
+        for _ in range(self.stages[0].workers):
+            self._put(target, _DONE)
+
+    def _emit(self, stats: StageStats, target: queue.Queue, item: Any) -> bool:
+        start = time.perf_counter()
+        emitted = self._put(target, item)
+        stats._add(emitted=int(emitted), blocked=time.perf_counter() - start)
+        return emitted
+
+    def _process(self, stage: Stage, stats: StageStats, target: queue.Queue, item: Any) -> bool:
+        """
+        Run the function of a stage on an item and emit its results.
+        :return: Whether the worker can go on, False if the pipeline was cancelled.
+        """
+        start = time.perf_counter()
+        result = stage.function(item)
+        stats._add(busy=time.perf_counter() - start)
+        if not stage.expand:
+            return result is None or self._emit(stats, target, result)
+        outputs = iter(result)
+        while True:
+            start = time.perf_counter()
+            try:
+                output = next(outputs)
+            except StopIteration:
+                return True
+            finally:
+                stats._add(busy=time.perf_counter() - start)
+            if output is not None and not self._emit(stats, target, output):
+                return False
+
+    def _work(self, index: int, queues: List[queue.Queue], remaining: List[int], lock: threading.Lock) -> None:
+        stage = self.stages[index]
+        stats = self.stats[stage.name]
+        source, target = queues[index], queues[index + 1]
+        try:
+            while True:
+                item = self._get(source)
+                if item is _DONE:
+                    break
+                stats._add(received=1)
+                try:
+                    if not self._process(stage, stats, target, item):
+                        break
+                except Exception as e:
+                    if not stage.skip_errors:
+                        raise
+                    stats._add(failed=1)
+                    logger.error(f'Stage {stage.name} failed to process an item: {e}')
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            with lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last:
+                self._close(index, target)
+
+    def _close(self, index: int, target: queue.Queue) -> None:
+        stage = self.stages[index]
+        stats = self.stats[stage.name]
+        if stage.flush is not None:
+            try:
+                start = time.perf_counter()
+                outputs = list(stage.flush())
+                stats._add(busy=time.perf_counter() - start)
+                for output in outputs:
+                    if output is not None and not self._emit(stats, target, output):
+                        break
+            except Exception as e:
+                logger.error(f'Failed to flush stage {stage.name}: {e}')
+                self._fail(e)
+        stats.finished_at = time.perf_counter()
+        if stage.on_close is not None:
+            try:
+                stage.on_close()
+            except Exception as e:
+                logger.error(f'Failed to close stage {stage.name}: {e}')
+        readers = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+        for _ in range(readers):
+            self._put(target, _DONE)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'Stage {stage.name} done: {stats}')
+
+
+def tour_pages_stage(connector: 'KomootConnector', workers: int = 1, **filters) -> Stage:
+    """
+    Stage fetching the lists of tours of users, page by page.
+    :param connector: The connector.
+    :param workers: The number of users whose tours are fetched concurrently.
+    :param filters: The filters of `KomootConnector.get_tours`, e.g. sport_types or sort_field.
+    :return: A stage taking user identifiers and emitting the tour dictionaries of each page, to be parsed by
+    `parse_stage`.
+    """
+    def fetch(user_identifier: str) -> Iterator[List[Dict[str, Any]]]:
+        return connector.iter_tour_pages(user_identifier=user_identifier, **filters)
+
+    return Stage('pages', fetch, workers=workers, expand=True)
+
+
+def parse_stage(workers: int = 1) -> Stage:
+    """
+    Stage parsing pages of tours.
+    :param workers: The number of pages parsed concurrently.
+    :return: A stage taking lists of tour dictionaries and emitting Tour objects, skipping the tours that cannot be
+    parsed. It fails if none of the tours of a page can be parsed, which may indicate an API change.
+    """
+    def parse(tour_dicts: List[Dict[str, Any]]) -> List[Tour]:
+        tours, failures = parse_tours(tour_dicts=tour_dicts)
+        if tour_dicts and not tours:
+            failed_tour_ids = ', '.join(str(tour_id) for tour_id, _ in failures)
+            raise ValueError(
+                f'Failed to parse all {len(tour_dicts)} tours of a page. '
+                f'This may indicate an API/schema change. '
+                f'Failed tour ids: {failed_tour_ids}'
+            )
+        return tours
+
+    return Stage('parse', parse, workers=workers, expand=True)
+
+
+def hydrate_stage(
+    connector: 'KomootConnector',
+    what: Optional[List[str]] = None,
+    workers: int = 8,
+    skip_errors: bool = False,
+) -> Stage:
+    """
+    Stage fetching the tracks of tours, over a session shared by its workers and opened by each run, see
+    `KomootConnector.hydrate_tour`.
+    :param connector: The connector.
+    :param what: The tracks to fetch, a list of HydrationTargets. If not provided, only the coordinates are fetched.
+    :param workers: The number of tours hydrated concurrently.
+    :param skip_errors: Whether the tours whose tracks cannot be fetched are logged and dropped, instead of
+    cancelling the pipeline.
+    :return: A stage taking Tour objects and emitting them once their tracks are fetched.
+    """
+    if what is None:
+        what = [HydrationTargets.COORDINATES]
+    for target in what:
+        if target not in HydrationTargets.list_all():
+            raise ValueError(f'Invalid hydration target provided: {target}. Please provide one of '
+                             f'{HydrationTargets.list_all()}.')
+    # Each run hydrates the tours over its own session, opened when the run starts and closed when the stage is done.
+    sessions = contextlib.ExitStack()
+    session: Optional['requests.Session'] = None
+
+    def open_session() -> None:
+        nonlocal session
+        session = sessions.enter_context(connector.hydration_session(pool_size=workers))
+
+    def hydrate(tour: Tour) -> Tour:
+        return connector.hydrate_tour(tour=tour, what=what, session=session)
+
+    return Stage('hydrate', hydrate, workers=workers, skip_errors=skip_errors, on_open=open_session,
+                 on_close=sessions.close)
+
+
+def archive_stage(archive: 'CoordinateArchive', batch_size: int = 100) -> Stage:
+    """
+    Stage storing the coordinates of tours in a coordinate archive, in batches.
+    :param archive: The archive, only written by this stage while the pipeline runs.
+    :param batch_size: The number of tours stored at once, each batch writes the index of the archive once.
+    :return: A stage taking hydrated Tour objects and emitting them once their coordinates are stored. The last
+    tours are stored when the previous stages are done, or when the run is cancelled.
+    """
+    if batch_size < 1:
+        raise ValueError(f'Invalid batch size provided: {batch_size}. Please provide a positive number.')
+    batch: List[Tour] = []
+
+    def flush() -> List[Tour]:
+        tours = batch[:]
+        batch.clear()
+        if tours:
+            archive.extend((tour.id, tour.coordinates) for tour in tours)
+        return tours
+
+    def store(tour: Tour) -> List[Tour]:
+        batch.append(tour)
+        return flush() if len(batch) >= batch_size else []
+
+    # The archive is not thread safe, the batches are stored by a single worker.
+    return Stage('store', store, workers=1, expand=True, flush=flush)
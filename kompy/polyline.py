@@ -0,0 +1,229 @@
+"""
+Encoded polylines for tracks and waypoints.
+
+Tracks are encoded with the Google polyline algorithm: each dimension of each point is rounded to a fixed number of
+decimals, stored as a delta from the previous point and written as base64-like characters. Altitude and time can be
+added as third and fourth dimensions, in which case the same dimensions must be requested when decoding.
+"""
+import math
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Union,
+)
+
+from kompy.constants.waypoint import Waypoint
+from kompy.coordinate import Coordinate
+from kompy.coordinate_array import CoordinateArray
+from kompy.tour import Tour
+
+DEFAULT_PRECISION = 5
+DEFAULT_ALTITUDE_PRECISION = 1
+DEFAULT_TIME_PRECISION = 0
+
+
+def _encode_columns(columns: List[Iterable[float]], precisions: List[int]) -> str:
+    """
+    Encode interleaved columns of values as a polyline.
+    :param columns: The columns to encode, one per dimension.
+    :param precisions: The number of decimals kept for each column.
+    :return: The encoded polyline.
+    """
+    factors = [10 ** precision for precision in precisions]
+    previous = [0] * len(columns)
+    characters = []
+    append = characters.append
+    dimensions = range(len(columns))
+    for point in zip(*columns):
+        for dimension in dimensions:
+            value = point[dimension]
+            if value != value:
+                raise ValueError('Cannot encode a missing value, please only request dimensions set for all points.')
+            scaled = int(math.floor(value * factors[dimension] + 0.5))
+            delta = scaled - previous[dimension]
+            previous[dimension] = scaled
+            delta = ~(delta << 1) if delta < 0 else delta << 1
+            while delta >= 0x20:
+                append(chr((0x20 | (delta & 0x1f)) + 63))
+                delta >>= 5
+            append(chr(delta + 63))
+    return ''.join(characters)
+
+
+def _decode_columns(encoded: str, precisions: List[int]) -> List[List[float]]:
+    """
+    Decode a polyline into columns of values.
+    :param encoded: The encoded polyline.
+    :param precisions: The number of decimals kept for each column.
+    :return: The decoded columns, one per dimension.
+    """
+    dimensions = len(precisions)
+    factors = [10 ** precision for precision in precisions]
+    columns: List[List[float]] = [[] for _ in range(dimensions)]
+    totals = [0] * dimensions
+    dimension = 0
+    shift = 0
+    result = 0
+    for character in encoded:
+        byte = ord(character) - 63
+        if byte < 0 or byte > 0x3f:
+            raise ValueError(f'Invalid character in polyline: {character!r}.')
+        result |= (byte & 0x1f) << shift
+        if byte & 0x20:
+            shift += 5
+            continue
+        totals[dimension] += ~(result >> 1) if result & 1 else result >> 1
+        columns[dimension].append(totals[dimension] / factors[dimension])
+        dimension = (dimension + 1) % dimensions
+        shift = 0
+        result = 0
+    if shift or dimension:
+        raise ValueError('Invalid polyline provided: it ends in the middle of a point.')
+    return columns
+
+
+def encode_coordinates(
+    coordinates: Union[CoordinateArray, Iterable[Coordinate]],
+    precision: int = DEFAULT_PRECISION,
+    with_altitude: bool = False,
+    with_time: bool = False,
+    altitude_precision: int = DEFAULT_ALTITUDE_PRECISION,
+    time_precision: int = DEFAULT_TIME_PRECISION,
+) -> str:
+    """
+    Encode a track as a polyline.
+    :param coordinates: The coordinates of the track, e.g. Tour.coordinates.
+    :param precision: The number of decimals kept for latitudes and longitudes, 5 is the Google default.
+    :param with_altitude: Whether to encode the altitude as an additional dimension.
+    :param with_time: Whether to encode the time as an additional dimension.
+    :param altitude_precision: The number of decimals kept for altitudes.
+    :param time_precision: The number of decimals kept for times.
+    :return: The encoded polyline.
+    """
+    if not isinstance(coordinates, CoordinateArray):
+        coordinates = CoordinateArray.from_coordinates(coordinates)
+    columns = [coordinates.lat, coordinates.lon]
+    precisions = [precision, precision]
+    if with_altitude:
+        columns.append(coordinates.alt)
+        precisions.append(altitude_precision)
+    if with_time:
+        columns.append(coordinates.time)
+        precisions.append(time_precision)
+    return _encode_columns(columns=columns, precisions=precisions)
+
+
+def decode_coordinates(
+    encoded: str,
+    precision: int = DEFAULT_PRECISION,
+    with_altitude: bool = False,
+    with_time: bool = False,
+    altitude_precision: int = DEFAULT_ALTITUDE_PRECISION,
+    time_precision: int = DEFAULT_TIME_PRECISION,
+) -> CoordinateArray:
+    """
+    Decode a polyline into a track. The parameters must match the ones used to encode it.
+    :param encoded: The encoded polyline.
+    :param precision: The number of decimals kept for latitudes and longitudes.
+    :param with_altitude: Whether the polyline contains the altitude.
+    :param with_time: Whether the polyline contains the time.
+    :param altitude_precision: The number of decimals kept for altitudes.
+    :param time_precision: The number of decimals kept for times.
+    :return: The decoded coordinates.
+    """
+    precisions = [precision, precision]
+    if with_altitude:
+        precisions.append(altitude_precision)
+    if with_time:
+        precisions.append(time_precision)
+    columns = _decode_columns(encoded=encoded, precisions=precisions)
+    return CoordinateArray(
+        lat=columns[0],
+        lon=columns[1],
+        alt=columns[2] if with_altitude else None,
+        time=columns[-1] if with_time else None,
+    )
+
+
+def encode_waypoints(waypoints: Iterable[Waypoint], precision: int = DEFAULT_PRECISION) -> str:
+    """
+    Encode waypoints, e.g. Tour.path, as a polyline. The index of each waypoint is encoded as a third dimension, the
+    end index and the reference are not encoded.
+    :param waypoints: The waypoints to encode.
+    :param precision: The number of decimals kept for latitudes and longitudes.
+    :return: The encoded polyline.
+    """
+    waypoints = list(waypoints)
+    return _encode_columns(
+        columns=[
+            [waypoint.location.lat for waypoint in waypoints],
+            [waypoint.location.lon for waypoint in waypoints],
+            [waypoint.index for waypoint in waypoints],
+        ],
+        precisions=[precision, precision, 0],
+    )
+
+
+def decode_waypoints(encoded: str, precision: int = DEFAULT_PRECISION) -> List[Waypoint]:
+    """
+    Decode a polyline created with `encode_waypoints`.
+    :param encoded: The encoded polyline.
+    :param precision: The number of decimals kept for latitudes and longitudes.
+    :return: The decoded waypoints.
+    """
+    lats, lons, indices = _decode_columns(encoded=encoded, precisions=[precision, precision, 0])
+    return [
+        Waypoint(
+            location=Coordinate(lat=lat, lon=lon),
+            index=int(index),
+        ) for lat, lon, index in zip(lats, lons, indices)
+    ]
+
+
+def encode_tours(
+    tours: Iterable[Tour],
+    precision: int = DEFAULT_PRECISION,
+    with_altitude: bool = False,
+    with_time: bool = False,
+) -> Dict[str, str]:
+    """
+    Encode the coordinates of many tours. Tours without coordinates are skipped.
+    :param tours: The tours to encode, their coordinates must have been fetched.
+    :param precision: The number of decimals kept for latitudes and longitudes.
+    :param with_altitude: Whether to encode the altitude as an additional dimension.
+    :param with_time: Whether to encode the time as an additional dimension.
+    :return: A dictionary mapping the id of each tour to its encoded polyline.
+    """
+    return {
+        tour.id: encode_coordinates(
+            coordinates=tour.coordinates,
+            precision=precision,
+            with_altitude=with_altitude,
+            with_time=with_time,
+        ) for tour in tours if tour.coordinates
+    }
+
+
+def decode_tracks(
+    encoded_tracks: Dict[str, str],
+    precision: int = DEFAULT_PRECISION,
+    with_altitude: bool = False,
+    with_time: bool = False,
+) -> Dict[str, CoordinateArray]:
+    """
+    Decode many polylines, e.g. the output of `encode_tours`.
+    :param encoded_tracks: A dictionary mapping an identifier to an encoded polyline.
+    :param precision: The number of decimals kept for latitudes and longitudes.
+    :param with_altitude: Whether the polylines contain the altitude.
+    :param with_time: Whether the polylines contain the time.
+    :return: A dictionary mapping each identifier to its decoded coordinates.
+    """
+    return {
+        identifier: decode_coordinates(
+            encoded=encoded,
+            precision=precision,
+            with_altitude=with_altitude,
+            with_time=with_time,
+        ) for identifier, encoded in encoded_tracks.items()
+    }
@@ -0,0 +1,163 @@
+"""
+Scheduling of the requests of a connector, to share the concurrency and rate limits of an account between interactive
+and bulk traffic.
+
+Each request waits for a slot of the scheduler. Slots are granted in weighted fair order across the priority classes:
+with the default weights, interactive requests get eight slots for every bulk one while both are waiting, and bulk
+requests use all the slots when nothing else is queued. The connector assigns a default class to each operation
+(interactive for `get_tour_by_id`, `change_tour` and `delete_tour`, bulk for `get_tours`, `upload_tour` and
+`hydrate`), which can be overridden for a block of code:
+
+    scheduler = RequestScheduler(max_concurrency=4, rate=10)
+    connector = KomootConnector(email=email, password=password, scheduler=scheduler)
+    with scheduler.priority(PriorityClasses.BULK):
+        connector.get_tour_by_id(tour_id)
+"""
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from kompy.constants.priority_classes import PriorityClasses
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    PriorityClasses.INTERACTIVE: 8.0,
+    PriorityClasses.BULK: 1.0,
+}
+
+_priority_override: ContextVar[Optional[str]] = ContextVar('kompy_priority_override', default=None)
+# The ids of the schedulers whose slot is held by the current context.
+_held_slots: ContextVar[FrozenSet[int]] = ContextVar('kompy_held_slots', default=frozenset())
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Scheduler granting slots to the requests of one or more connectors.
+        :param max_concurrency: The maximum number of requests in flight.
+        :param rate: The maximum number of requests started per second, optional. If not provided, only the
+        concurrency is limited.
+        :param burst: The number of requests that can be started at once after an idle period, when the rate is
+        limited. If not provided, the maximum concurrency.
+        :param weights: The weight of each priority class, its share of the slots while several classes are waiting.
+        The classes not provided keep their weight of DEFAULT_WEIGHTS.
+        """
+        if max_concurrency < 1:
+            raise ValueError(f'Invalid concurrency provided: {max_concurrency}. Please provide a positive number.')
+        if rate is not None and rate <= 0:
+            raise ValueError(f'Invalid rate provided: {rate}. Please provide a positive number.')
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst if burst is not None else max_concurrency
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        for priority, weight in self.weights.items():
+            if weight <= 0:
+                raise ValueError(f'Invalid weight provided for {priority}: {weight}. Please provide a positive number.')
+        self.active = 0
+        self.granted: Dict[str, int] = {priority: 0 for priority in self.weights}
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {priority: 0.0 for priority in self.weights}
+        self._waiting: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def priority(self, priority: str) -> Iterator[None]:
+        """
+        Override the priority class of the requests sent within a block of code, in the current thread or task.
+        :param priority: The priority class.
+        :return: A context manager.
+        """
+        if priority not in self.weights:
+            raise ValueError(f'Invalid priority provided: {priority}. Please provide one of {list(self.weights)}.')
+        token = _priority_override.set(priority)
+        try:
+            yield
+        finally:
+            _priority_override.reset(token)
+
+    def waiting(self) -> int:
+        """
+        Count the requests waiting for a slot.
+        :return: The number of waiting requests.
+        """
+        with self._condition:
+            return len(self._waiting)
+
+    def _take_token(self) -> float:
+        """
+        Take a rate token, if the rate is limited.
+        :return: 0 if a token was taken, otherwise the time until the next token, in seconds.
+        """
+        if self.rate is None:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def _acquire(self, priority: str) -> None:
+        with self._condition:
+            finish = max(self._virtual_time, self._last_finish[priority]) + 1 / self.weights[priority]
+            self._last_finish[priority] = finish
+            entry = (finish, next(self._sequence), priority)
+            heapq.heappush(self._waiting, entry)
+            while True:
+                timeout = None
+                if self._waiting[0] is entry and self.active < self.max_concurrency:
+                    timeout = self._take_token()
+                    if not timeout:
+                        break
+                self._condition.wait(timeout)
+            heapq.heappop(self._waiting)
+            self.active += 1
+            self.granted[priority] += 1
+            self._virtual_time = finish
+            # The next waiting request may be granted a slot too.
+            self._condition.notify_all()
+
+    def _release(self) -> None:
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, priority: str) -> Iterator[None]:
+        """
+        Hold a slot for the duration of a block of code, waiting for it if needed. Slots are reentrant: a block
+        nested in another one of the same scheduler does not take a second slot.
+        :param priority: The priority class of the request, unless overridden with `priority`.
+        :return: A context manager.
+        """
+        held = _held_slots.get()
+        if id(self) in held:
+            yield
+            return
+        self._acquire(_priority_override.get() or priority)
+        token = _held_slots.set(held | {id(self)})
+        try:
+            yield
+        finally:
+            _held_slots.reset(token)
+            self._release()
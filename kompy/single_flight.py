@@ -0,0 +1,76 @@
+"""
+Coalescing of concurrent calls for the same resource.
+
+When several threads ask for the same key at the same time, only the first one runs the call, the others wait for it
+and receive the same result, or the same exception. Once the call returned, the next call for the key runs again:
+nothing is cached.
+"""
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+)
+
+
+class _Call:
+    def __init__(self):
+        """
+        Call in flight.
+        """
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Group of calls coalesced by key.
+        """
+        self.coalesced = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a call, unless a call for the same key is in flight, in which case wait for its result.
+        :param key: The key of the call.
+        :param function: The function to call.
+        :param args: The positional arguments of the function.
+        :param kwargs: The keyword arguments of the function.
+        :return: The result of the call, shared by all the callers waiting for it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """
+        Count the calls in flight.
+        :return: The number of calls in flight.
+        """
+        with self._lock:
+            return len(self._calls)
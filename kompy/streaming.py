@@ -0,0 +1,43 @@
+import os
+import sys
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Iterable,
+    Union,
+)
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+StreamSource = Union[bytes, bytearray, memoryview, str, os.PathLike, BinaryIO, 'requests.Response', Iterable[bytes]]
+
+
+def iter_chunks(source: StreamSource, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterable[bytes]:
+    """
+    Read a source of bytes chunk by chunk.
+    :param source: Bytes, a path, a binary file-like object, a (streamed) response or an iterable of chunks of bytes.
+    :param chunk_size: The size of the chunks read from the source, in bytes.
+    :return: An iterator over the chunks.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter(lambda: f.read(chunk_size), b'')
+    elif _is_response(source):
+        yield from source.iter_content(chunk_size=chunk_size)
+    elif hasattr(source, 'read'):
+        yield from iter(lambda: source.read(chunk_size), b'')
+    else:
+        yield from source
+
+
+def _is_response(source: object) -> bool:
+    # A response can only exist if requests has already been imported, there is no need to import it here.
+    requests = sys.modules.get('requests')
+    return requests is not None and isinstance(source, requests.Response)
@@ -1,36 +1,65 @@
 import logging
 from datetime import datetime
 from typing import (
+    TYPE_CHECKING,
     Any,
+    Callable,
     Dict,
     List, Optional,
+    Tuple,
+    Union,
 )
 
-import gpxpy
-import requests
-from dateutil import parser
-from gpxpy.gpx import GPX
-
 from kompy.authentication import Authentication
+from kompy.compression import accept_encoding
 from kompy.constants.activities import SupportedActivities
 from kompy.constants.tour_constants import SmartTourTypes
 from kompy.constants.urls import KomootUrl
 from kompy.constants.waypoint import Waypoint
 from kompy.coordinate import Coordinate
+from kompy.coordinate_array import CoordinateArray
+from kompy.coordinates_reader import (
+    ItemCallback,
+    iter_coordinate_items,
+    read_coordinates,
+)
 from kompy.difficulty import Difficulty
+from kompy.gpx_reader import (
+    GpxColumns,
+    read_gpx,
+)
 from kompy.image import KomootImage
+from kompy.log import get_logger
 from kompy.segment import (
     Segment,
     SegmentInformation,
 )
+from kompy.single_flight import SingleFlight
 from kompy.surface import Surface
 from kompy.way_type import WayType
 
-logger = logging.getLogger('KomootTour')
-ch = logging.StreamHandler()
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-ch.setFormatter(formatter)
-logger.addHandler(ch)
+if TYPE_CHECKING:
+    import requests
+    from gpxpy.gpx import GPX
+
+logger = get_logger('KomootTour')
+
+
+# Downloads of the tracks in flight, shared by concurrent fetches of the same track.
+_track_fetches = SingleFlight()
+
+
+def _coalesced(key: Tuple, coalesce: bool, function: Callable[..., Any], *args) -> Any:
+    if not coalesce:
+        return function(*args)
+    return _track_fetches.do(key, function, *args)
+
+
+def _parse_date(text: str) -> datetime:
+    # dateutil is imported on first use, to keep `import kompy` fast.
+    from dateutil import parser
+
+    return parser.parse(text)
 
 
 class TourInformation:
@@ -103,8 +132,8 @@ class Tour:
         self.id: str = tour['id']
         self.type: str = tour['type']
         self.source: Optional[str] = tour['source'] if 'source' in tour else None
-        self.start_date: datetime = parser.parse(tour['date'])
-        self.changed_at: datetime = parser.parse(tour['changed_at'])
+        self.start_date: datetime = _parse_date(tour['date'])
+        self.changed_at: datetime = _parse_date(tour['changed_at'])
         self.name: str = tour['name']
         self.kcal_active: float = tour['kcal_active']
         self.kcal_resting: float = tour['kcal_resting']
@@ -163,8 +192,9 @@ class Tour:
         self.links_dict = tour['_links'] if '_links' in tour else None
         if self.links_dict is not None:
             self.coordinates_link = self.links_dict['coordinates']['href'] if 'coordinates' in self.links_dict else None
-        self.coordinates: List[Coordinate] = []
-        self.gpx_track: Optional[GPX] = None
+        self.coordinates: Union[List[Coordinate], CoordinateArray] = []
+        self.gpx_track: Optional['GPX'] = None
+        self.gpx_columns: Optional[GpxColumns] = None
 
     @staticmethod
     def _create_list_waypoints(path: List[Dict[str, Any]]) -> List[Waypoint]:
@@ -254,48 +284,189 @@ class Tour:
             ],
         )
 
-    def generate_coordinates(self, authentication: Authentication) -> bool:
+    def generate_coordinates(
+        self,
+        authentication: Authentication,
+        as_array: bool = False,
+        item_callback: Optional[ItemCallback] = None,
+        session: Optional['requests.Session'] = None,
+        coalesce: bool = True,
+    ) -> bool:
         """
-        Fetch the coordinates of the tour.
+        Fetch the coordinates of the tour. The response is decoded incrementally while it is downloaded.
         :param authentication: The authentication object.
+        :param as_array: Whether to store the coordinates as a CoordinateArray instead of a list of Coordinate objects.
+        :param item_callback: A function called with each coordinate dictionary as soon as it is received, optional.
+        :param session: The session to send the request with, optional. If not provided, a new connection is used.
+        :param coalesce: Whether to share the download with concurrent fetches of the same coordinates, in which case
+        the tours share the same coordinates object. Fetches with an item callback are never shared.
         :return: True if the coordinates were fetched successfully, False otherwise
         """
-        if self.coordinates_link is not None:
-            coord_request = requests.get(
-                url=self.coordinates_link,
-                auth=(authentication.get_email_address(), authentication.get_password()),
-            ).json()['items']
-        else:
+        if getattr(self, 'coordinates_link', None) is None:
             logging.warning('No coordinates link found.')
             return False
+        self.coordinates = _coalesced(
+            ('coordinates', self.coordinates_link, authentication.get_email_address(), as_array),
+            coalesce and item_callback is None,
+            self._download_coordinates,
+            authentication,
+            as_array,
+            item_callback,
+            session,
+        )
+        return True
 
-        self.coordinates = [
-            Coordinate(
-                lat=coord_dict['lat'],
-                lon=coord_dict['lng'],
-                alt=coord_dict['alt'] if 'alt' in coord_dict else None,
-                time=coord_dict['t'] if 't' in coord_dict else None
-            ) for coord_dict in coord_request
-        ]
+    def _download_coordinates(
+        self,
+        authentication: Authentication,
+        as_array: bool,
+        item_callback: Optional[ItemCallback],
+        session: Optional['requests.Session'],
+    ) -> Union[List[Coordinate], CoordinateArray]:
+        """
+        Download and decode the coordinates of the tour, see generate_coordinates.
+        :param authentication: The authentication object.
+        :param as_array: Whether to return the coordinates as a CoordinateArray instead of a list of Coordinate objects.
+        :param item_callback: A function called with each coordinate dictionary as soon as it is received, optional.
+        :param session: The session to send the request with, optional. If not provided, a new connection is used.
+        :return: The coordinates.
+        """
+        import requests
 
-        return True
+        response = (session or requests).get(
+            url=self.coordinates_link,
+            auth=(authentication.get_email_address(), authentication.get_password()),
+            headers={'Accept-Encoding': accept_encoding()},
+            stream=True,
+        )
+        if not response.ok:
+            # The error body is not a coordinates document, it would be decoded as an empty track.
+            response.close()
+            if response.status_code == 403:
+                raise ConnectionError(
+                    'Connection to Komoot API failed. Please check your credentials.'
+                )
+            raise ValueError(f'Could not fetch the coordinates of tour {self.id}. '
+                             f'Response status code: {response.status_code}')
+        if as_array:
+            return read_coordinates(source=response, item_callback=item_callback)
+
+        coordinates = []
+        for coord_dict in iter_coordinate_items(source=response):
+            if item_callback is not None:
+                item_callback(coord_dict)
+            coordinates.append(
+                Coordinate(
+                    lat=coord_dict['lat'],
+                    lon=coord_dict['lng'],
+                    alt=coord_dict['alt'] if 'alt' in coord_dict else None,
+                    time=coord_dict['t'] if 't' in coord_dict else None
+                )
+            )
+        return coordinates
 
-    def generate_gpx_track(self, authentication: Authentication) -> bool:
+    def generate_gpx_track(
+        self,
+        authentication: Authentication,
+        session: Optional['requests.Session'] = None,
+        coalesce: bool = True,
+    ) -> bool:
         """
         Fetch the GPX file of the tour.
         :param authentication: The authentication object.
+        :param session: The session to send the request with, optional. If not provided, a new connection is used.
+        :param coalesce: Whether to share the download with concurrent fetches of the same GPX file, in which case the
+        tours share the same GPX object.
         :return: True if the GPX file was fetched successfully, False otherwise
         """
+        self.gpx_track = _coalesced(
+            ('gpx', str(self.id), authentication.get_email_address()),
+            coalesce,
+            self._download_gpx_track,
+            authentication,
+            session,
+        )
+        return True
+
+    def _download_gpx_track(
+        self,
+        authentication: Authentication,
+        session: Optional['requests.Session'],
+    ) -> 'GPX':
+        """
+        Download and parse the GPX file of the tour, see generate_gpx_track.
+        :param authentication: The authentication object.
+        :param session: The session to send the request with, optional. If not provided, a new connection is used.
+        :return: The GPX object.
+        """
+        response = self._get_gpx(authentication=authentication, session=session, stream=False)
+
+        import gpxpy
+
+        return gpxpy.parse(response.content)
+
+    def generate_gpx_columns(
+        self,
+        authentication: Authentication,
+        session: Optional['requests.Session'] = None,
+        coalesce: bool = True,
+    ) -> bool:
+        """
+        Fetch the GPX file of the tour and read its points into packed columns, without building a gpxpy object.
+        :param authentication: The authentication object.
+        :param session: The session to send the request with, optional. If not provided, a new connection is used.
+        :param coalesce: Whether to share the download with concurrent fetches of the same GPX file, in which case the
+        tours share the same columns.
+        :return: True if the GPX file was fetched successfully, False otherwise
+        """
+        self.gpx_columns = _coalesced(
+            ('gpx_columns', str(self.id), authentication.get_email_address()),
+            coalesce,
+            self._download_gpx_columns,
+            authentication,
+            session,
+        )
+        return True
+
+    def _download_gpx_columns(
+        self,
+        authentication: Authentication,
+        session: Optional['requests.Session'],
+    ) -> GpxColumns:
+        """
+        Download the GPX file of the tour and read its points, see generate_gpx_columns.
+        :param authentication: The authentication object.
+        :param session: The session to send the request with, optional. If not provided, a new connection is used.
+        :return: The points of the GPX file.
+        """
+        return read_gpx(self._get_gpx(authentication=authentication, session=session, stream=True))
+
+    def _get_gpx(
+        self,
+        authentication: Authentication,
+        session: Optional['requests.Session'],
+        stream: bool,
+    ) -> 'requests.Response':
+        """
+        Request the GPX file of the tour.
+        :param authentication: The authentication object.
+        :param session: The session to send the request with, optional. If not provided, a new connection is used.
+        :param stream: Whether to stream the response.
+        :return: The response.
+        """
+        import requests
 
         params = {
             'Type': 'application/hal+json',
         }
 
         try:
-            response = requests.get(
+            response = (session or requests).get(
                 url=KomootUrl.TOUR_URL.format(tour_identifier=self.id) + '.gpx',
                 auth=(authentication.get_email_address(), authentication.get_password()),
                 params=params,
+                headers={'Accept-Encoding': accept_encoding()},
+                stream=stream,
             )
             if response.status_code == 403:
                 raise ConnectionError(
@@ -305,5 +476,4 @@ class Tour:
             raise ConnectionError(
                 'Connection to Komoot API failed. Please check your internet connection.'
             )
-
-        self.gpx_track = gpxpy.parse(response.content)
+        return response
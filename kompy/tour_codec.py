@@ -0,0 +1,603 @@
+"""
+Compact, versioned binary serialization of `kompy.tour.Tour` objects.
+
+A payload is laid out as follows (all integers are little endian):
+
+- preamble: magic bytes, format version, length of the string table and length of the header
+- string table: every string of the tour (names, sport, surface and way types, references...) stored once and
+  referenced by index everywhere else
+- header: the scalar fields of the tour, plus the offset and size of the coordinates section
+- body: difficulty, vector map image, links, path, segments, tour information, summary and finally the coordinates,
+  stored as packed columns of doubles (lat, lon, alt, time)
+
+Since the header is stored before the body and records where the coordinates start, the scalar fields and the
+track can be decoded on their own with `decode_tour_header` and `decode_coordinates`.
+
+The `gpx_track` and `gpx_columns` of a tour and the loaded `image` of its vector map image are not serialized.
+"""
+import math
+import struct
+import sys
+from array import array
+from datetime import datetime
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from kompy.constants.waypoint import Waypoint
+from kompy.coordinate import Coordinate
+from kompy.coordinate_array import CoordinateArray
+from kompy.difficulty import Difficulty
+from kompy.errors.codec_errors import TourCodecError
+from kompy.image import KomootImage
+from kompy.json_codec import (
+    dumps,
+    loads,
+)
+from kompy.segment import (
+    Segment,
+    SegmentInformation,
+)
+from kompy.surface import Surface
+from kompy.tour import (
+    Tour,
+    TourInformation,
+    TourSummary,
+)
+from kompy.way_type import WayType
+
+MAGIC = b'KMPT'
+FORMAT_VERSION = 1
+
+_NONE = 0xFFFFFFFF
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+_HAS_SMART_TOUR_TYPE = 1
+_HAS_COORDINATES_LINK = 2
+_ID_IS_INT = 4
+
+_HEADER_STRINGS = (
+    'id',
+    'type',
+    'source',
+    'start_date',
+    'changed_at',
+    'name',
+    'sport',
+    'smart_tour_type',
+    'query',
+    'master_share_url',
+    'coordinates_link',
+)
+_HEADER_NUMBERS = (
+    'kcal_active',
+    'kcal_resting',
+    'start_lat',
+    'start_lon',
+    'start_alt',
+    'distance',
+    'total_duration',
+    'elevation_up',
+    'elevation_down',
+    'time_in_motion',
+    'constitution',
+)
+
+# magic, version, string table length, header length
+_PREAMBLE = struct.Struct('<4sB3xII')
+# string references, numbers, int mask, poor quality, flags, coordinates offset, coordinates count
+_HEADER = struct.Struct(f'<{len(_HEADER_STRINGS)}I{len(_HEADER_NUMBERS)}dHBBQI')
+_COUNT = struct.Struct('<I')
+_DIFFICULTY = struct.Struct('<III')
+# url, client hash, attribution, attribution url, media type, templated
+_IMAGE = struct.Struct('<5IB')
+
+
+class _StringTable:
+    def __init__(self):
+        """
+        Table interning every string of a payload, so that repeated values are only stored once.
+        """
+        self.strings: List[str] = []
+        self._indices: Dict[str, int] = {}
+
+    def ref(self, value: Optional[str]) -> int:
+        """
+        Get the reference of a string, adding it to the table if needed.
+        :param value: The string, or None.
+        :return: The index of the string in the table.
+        """
+        if value is None:
+            return _NONE
+        index = self._indices.get(value)
+        if index is None:
+            index = len(self.strings)
+            self._indices[value] = index
+            self.strings.append(value)
+        return index
+
+    def to_bytes(self) -> bytes:
+        parts = [_COUNT.pack(len(self.strings))]
+        for value in self.strings:
+            encoded = value.encode('utf-8')
+            parts.append(_COUNT.pack(len(encoded)))
+            parts.append(encoded)
+        return b''.join(parts)
+
+
+class _Reader:
+    def __init__(self, buffer: memoryview, offset: int, strings: List[Optional[str]]):
+        """
+        Sequential reader over a payload.
+        :param buffer: The payload.
+        :param offset: The position to start reading from.
+        :param strings: The decoded string table.
+        """
+        self.buffer = buffer
+        self.offset = offset
+        self.strings = strings
+
+    def unpack(self, structure: struct.Struct) -> Tuple[Any, ...]:
+        values = structure.unpack_from(self.buffer, self.offset)
+        self.offset += structure.size
+        return values
+
+    def count(self) -> Optional[int]:
+        (count,) = self.unpack(_COUNT)
+        return None if count == _NONE else count
+
+    def string(self, ref: int) -> Optional[str]:
+        return None if ref == _NONE else self.strings[ref]
+
+    def strings_column(self, count: int) -> List[Optional[str]]:
+        return [self.string(ref) for ref in self.unpack(struct.Struct(f'<{count}I'))]
+
+    def ints_column(self, count: int) -> Tuple[int, ...]:
+        return self.unpack(struct.Struct(f'<{count}q'))
+
+    def doubles_column(self, count: int) -> array:
+        end = self.offset + 8 * count
+        if end > len(self.buffer):
+            raise TourCodecError('truncated column')
+        values = array('d')
+        values.frombytes(self.buffer[self.offset:end])
+        if _BIG_ENDIAN:
+            values.byteswap()
+        self.offset = end
+        return values
+
+
+def _pack_doubles(values: Union[array, Sequence[float]]) -> bytes:
+    packed = values if isinstance(values, array) and values.typecode == 'd' else array('d', values)
+    if _BIG_ENDIAN:
+        packed = array('d', packed)
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _pack_refs(table: _StringTable, values: Sequence[Optional[str]]) -> bytes:
+    return struct.pack(f'<{len(values)}I', *[table.ref(value) for value in values])
+
+
+def _pack_ints(values: Sequence[int]) -> bytes:
+    return struct.pack(f'<{len(values)}q', *values)
+
+
+def _optional_number(value: Optional[float]) -> float:
+    return math.nan if value is None else float(value)
+
+
+def _restore_number(value: float, is_int: bool) -> Optional[Union[int, float]]:
+    if math.isnan(value):
+        return None
+    return int(value) if is_int else value
+
+
+def _encode_body(tour: Tour, table: _StringTable) -> Tuple[List[bytes], int]:
+    """
+    Encode every section of the body but the coordinates.
+    :param tour: The tour to encode.
+    :param table: The string table of the payload.
+    :return: The encoded sections and their total length.
+    """
+    parts = []
+
+    difficulty = getattr(tour, 'difficulty', None)
+    if difficulty is None:
+        parts.append(_DIFFICULTY.pack(_NONE, _NONE, _NONE))
+    else:
+        parts.append(_DIFFICULTY.pack(
+            table.ref(difficulty.grade),
+            table.ref(difficulty.technical_explanation),
+            table.ref(difficulty.fitness_explanation),
+        ))
+
+    image = getattr(tour, 'vector_map_image', None)
+    if image is None:
+        parts.append(_IMAGE.pack(_NONE, _NONE, _NONE, _NONE, _NONE, 2))
+    else:
+        parts.append(_IMAGE.pack(
+            table.ref(image.image_url),
+            table.ref(image.client_hash),
+            table.ref(image.attribution),
+            table.ref(image.attribution_url),
+            table.ref(image.media_type),
+            2 if image.templated is None else int(bool(image.templated)),
+        ))
+
+    links_dict = getattr(tour, 'links_dict', None)
+    parts.append(_COUNT.pack(table.ref(None if links_dict is None else dumps(links_dict).decode('utf-8'))))
+
+    path = getattr(tour, 'path', None)
+    if path is None:
+        parts.append(_COUNT.pack(_NONE))
+    else:
+        parts.append(_COUNT.pack(len(path)))
+        parts.append(_pack_doubles([waypoint.location.lat for waypoint in path]))
+        parts.append(_pack_doubles([waypoint.location.lon for waypoint in path]))
+        parts.append(_pack_ints([waypoint.index for waypoint in path]))
+        parts.append(_pack_ints([-1 if waypoint.end_index is None else waypoint.end_index for waypoint in path]))
+        parts.append(_pack_refs(table, [waypoint.reference for waypoint in path]))
+
+    segments = getattr(tour, 'segments', None)
+    if segments is None:
+        parts.append(_COUNT.pack(_NONE))
+    else:
+        parts.append(_COUNT.pack(len(segments)))
+        parts.append(_pack_refs(table, [segment.segment_type for segment in segments]))
+        parts.append(_pack_ints([segment.segment_boundaries.start_index_point for segment in segments]))
+        parts.append(_pack_ints([segment.segment_boundaries.end_index_point for segment in segments]))
+        parts.append(_pack_refs(table, [segment.reference for segment in segments]))
+
+    tour_information = getattr(tour, 'tour_information', None)
+    if tour_information is None:
+        parts.append(_COUNT.pack(_NONE))
+    else:
+        parts.append(_COUNT.pack(len(tour_information)))
+        for information in tour_information:
+            parts.append(_COUNT.pack(table.ref(information.tour_information_type)))
+            parts.append(_COUNT.pack(len(information.segments)))
+            parts.append(_pack_ints([segment.start_index_point for segment in information.segments]))
+            parts.append(_pack_ints([segment.end_index_point for segment in information.segments]))
+
+    summary = getattr(tour, 'summary', None)
+    if summary is None:
+        parts.append(_COUNT.pack(_NONE))
+    else:
+        parts.append(_COUNT.pack(len(summary.surfaces)))
+        parts.append(_pack_refs(table, [surface.type for surface in summary.surfaces]))
+        parts.append(_pack_doubles([surface.amount for surface in summary.surfaces]))
+        parts.append(_COUNT.pack(len(summary.way_types)))
+        parts.append(_pack_refs(table, [way_type.type for way_type in summary.way_types]))
+        parts.append(_pack_doubles([way_type.amount for way_type in summary.way_types]))
+
+    return parts, sum(len(part) for part in parts)
+
+
+def encode_tour(tour: Tour) -> bytes:
+    """
+    Encode a tour into the compact binary format.
+    :param tour: The tour to encode.
+    :return: The encoded tour.
+    """
+    table = _StringTable()
+
+    tour_id = tour.id
+    flags = 0
+    if isinstance(tour_id, int):
+        flags |= _ID_IS_INT
+        tour_id = str(tour_id)
+    if hasattr(tour, 'smart_tour_type'):
+        flags |= _HAS_SMART_TOUR_TYPE
+    if hasattr(tour, 'coordinates_link'):
+        flags |= _HAS_COORDINATES_LINK
+
+    string_values = {
+        'id': tour_id,
+        'type': tour.type,
+        'source': tour.source,
+        'start_date': tour.start_date.isoformat(),
+        'changed_at': tour.changed_at.isoformat(),
+        'name': tour.name,
+        'sport': tour.sport,
+        'smart_tour_type': getattr(tour, 'smart_tour_type', None),
+        'query': tour.query,
+        'master_share_url': tour.master_share_url,
+        'coordinates_link': getattr(tour, 'coordinates_link', None),
+    }
+    number_values = {
+        'kcal_active': tour.kcal_active,
+        'kcal_resting': tour.kcal_resting,
+        'start_lat': tour.start_point.lat,
+        'start_lon': tour.start_point.lon,
+        'start_alt': tour.start_point.alt,
+        'distance': tour.distance,
+        'total_duration': tour.total_duration,
+        'elevation_up': tour.elevation_up,
+        'elevation_down': tour.elevation_down,
+        'time_in_motion': tour.time_in_motion,
+        'constitution': tour.constitution,
+    }
+    int_mask = 0
+    for position, field in enumerate(_HEADER_NUMBERS):
+        value = number_values[field]
+        if isinstance(value, int) and not isinstance(value, bool):
+            int_mask |= 1 << position
+    poor_quality = 2 if tour.poor_quality is None else int(bool(tour.poor_quality))
+
+    body_parts, body_length = _encode_body(tour=tour, table=table)
+
+    coordinates = tour.coordinates
+    if not isinstance(coordinates, CoordinateArray):
+        coordinates = CoordinateArray.from_coordinates(coordinates)
+    string_references = [table.ref(string_values[field]) for field in _HEADER_STRINGS]
+
+    strings = table.to_bytes()
+    coordinates_offset = _PREAMBLE.size + len(strings) + _HEADER.size + body_length
+    header = _HEADER.pack(
+        *string_references,
+        *[_optional_number(number_values[field]) for field in _HEADER_NUMBERS],
+        int_mask,
+        poor_quality,
+        flags,
+        coordinates_offset,
+        len(coordinates),
+    )
+    return b''.join([
+        _PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(strings), len(header)),
+        strings,
+        header,
+        *body_parts,
+        _pack_doubles(coordinates.lat),
+        _pack_doubles(coordinates.lon),
+        _pack_doubles(coordinates.alt),
+        _pack_doubles(coordinates.time),
+    ])
+
+
+def _read_header(data: Union[bytes, bytearray, memoryview]) -> Tuple[_Reader, Dict[str, Any]]:
+    """
+    Read the preamble, the string table and the header of a payload.
+    :param data: The payload.
+    :return: A reader positioned at the start of the body and the raw header fields.
+    """
+    buffer = memoryview(data)
+    try:
+        magic, version, strings_length, header_length = _PREAMBLE.unpack_from(buffer, 0)
+    except struct.error:
+        raise TourCodecError('truncated preamble')
+    if magic != MAGIC:
+        raise TourCodecError(f'unknown magic bytes {bytes(magic)!r}')
+    if version != FORMAT_VERSION:
+        raise TourCodecError(f'unsupported format version {version}, expected {FORMAT_VERSION}')
+    if header_length != _HEADER.size:
+        raise TourCodecError(f'unexpected header length {header_length}')
+
+    reader = _Reader(buffer=buffer, offset=_PREAMBLE.size, strings=[])
+    try:
+        (string_count,) = reader.unpack(_COUNT)
+        for _ in range(string_count):
+            (length,) = reader.unpack(_COUNT)
+            reader.strings.append(bytes(buffer[reader.offset:reader.offset + length]).decode('utf-8'))
+            reader.offset += length
+        if reader.offset != _PREAMBLE.size + strings_length:
+            raise TourCodecError('corrupted string table')
+        values = reader.unpack(_HEADER)
+
+        references = values[:len(_HEADER_STRINGS)]
+        numbers = values[len(_HEADER_STRINGS):len(_HEADER_STRINGS) + len(_HEADER_NUMBERS)]
+        int_mask, poor_quality, flags, coordinates_offset, coordinates_count = values[-5:]
+        header: Dict[str, Any] = {
+            field: reader.string(ref) for field, ref in zip(_HEADER_STRINGS, references)
+        }
+        for position, (field, value) in enumerate(zip(_HEADER_NUMBERS, numbers)):
+            header[field] = _restore_number(value, is_int=bool(int_mask & (1 << position)))
+        if flags & _ID_IS_INT:
+            header['id'] = int(header['id'])
+        header['start_date'] = datetime.fromisoformat(header['start_date'])
+        header['changed_at'] = datetime.fromisoformat(header['changed_at'])
+    except (struct.error, UnicodeDecodeError, IndexError, ValueError, TypeError) as e:
+        # Corrupt string references point outside the string table, or to strings which are not dates or ids.
+        raise TourCodecError(str(e))
+    header['poor_quality'] = None if poor_quality == 2 else bool(poor_quality)
+    header['flags'] = flags
+    header['coordinates_offset'] = coordinates_offset
+    header['coordinates_count'] = coordinates_count
+    return reader, header
+
+
+def decode_tour_header(data: Union[bytes, bytearray, memoryview]) -> Dict[str, Any]:
+    """
+    Decode only the scalar fields of an encoded tour, without unpacking its path, segments or coordinates.
+    :param data: The encoded tour.
+    :return: A dictionary with the scalar fields of the tour, named as the attributes of `kompy.tour.Tour`, and the
+    number of points of the track as `coordinates_count`.
+    """
+    _, header = _read_header(data)
+    del header['flags']
+    del header['coordinates_offset']
+    return header
+
+
+def decode_coordinates(data: Union[bytes, bytearray, memoryview]) -> CoordinateArray:
+    """
+    Decode only the track of an encoded tour.
+    :param data: The encoded tour.
+    :return: The coordinates of the tour as a CoordinateArray.
+    """
+    reader, header = _read_header(data)
+    reader.offset = header['coordinates_offset']
+    return _read_coordinates(reader=reader, count=header['coordinates_count'])
+
+
+def _read_coordinates(reader: _Reader, count: int) -> CoordinateArray:
+    coordinates = CoordinateArray()
+    coordinates.lat = reader.doubles_column(count)
+    coordinates.lon = reader.doubles_column(count)
+    coordinates.alt = reader.doubles_column(count)
+    coordinates.time = reader.doubles_column(count)
+    return coordinates
+
+
+def _unchecked_coordinates(coordinates: CoordinateArray) -> List[Coordinate]:
+    # Coordinates were validated before being encoded, skipping the validation makes decoding several times faster.
+    unpacked = []
+    new = Coordinate.__new__
+    for lat, lon, alt, time in zip(coordinates.lat, coordinates.lon, coordinates.alt, coordinates.time):
+        coordinate = new(Coordinate)
+        coordinate.lat = lat
+        coordinate.lon = lon
+        coordinate.alt = None if alt != alt else alt
+        coordinate.time = None if time != time else time
+        unpacked.append(coordinate)
+    return unpacked
+
+
+def decode_tour(data: Union[bytes, bytearray, memoryview]) -> Tour:
+    """
+    Decode a tour encoded with `encode_tour`.
+    :param data: The encoded tour.
+    :return: The decoded tour.
+    """
+    reader, header = _read_header(data)
+    try:
+        return _build_tour(reader=reader, header=header)
+    except (struct.error, IndexError, ValueError, TypeError) as e:
+        raise TourCodecError(str(e))
+
+
+def _build_tour(reader: _Reader, header: Dict[str, Any]) -> Tour:
+    # The fields were validated when the tour was first built, so the object is filled in directly instead of
+    # going through the dictionary based constructor.
+    tour = Tour.__new__(Tour)
+    tour.id = header['id']
+    tour.type = header['type']
+    tour.source = header['source']
+    tour.start_date = header['start_date']
+    tour.changed_at = header['changed_at']
+    tour.name = header['name']
+    tour.kcal_active = header['kcal_active']
+    tour.kcal_resting = header['kcal_resting']
+    tour.start_point = Coordinate(
+        lat=header['start_lat'],
+        lon=header['start_lon'],
+        alt=header['start_alt'],
+        time=None,
+    )
+    tour.distance = header['distance']
+    tour.total_duration = header['total_duration']
+    tour.elevation_up = header['elevation_up']
+    tour.elevation_down = header['elevation_down']
+    tour.sport = header['sport']
+    tour.time_in_motion = header['time_in_motion']
+    tour.constitution = header['constitution']
+    tour.query = header['query']
+    if header['flags'] & _HAS_SMART_TOUR_TYPE:
+        tour.smart_tour_type = header['smart_tour_type']
+    tour.poor_quality = header['poor_quality']
+    tour.master_share_url = header['master_share_url']
+
+    grade, technical_explanation, fitness_explanation = reader.unpack(_DIFFICULTY)
+    tour.difficulty = None if grade == _NONE else Difficulty(
+        grade=reader.string(grade),
+        technical_explanation=reader.string(technical_explanation),
+        fitness_explanation=reader.string(fitness_explanation),
+    )
+
+    image_url, client_hash, attribution, attribution_url, media_type, templated = reader.unpack(_IMAGE)
+    tour.vector_map_image = None if image_url == _NONE else KomootImage(
+        image_url=reader.string(image_url),
+        templated=None if templated == 2 else bool(templated),
+        client_hash=reader.string(client_hash),
+        attribution=reader.string(attribution),
+        attribution_url=reader.string(attribution_url),
+        media_type=reader.string(media_type),
+    )
+
+    (links,) = reader.unpack(_COUNT)
+    tour.links_dict = None if links == _NONE else loads(reader.string(links))
+    if header['flags'] & _HAS_COORDINATES_LINK:
+        tour.coordinates_link = header['coordinates_link']
+
+    tour.path = None
+    count = reader.count()
+    if count is not None:
+        lats = reader.doubles_column(count)
+        lons = reader.doubles_column(count)
+        indices = reader.ints_column(count)
+        end_indices = reader.ints_column(count)
+        references = reader.strings_column(count)
+        tour.path = [
+            Waypoint(
+                location=Coordinate(lat=lat, lon=lon),
+                index=index,
+                end_index=None if end_index == -1 else end_index,
+                reference=reference,
+            ) for lat, lon, index, end_index, reference in zip(lats, lons, indices, end_indices, references)
+        ]
+
+    tour.segments = None
+    count = reader.count()
+    if count is not None:
+        segment_types = reader.strings_column(count)
+        starts = reader.ints_column(count)
+        ends = reader.ints_column(count)
+        references = reader.strings_column(count)
+        tour.segments = [
+            Segment(
+                segment_type=segment_type,
+                segment_boundaries=SegmentInformation(start_index_point=start, end_index_point=end),
+                reference=reference,
+            ) for segment_type, start, end, reference in zip(segment_types, starts, ends, references)
+        ]
+
+    tour.tour_information = None
+    count = reader.count()
+    if count is not None:
+        tour.tour_information = []
+        for _ in range(count):
+            (information_type,) = reader.unpack(_COUNT)
+            segment_count = reader.count()
+            starts = reader.ints_column(segment_count)
+            ends = reader.ints_column(segment_count)
+            tour.tour_information.append(
+                TourInformation(
+                    tour_information_type=reader.string(information_type),
+                    segments=[
+                        SegmentInformation(start_index_point=start, end_index_point=end)
+                        for start, end in zip(starts, ends)
+                    ],
+                )
+            )
+
+    tour.summary = None
+    count = reader.count()
+    if count is not None:
+        surface_types = reader.strings_column(count)
+        surface_amounts = reader.doubles_column(count)
+        way_type_count = reader.count()
+        way_types = reader.strings_column(way_type_count)
+        way_type_amounts = reader.doubles_column(way_type_count)
+        tour.summary = TourSummary(
+            surfaces=[
+                Surface(surface_type=surface_type, amount=amount)
+                for surface_type, amount in zip(surface_types, surface_amounts)
+            ],
+            way_types=[
+                WayType(way_type=way_type, amount=amount)
+                for way_type, amount in zip(way_types, way_type_amounts)
+            ],
+        )
+
+    if reader.offset != header['coordinates_offset']:
+        raise TourCodecError('corrupted body')
+    tour.coordinates = _unchecked_coordinates(_read_coordinates(reader=reader, count=header['coordinates_count']))
+    tour.gpx_track = None
+    tour.gpx_columns = None
+    return tour
@@ -0,0 +1,71 @@
+"""
+Parsing of tour listings into Tour objects, optionally spread over a pool of processes.
+
+The listing is split into chunks which are parsed by the workers and sent back as pickled Tour objects: unpickling a
+Tour is about ten times cheaper than parsing it, so the parent process only merges the chunks, in order.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from kompy.log import get_logger
+from kompy.tour import Tour
+
+logger = get_logger('KomootTourParsing')
+
+DEFAULT_CHUNK_SIZE = 256
+
+ParseFailure = Tuple[str, str]
+
+
+def _parse_chunk(tour_dicts: List[Dict[str, Any]]) -> Tuple[List[Tour], List[ParseFailure]]:
+    """
+    Parse tours, skipping the ones that cannot be parsed.
+    :param tour_dicts: The tours, as returned by the API.
+    :return: The parsed tours, and the id and error of each tour that could not be parsed.
+    """
+    tours = []
+    failures = []
+    for tour_dict in tour_dicts:
+        try:
+            tours.append(Tour(tour_dict))
+        except (KeyError, TypeError, ValueError) as e:
+            tour_id = tour_dict.get('id', 'unknown') if isinstance(tour_dict, dict) else 'unknown'
+            failures.append((tour_id, str(e)))
+            logger.exception(f'Failed to parse tour {tour_id}: {e}')
+    return tours, failures
+
+
+def parse_tours(
+    tour_dicts: List[Dict[str, Any]],
+    processes: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Tuple[List[Tour], List[ParseFailure]]:
+    """
+    Parse tours, skipping the ones that cannot be parsed.
+    :param tour_dicts: The tours, as returned by the API.
+    :param processes: The number of worker processes. If not provided or 1, the tours are parsed in the current
+    process.
+    :param chunk_size: The number of tours sent to a worker at once.
+    :return: The parsed tours, in the order of the listing, and the id and error of each tour that could not be parsed.
+    """
+    if processes is not None and processes < 1:
+        raise ValueError(f'Invalid number of processes provided: {processes}. Please provide a positive number.')
+    if chunk_size < 1:
+        raise ValueError(f'Invalid chunk size provided: {chunk_size}. Please provide a positive number of tours.')
+    if processes is None or processes == 1 or len(tour_dicts) <= chunk_size:
+        return _parse_chunk(tour_dicts)
+
+    tours = []
+    failures = []
+    chunks = [tour_dicts[start:start + chunk_size] for start in range(0, len(tour_dicts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for chunk_tours, chunk_failures in executor.map(_parse_chunk, chunks):
+            tours.extend(chunk_tours)
+            failures.extend(chunk_failures)
+    return tours, failures
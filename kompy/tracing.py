@@ -0,0 +1,213 @@
+"""
+Hierarchical timing spans of the connector operations, exported as Chrome traces.
+
+The connector records its spans in a Tracer, passed with `KomootConnector(..., tracer=tracer)`: one span per operation
+(e.g. `get_tours`), containing the spans of its pages, requests and parsing. Without a tracer, nothing is recorded.
+The spans can be written as a Chrome trace, to be opened in chrome://tracing, https://ui.perfetto.dev or speedscope:
+
+    tracer = Tracer()
+    connector = KomootConnector(email=email, password=password, tracer=tracer)
+    connector.hydrate(tours=connector.get_tours(user_identifier=user))
+    tracer.write_chrome_trace('sync.json')
+
+Spans opened in the threads of `KomootConnector.hydrate` are attached to the span of the hydration. Spans can also be
+opened around the code calling the connector, with `tracer.span(...)`.
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+Function = TypeVar('Function', bound=Callable)
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('kompy_current_span', default=None)
+
+
+class Span:
+    def __init__(
+        self,
+        span_id: int,
+        name: str,
+        category: str,
+        start: int,
+        parent: Optional['Span'] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Timed step of an operation.
+        :param span_id: The identifier of the span, unique within its tracer.
+        :param name: The name of the span.
+        :param category: The category of the span, e.g. 'operation', 'http' or 'parse'.
+        :param start: The start of the span, in nanoseconds of `time.perf_counter_ns`.
+        :param parent: The span containing this span, if any.
+        :param attributes: The attributes of the span, shown in the trace viewers.
+        """
+        self.span_id = span_id
+        self.name = name
+        self.category = category
+        self.start = start
+        self.end: Optional[int] = None
+        self.parent = parent
+        self.attributes = attributes or {}
+        self.thread_id = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+
+    @property
+    def duration(self) -> Optional[float]:
+        """
+        The duration of the span, in seconds, None while the span is open.
+        """
+        return None if self.end is None else (self.end - self.start) / 1e9
+
+    def __repr__(self) -> str:
+        return f'Span(name={self.name!r}, category={self.category!r}, duration={self.duration})'
+
+
+class Tracer:
+    def __init__(self):
+        """
+        Recorder of the spans of the connector operations.
+        """
+        self.spans: List[Span] = []
+        self.origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def _new_span(self, name: str, category: str, start: int, attributes: Dict[str, Any]) -> Span:
+        with self._lock:
+            self._next_id += 1
+            span = Span(span_id=self._next_id, name=name, category=category, start=start,
+                        parent=_current_span.get(), attributes=attributes)
+            self.spans.append(span)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = 'operation', **attributes) -> Iterator[Span]:
+        """
+        Record a span around a block of code. The spans opened within the block are its children.
+        :param name: The name of the span.
+        :param category: The category of the span.
+        :param attributes: The attributes of the span, more can be added to `span.attributes` within the block.
+        :return: A context manager yielding the span.
+        """
+        span = self._new_span(name=name, category=category, start=time.perf_counter_ns(), attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes['error'] = repr(e)
+            raise
+        finally:
+            span.end = time.perf_counter_ns()
+            _current_span.reset(token)
+
+    def add_span(self, name: str, duration: float, category: str = 'operation', **attributes) -> Span:
+        """
+        Record a span that just ended, e.g. a request timed by another library, as a child of the current span.
+        :param name: The name of the span.
+        :param duration: The duration of the span, in seconds.
+        :param category: The category of the span.
+        :param attributes: The attributes of the span.
+        :return: The span.
+        """
+        end = time.perf_counter_ns()
+        span = self._new_span(name=name, category=category, start=end - int(duration * 1e9), attributes=attributes)
+        span.end = end
+        return span
+
+    def clear(self) -> None:
+        """
+        Discard all the spans.
+        """
+        with self._lock:
+            self.spans = []
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Export the finished spans in the Chrome trace event format, as complete events.
+        :return: The trace document.
+        """
+        pid = os.getpid()
+        events = []
+        thread_names = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if span.end is None:
+                continue
+            thread_names[span.thread_id] = span.thread_name
+            args = {key: value if isinstance(value, (bool, int, float, str)) else str(value)
+                    for key, value in span.attributes.items()}
+            args['span_id'] = span.span_id
+            if span.parent is not None:
+                args['parent_id'] = span.parent.span_id
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': (span.start - self.origin) / 1e3,
+                'dur': (span.end - span.start) / 1e3,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': args,
+            })
+        events.extend(
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id, 'args': {'name': thread_name}}
+            for thread_id, thread_name in thread_names.items()
+        )
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Write the finished spans to a Chrome trace file.
+        :param path: The path of the file.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+def maybe_span(tracer: Optional[Tracer], name: str, category: str = 'operation', **attributes) -> ContextManager:
+    """
+    Record a span with a tracer, if any.
+    :param tracer: The tracer, optional.
+    :param name: The name of the span.
+    :param category: The category of the span.
+    :param attributes: The attributes of the span.
+    :return: A context manager yielding the span, or None without tracer.
+    """
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.span(name, category, **attributes)
+
+
+def traced(operation: str) -> Callable[[Function], Function]:
+    """
+    Decorate a method to record a span around each call, with the tracer stored in the `tracer` attribute of its
+    object. Nothing is recorded when the attribute is None.
+    :param operation: The name of the span.
+    :return: The decorator.
+    """
+    def decorator(method: Function) -> Function:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            tracer: Optional[Tracer] = self.tracer
+            if tracer is None:
+                return method(self, *args, **kwargs)
+            with tracer.span(operation):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
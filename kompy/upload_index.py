@@ -0,0 +1,250 @@
+"""
+Local index of the tours already on Komoot, to skip duplicate uploads before sending any byte.
+
+Two fingerprints identify a tour:
+
+- the content fingerprint, the SHA-256 of a GPX or FIT file, recorded for each uploaded file
+- the track fingerprint, the number of points of the track and a sample of its points rounded to 1e-5 degrees (about
+  a meter), recorded for uploaded files and for existing tours, so that the same track exported in another format or
+  already recorded on Komoot is found too. Formats store coordinates with different precisions, e.g. FIT files in
+  semicircles, so track fingerprints match when their coordinates differ by at most one rounding step
+
+The index is kept in a text file, one tab-separated entry per line, only ever appended to. The content fingerprint of
+a file is cached with its size and modification time, so files that did not change since they were indexed are not
+read again: re-running an import over a folder only costs a `stat` per file.
+"""
+import hashlib
+import math
+import os
+import threading
+from typing import (
+    IO,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from kompy.coordinate_array import CoordinateArray
+from kompy.fit_reader import read_fit_records
+from kompy.gpx_reader import read_gpx
+from kompy.log import get_logger
+from kompy.tour import Tour
+
+logger = get_logger('KomootUploadIndex')
+
+TRACK_PRECISION = 1e5
+SIGNATURE_POINTS = 16
+
+_CONTENT = 'content'
+_TRACK = 'track'
+_FILE = 'file'
+
+
+def content_fingerprint(data: bytes) -> str:
+    """
+    Fingerprint the content of a file.
+    :param data: The content of the file.
+    :return: The SHA-256 of the content, as hexadecimal.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def track_fingerprint(lat: Iterable[float], lon: Iterable[float]) -> Optional[str]:
+    """
+    Fingerprint a track, independently of the format it is stored in.
+    :param lat: The latitudes of the points.
+    :param lon: The longitudes of the points.
+    :return: The number of points of the track followed by SIGNATURE_POINTS of its points, evenly spaced and rounded
+    to 1 / TRACK_PRECISION degrees, or None if the track has less than two points. Points without coordinates are
+    skipped.
+    """
+    points = [(point_lat, point_lon) for point_lat, point_lon in zip(lat, lon)
+              if not math.isnan(point_lat) and not math.isnan(point_lon)]
+    if len(points) < 2:
+        return None
+    samples = min(SIGNATURE_POINTS, len(points))
+    step = (len(points) - 1) / (samples - 1)
+    sampled = (points[round(sample * step)] for sample in range(samples))
+    values = ','.join(f'{round(point_lat * TRACK_PRECISION)},{round(point_lon * TRACK_PRECISION)}'
+                      for point_lat, point_lon in sampled)
+    return f'{len(points)}:{values}'
+
+
+def _track_key(fingerprint: str) -> Tuple[str, Tuple[int, ...]]:
+    """
+    Split a track fingerprint.
+    :param fingerprint: The track fingerprint.
+    :return: The number of points and the rounded coordinates of the sampled points.
+    """
+    count, _, values = fingerprint.partition(':')
+    return count, tuple(int(value) for value in values.split(',') if value)
+
+
+def file_track_fingerprint(data: bytes) -> Optional[str]:
+    """
+    Fingerprint the track of a GPX or FIT file.
+    :param data: The content of the file.
+    :return: The track fingerprint, or None if the file cannot be read or has no track.
+    """
+    try:
+        if data[8:12] == b'.FIT':
+            track = read_fit_records(data)
+        else:
+            track = read_gpx(data)
+    except ValueError as e:
+        logger.warning(f'Could not read the track of a file: {e}')
+        return None
+    return track_fingerprint(lat=track.lat, lon=track.lon)
+
+
+def tour_track_fingerprint(tour: Tour) -> Optional[str]:
+    """
+    Fingerprint the track of a tour from its coordinates, which must have been fetched, e.g. with
+    KomootConnector.hydrate.
+    :param tour: The tour.
+    :return: The track fingerprint, or None if the tour has no coordinates.
+    """
+    coordinates = tour.coordinates
+    if isinstance(coordinates, CoordinateArray):
+        return track_fingerprint(lat=coordinates.lat, lon=coordinates.lon)
+    return track_fingerprint(lat=[c.lat for c in coordinates], lon=[c.lon for c in coordinates])
+
+
+class UploadIndex:
+    def __init__(self, path: Optional[Union[str, os.PathLike]] = None):
+        """
+        Index of the fingerprints of the tours already on Komoot.
+        :param path: The file the index is kept in, created if it does not exist, optional. If not provided, the index
+        is only kept in memory.
+        """
+        self.path = path
+        self._contents: Dict[str, str] = {}
+        self._tracks: Dict[str, str] = {}
+        # Track fingerprints by number of points, for the matches within the rounding tolerance.
+        self._track_buckets: Dict[str, List[Tuple[Tuple[int, ...], str]]] = {}
+        self._files: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+        if path is not None:
+            if os.path.exists(path):
+                self._load(path)
+            self._file = open(path, 'a', encoding='utf-8')
+
+    def _load(self, path: Union[str, os.PathLike]) -> None:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                fields = line.rstrip('\n').split('\t')
+                if fields[0] == _CONTENT and len(fields) == 3:
+                    self._contents[fields[1]] = fields[2]
+                elif fields[0] == _TRACK and len(fields) == 3:
+                    self._add_track(fields[1], fields[2])
+                elif fields[0] == _FILE and len(fields) == 5:
+                    self._files[fields[4]] = (int(fields[1]), int(fields[2]), fields[3])
+                else:
+                    # A line cut short by an interrupted write is ignored.
+                    logger.warning(f'Ignoring an invalid entry of the upload index: {line!r}')
+
+    def _add_track(self, track: str, tour_id: str) -> None:
+        if track not in self._tracks:
+            count, values = _track_key(track)
+            self._track_buckets.setdefault(count, []).append((values, track))
+        self._tracks[track] = tour_id
+
+    def _find_track(self, track: str) -> Optional[str]:
+        if track in self._tracks:
+            return self._tracks[track]
+        count, values = _track_key(track)
+        for candidate, fingerprint in self._track_buckets.get(count, ()):
+            if len(candidate) == len(values) and all(abs(a - b) <= 1 for a, b in zip(candidate, values)):
+                return self._tracks[fingerprint]
+        return None
+
+    def _append(self, *fields: Union[str, int]) -> None:
+        if self._file is not None:
+            self._file.write('\t'.join(str(field) for field in fields) + '\n')
+            self._file.flush()
+
+    def __len__(self) -> int:
+        return len(set(self._contents.values()) | set(self._tracks.values()))
+
+    def file_fingerprint(self, path: Union[str, os.PathLike]) -> str:
+        """
+        Get the content fingerprint of a file, only reading it if it changed since it was last fingerprinted.
+        :param path: The path of the file.
+        :return: The content fingerprint.
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        with self._lock:
+            cached = self._files.get(key)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        with open(key, 'rb') as f:
+            fingerprint = content_fingerprint(f.read())
+        with self._lock:
+            self._files[key] = (stat.st_size, stat.st_mtime_ns, fingerprint)
+            # Paths which cannot be stored in a line of the index are only cached in memory.
+            if '\t' not in key and '\n' not in key:
+                self._append(_FILE, stat.st_size, stat.st_mtime_ns, fingerprint, key)
+        return fingerprint
+
+    def find(self, content: Optional[str] = None, track: Optional[str] = None) -> Optional[str]:
+        """
+        Find a tour by its fingerprints.
+        :param content: The content fingerprint, optional.
+        :param track: The track fingerprint, optional.
+        :return: The id of the tour matching any of the fingerprints, or None if there is none.
+        """
+        with self._lock:
+            if content is not None and content in self._contents:
+                return self._contents[content]
+            if track is not None:
+                return self._find_track(track)
+        return None
+
+    def add(self, tour_id: Union[str, int], content: Optional[str] = None, track: Optional[str] = None) -> None:
+        """
+        Record the fingerprints of a tour.
+        :param tour_id: The id of the tour.
+        :param content: The content fingerprint of the file it was uploaded from, optional.
+        :param track: The track fingerprint, optional.
+        """
+        tour_id = str(tour_id)
+        with self._lock:
+            if content is not None and self._contents.get(content) != tour_id:
+                self._contents[content] = tour_id
+                self._append(_CONTENT, content, tour_id)
+            if track is not None and self._tracks.get(track) != tour_id:
+                self._add_track(track, tour_id)
+                self._append(_TRACK, track, tour_id)
+
+    def add_tours(self, tours: Iterable[Tour]) -> int:
+        """
+        Record the track fingerprints of existing tours, whose coordinates must have been fetched.
+        :param tours: The tours.
+        :return: The number of tours recorded, the tours without coordinates are skipped.
+        """
+        added = 0
+        for tour in tours:
+            track = tour_track_fingerprint(tour)
+            if track is not None:
+                self.add(tour_id=tour.id, track=track)
+                added += 1
+        return added
+
+    def __enter__(self) -> 'UploadIndex':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the file of the index.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,35 @@
+from fit_tool.fit_file_builder import FitFileBuilder
+from fit_tool.profile.messages.file_id_message import FileIdMessage
+from fit_tool.profile.messages.record_message import RecordMessage
+from fit_tool.profile.profile_type import (
+    FileType,
+    Manufacturer,
+)
+
+
+def fit_file_builder(records: int) -> bytes:
+    """
+    Build an activity FIT file with record messages.
+    :param records: the number of record messages
+    :return: the content of the FIT file
+    """
+    builder = FitFileBuilder(auto_define=True)
+    file_id = FileIdMessage()
+    file_id.type = FileType.ACTIVITY
+    file_id.manufacturer = Manufacturer.DEVELOPMENT.value
+    file_id.product = 0
+    file_id.time_created = 1700000000000
+    file_id.serial_number = 0x12345678
+    builder.add(file_id)
+    for i in range(records):
+        record = RecordMessage()
+        record.timestamp = 1700000000000 + i * 1000
+        record.position_lat = 44.2 + i * 1e-4
+        record.position_long = 7.3
+        record.altitude = 900 + i % 500
+        record.heart_rate = 120 + i % 60
+        if i % 2:
+            record.power = 200
+        record.cadence = 80
+        builder.add(record)
+    return builder.build().to_bytes()
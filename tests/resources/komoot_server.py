@@ -0,0 +1,437 @@
+"""
+Local stand-in for the Komoot API, used by the end-to-end tests and the benchmarks of the connector without network
+access.
+
+It implements the endpoints used by kompy (login, tour list with pagination, tour detail, coordinates, GPX and FIT
+exports, upload, change and delete) over HTTP/1.1 with keep-alive, with a configurable dataset size, latency and error
+rate. While the server runs, `KomootUrl` points to it, so the connector and the tours talk to it instead of
+api.komoot.de. As `KomootUrl` is global, a single server runs at a time in a process:
+
+    with KomootServer(ServerConfig(tours=500, latency=0.02)) as server:
+        connector = KomootConnector(email=server.config.email, password=server.config.password)
+        tours = connector.get_tours(user_identifier=server.config.username)
+"""
+import base64
+import gzip
+import json
+import math
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+from typing import (
+    Any,
+    Dict,
+    Optional,
+    Tuple,
+)
+from urllib.parse import (
+    parse_qs,
+    urlsplit,
+)
+
+from kompy.constants.urls import KomootUrl
+from kompy.coordinate_array import CoordinateArray
+from tests.resources.synthetic_data import (
+    FIRST_TOUR_ID,
+    SyntheticAccount,
+)
+
+# Held by the running server, which `KomootUrl` points to.
+_running = threading.Lock()
+# Responses smaller than this are sent uncompressed.
+_MIN_COMPRESSED_SIZE = 256
+
+
+class ServerConfig:
+    def __init__(
+        self,
+        tours: int = 200,
+        points: int = 2000,
+        point_spread: float = 0.0,
+        page_size: int = 50,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        tail_rate: float = 0.0,
+        tail_latency: float = 0.0,
+        error_rate: float = 0.0,
+        compression: bool = False,
+        seed: int = 0,
+        email: str = 'bench@example.com',
+        password: str = 'password',
+        username: str = '1234567890',
+    ):
+        """
+        Configuration of the stand-in server.
+        :param tours: The number of tours of the account.
+        :param points: The average number of points of the tracks.
+        :param point_spread: The relative variation of the number of points between tracks, 0 for tracks of the
+        same length.
+        :param page_size: The number of tours per page of the tour list.
+        :param latency: The delay added to each response, in seconds.
+        :param jitter: The maximum random delay added to the latency, in seconds.
+        :param tail_rate: The probability of answering a request slowly, to model the tail latency.
+        :param tail_latency: The delay added to the slow responses, in seconds.
+        :param error_rate: The probability of answering a request with a 500 error.
+        :param compression: Whether to gzip the bodies of the responses when the client accepts it. Compressed request
+        bodies are accepted either way.
+        :param seed: The seed of the synthetic account and of the random generator used for the jitter and the
+        errors.
+        :param email: The email address accepted by the login endpoint.
+        :param password: The password accepted by the login endpoint.
+        :param username: The user identifier of the account.
+        """
+        if not 0 <= error_rate <= 1:
+            raise ValueError(f'Invalid error rate provided: {error_rate}. Please provide a probability.')
+        if not 0 <= tail_rate <= 1:
+            raise ValueError(f'Invalid tail rate provided: {tail_rate}. Please provide a probability.')
+        self.tours = tours
+        self.points = points
+        self.point_spread = point_spread
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.compression = compression
+        self.seed = seed
+        self.email = email
+        self.password = password
+        self.username = username
+
+
+class StandInDataset:
+    def __init__(self, config: ServerConfig, base_url: str):
+        """
+        Deterministic dataset served by the stand-in server, generated by a synthetic account.
+        :param config: The configuration of the server.
+        :param base_url: The url of the server, used in the links of the documents.
+        """
+        self.config = config
+        self.base_url = base_url
+        self.account = SyntheticAccount(
+            tours=config.tours,
+            points=config.points,
+            spread=config.point_spread,
+            seed=config.seed,
+            username=config.username,
+            base_url=base_url,
+        )
+        self.tour_ids = [self.account.tour_id(index) for index in range(config.tours)]
+        self.deleted = set()
+        self.changes: Dict[str, Dict[str, Any]] = {}
+        self.uploads = 0
+        self._lock = threading.Lock()
+
+    def _apply_changes(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        document.update(self.changes.get(document['id'], {}))
+        return document
+
+    def exists(self, tour_id: str) -> bool:
+        """
+        Check whether a tour exists.
+        :param tour_id: The id of the tour.
+        :return: Whether the tour exists and was not deleted.
+        """
+        return self.account.tour_index(tour_id) >= 0 and tour_id not in self.deleted
+
+    def page(self, page: int, limit: Optional[int]) -> Dict[str, Any]:
+        """
+        Get a page of the tour list.
+        :param page: The number of the page.
+        :param limit: The size of the page, the configured page size if not provided.
+        :return: The page document.
+        """
+        size = limit or self.config.page_size
+        if not self.deleted:
+            document = self.account.page(page=page, size=size)
+            for tour in document['_embedded']['tours']:
+                self._apply_changes(tour)
+            return document
+        tour_ids = [tour_id for tour_id in self.tour_ids if tour_id not in self.deleted]
+        tours = [
+            self._apply_changes(self.account.summary(self.account.tour_index(tour_id)))
+            for tour_id in tour_ids[page * size:(page + 1) * size]
+        ]
+        return {
+            '_embedded': {'tours': tours},
+            'page': {
+                'size': size,
+                'totalElements': len(tour_ids),
+                'totalPages': max(1, math.ceil(len(tour_ids) / size)),
+                'number': page,
+            },
+        }
+
+    def detail(self, tour_id: str) -> Dict[str, Any]:
+        """
+        Get the detail document of a tour.
+        :param tour_id: The id of the tour.
+        :return: The tour document.
+        """
+        return self._apply_changes(self.account.detail(self.account.tour_index(tour_id)))
+
+    def track(self, tour_id: str) -> CoordinateArray:
+        """
+        Get the track of a tour.
+        :param tour_id: The id of the tour.
+        :return: The track.
+        """
+        return self.account.track(self.account.tour_index(tour_id))
+
+    def coordinates(self, tour_id: str) -> bytes:
+        """
+        Get the coordinates document of a tour.
+        :param tour_id: The id of the tour.
+        :return: The encoded document.
+        """
+        return _encoded_export(self.account, 'coordinates_document', self.account.tour_index(tour_id))
+
+    def gpx(self, tour_id: str) -> bytes:
+        """
+        Get the GPX export of a tour.
+        :param tour_id: The id of the tour.
+        :return: The GPX document.
+        """
+        return _encoded_export(self.account, 'gpx', self.account.tour_index(tour_id))
+
+    def fit(self, tour_id: str) -> bytes:
+        """
+        Get the FIT export of a tour.
+        :param tour_id: The id of the tour.
+        :return: The FIT file.
+        """
+        return _encoded_export(self.account, 'fit', self.account.tour_index(tour_id))
+
+
+@lru_cache(maxsize=64)
+def _encoded_export(account: SyntheticAccount, export: str, index: int) -> bytes:
+    return getattr(account, export)(index)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately: without TCP_NODELAY, responses on kept-alive connections stall on
+    # delayed acknowledgements.
+    disable_nagle_algorithm = True
+    server: '_Server'
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.stand_in.count_connection()
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes = b'', content_type: str = 'application/hal+json') -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        accepted = {encoding.strip() for encoding in self.headers.get('Accept-Encoding', '').split(',')}
+        if self.server.stand_in.config.compression and 'gzip' in accepted and len(body) >= _MIN_COMPRESSED_SIZE:
+            body = gzip.compress(body, compresslevel=5)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, document: Any) -> None:
+        self._send(status, json.dumps(document).encode('utf-8'))
+
+    def _read_body(self) -> bytes:
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.stand_in.count_bytes_received(len(body))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            return gzip.decompress(body)
+        return body
+
+    def _prepare(self) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Apply the latency and the errors, and check the credentials.
+        :return: The path and query of the request, or None if a response was already sent.
+        """
+        stand_in: KomootServer = self.server.stand_in
+        stand_in.count_request()
+        config = stand_in.config
+        delay, failed = stand_in.draw()
+        if delay:
+            time.sleep(delay)
+        if failed:
+            self._read_body()
+            self._send_json(500, {'error': 'InternalServerError'})
+            return None
+        expected = base64.b64encode(f'{config.email}:{config.password}'.encode()).decode()
+        if self.headers.get('Authorization') != f'Basic {expected}':
+            self._read_body()
+            self._send_json(403, {'error': 'Forbidden'})
+            return None
+        parts = urlsplit(self.path)
+        return parts.path, {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+    def do_GET(self) -> None:
+        prepared = self._prepare()
+        if prepared is None:
+            return
+        path, query = prepared
+        dataset = self.server.stand_in.dataset
+        config = self.server.stand_in.config
+        if re.fullmatch(r'/v006/account/email/[^/]+/', path):
+            self._send_json(200, {'username': config.username, 'password': 'token', 'user': {}})
+            return
+        match = re.fullmatch(r'/v007/users/([^/]+)/tours/', path)
+        if match:
+            limit = int(query['limit']) if 'limit' in query else None
+            self._send_json(200, dataset.page(page=int(query.get('page', 0)), limit=limit))
+            return
+        match = re.fullmatch(r'/v007/tours/(\d+)(\.gpx|\.fit|/coordinates)?', path)
+        if match is None or not dataset.exists(match.group(1)):
+            self._send_json(404, {'error': 'NotFound'})
+            return
+        tour_id, suffix = match.groups()
+        if suffix is None:
+            self._send_json(200, dataset.detail(tour_id))
+        elif suffix == '/coordinates':
+            self._send(200, dataset.coordinates(tour_id))
+        elif suffix == '.gpx':
+            self._send(200, dataset.gpx(tour_id), content_type='application/gpx+xml')
+        else:
+            self._send(200, dataset.fit(tour_id), content_type='application/vnd.ant.fit')
+
+    def do_POST(self) -> None:
+        prepared = self._prepare()
+        if prepared is None:
+            return
+        path, query = prepared
+        body = self._read_body()
+        if path != '/v007/tours/' or query.get('data_type') not in ('gpx', 'fit') or not body:
+            self._send_json(400, {'error': 'BadRequest'})
+            return
+        dataset = self.server.stand_in.dataset
+        with dataset._lock:
+            dataset.uploads += 1
+            tour_id = FIRST_TOUR_ID + dataset.config.tours + dataset.uploads
+        self._send_json(201, {'id': tour_id})
+
+    def do_PATCH(self) -> None:
+        prepared = self._prepare()
+        if prepared is None:
+            return
+        path, _ = prepared
+        changes = json.loads(self._read_body() or b'{}')
+        match = re.fullmatch(r'/v007/tours/(\d+)', path)
+        dataset = self.server.stand_in.dataset
+        if match is None or not dataset.exists(match.group(1)):
+            self._send_json(404, {'error': 'NotFound'})
+            return
+        with dataset._lock:
+            dataset.changes.setdefault(match.group(1), {}).update(
+                {key: value for key, value in changes.items() if value is not None}
+            )
+        self._send_json(200, dataset.detail(match.group(1)))
+
+    def do_DELETE(self) -> None:
+        prepared = self._prepare()
+        if prepared is None:
+            return
+        path, _ = prepared
+        match = re.fullmatch(r'/v007/tours/(\d+)', path)
+        dataset = self.server.stand_in.dataset
+        if match is None or not dataset.exists(match.group(1)):
+            self._send_json(404, {'error': 'NotFound'})
+            return
+        with dataset._lock:
+            dataset.deleted.add(match.group(1))
+        self._send_json(200, {'id': match.group(1)})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    stand_in: 'KomootServer'
+
+
+class KomootServer:
+    def __init__(self, config: Optional[ServerConfig] = None, host: str = '127.0.0.1', port: int = 0):
+        """
+        Local stand-in for the Komoot API.
+        :param config: The configuration of the server, the default configuration if not provided.
+        :param host: The interface the server listens on.
+        :param port: The port the server listens on, a free port if 0.
+        """
+        self.config = config or ServerConfig()
+        self._server = _Server((host, port), _Handler)
+        self._server.stand_in = self
+        self.url = f'http://{host}:{self._server.server_address[1]}'
+        self.dataset = StandInDataset(config=self.config, base_url=self.url)
+        self.requests = 0
+        self.connections = 0
+        self.bytes_received = 0
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._original_urls: Dict[str, str] = {}
+        self._running = False
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def count_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def count_bytes_received(self, size: int) -> None:
+        with self._lock:
+            self.bytes_received += size
+
+    def draw(self) -> Tuple[float, bool]:
+        """
+        Draw the delay and the failure of a request.
+        :return: The delay, in seconds, and whether the request fails.
+        """
+        with self._lock:
+            jitter = self._random.uniform(0, self.config.jitter) if self.config.jitter else 0.0
+            if self.config.tail_rate and self._random.random() < self.config.tail_rate:
+                jitter += self.config.tail_latency
+            failed = self._random.random() < self.config.error_rate if self.config.error_rate else False
+        return self.config.latency + jitter, failed
+
+    def start(self) -> None:
+        """
+        Start serving in a background thread and point `KomootUrl` to the server.
+        """
+        if not _running.acquire(blocking=False):
+            raise RuntimeError('Another stand-in server is running, KomootUrl can only point to one server.')
+        self._running = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        for name in ('USER_LOGIN_URL', 'LIST_TOURS_URL', 'TOUR_URL', 'UPLOAD_TOUR_URL'):
+            self._original_urls[name] = getattr(KomootUrl, name)
+            setattr(KomootUrl, name, getattr(KomootUrl, name).replace('https://api.komoot.de', self.url))
+
+    def stop(self) -> None:
+        """
+        Stop the server and restore `KomootUrl`.
+        """
+        for name, url in self._original_urls.items():
+            setattr(KomootUrl, name, url)
+        self._original_urls.clear()
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self._running:
+            self._running = False
+            _running.release()
+
+    def __enter__(self) -> 'KomootServer':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
@@ -0,0 +1,466 @@
+"""
+Synthetic large-account data generator for scale testing.
+
+Every document is derived on demand from the seed of the account and the index of the tour, so an account of 100,000
+tours and 100 million points takes no memory and no disk until it is used, and the same tour is always generated the
+same way. The generator produces:
+
+- tour list pages and tour detail documents (with path, segments, tour information, summary and difficulty), valid
+  against the Tour, Segment, Surface and WayType validators
+- tracks as CoordinateArray, and the matching coordinates endpoint documents, GPX documents and FIT files
+
+Each track is a loop around the start point of the tour, so the waypoints of the path can be computed without
+generating the track first. The account can also be written to disk, the tracks going to a coordinate archive:
+
+    python -m tests.resources.synthetic_data --tours 100000 --points 1000 --output /tmp/account
+"""
+import argparse
+import io
+import json
+import os
+import time
+import math
+import random
+import struct
+from array import array
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+)
+
+from kompy.constants.difficulty_grade import DifficultyGrade
+from kompy.constants.segment_type import SegmentType
+from kompy.constants.tour_constants import TourTypes
+from kompy.coordinate_archive import CoordinateArchive
+from kompy.coordinate_array import CoordinateArray
+from kompy.gpx_writer import write_gpx
+
+FIRST_TOUR_ID = 1_000_000_000
+
+_EARTH_RADIUS = 6_371_000.0
+_START_DATE = datetime(2020, 1, 1, 7, 0, tzinfo=timezone.utc)
+# sport, speed in meters per second, surface prefix
+_SPORTS = (
+    ('hike', 1.2, 'sf'),
+    ('jogging', 2.8, 'sf'),
+    ('touringbicycle', 5.5, 'sb'),
+    ('racebike', 8.0, 'sb'),
+    ('mtb', 4.5, 'sm'),
+    ('mtb_easy', 5.0, 'sm'),
+)
+_SURFACES = ('asphalt', 'paved', 'compacted', 'gravel', 'unpaved', 'ground', 'unknown')
+_WAY_TYPES = ('wt#street', 'wt#minor_road', 'wt#way', 'wt#track', 'wt#cycleway', 'wt#hiking_path', 'wt#trail')
+_WAYPOINTS = 8
+
+_FIT_EPOCH_OFFSET = 631065600
+_FIT_CRC_TABLE = (
+    0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+    0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400,
+)
+
+
+def _fit_crc_byte_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        crc = 0
+        for nibble in (byte & 0x0F, byte >> 4):
+            crc = ((crc >> 4) & 0x0FFF) ^ _FIT_CRC_TABLE[crc & 0x0F] ^ _FIT_CRC_TABLE[nibble]
+        table.append(crc)
+    return table
+
+
+_FIT_CRC_BYTES = _fit_crc_byte_table()
+
+
+def fit_crc(data: bytes, crc: int = 0) -> int:
+    """
+    Compute the CRC of FIT data (CRC-16/ARC).
+    :param data: The data.
+    :param crc: The CRC of the preceding data.
+    :return: The CRC.
+    """
+    table = _FIT_CRC_BYTES
+    for byte in data:
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc
+
+
+class _TourParameters:
+    def __init__(self, account: 'SyntheticAccount', index: int):
+        """
+        Parameters of a synthetic tour, drawn from the seed of the account and the index of the tour.
+        :param account: The account.
+        :param index: The index of the tour.
+        """
+        rng = random.Random(account.seed * 1_000_003 + index)
+        self.index = index
+        self.tour_id = str(FIRST_TOUR_ID + index)
+        self.sport, speed, self.surface_prefix = _SPORTS[rng.randrange(len(_SPORTS))]
+        self.points = max(2, round(account.points * (1 + rng.uniform(-account.spread, account.spread))))
+        self.interval = 1.0
+        self.step = speed * self.interval
+        self.lat = rng.uniform(44.0, 47.5)
+        self.lon = rng.uniform(6.0, 13.0)
+        self.base_altitude = rng.uniform(100.0, 1500.0)
+        self.climb = rng.uniform(0.05, 0.3) * self.step
+        self.period = max(2, min(self.points - 1, rng.randrange(200, 2000)))
+        self.date = _START_DATE + timedelta(hours=index * 2 + rng.randrange(0, 2))
+        self.duration = round((self.points - 1) * self.interval)
+        self.distance = (self.points - 1) * self.step
+        self.radius = self.distance / (2 * math.pi)
+        self.rng = rng
+
+    def position(self, point: int) -> tuple:
+        """
+        Compute the position of a point of the track, on a loop starting and ending at the start point.
+        :param point: The index of the point.
+        :return: The latitude and longitude of the point.
+        """
+        angle = 2 * math.pi * point / (self.points - 1)
+        north = self.radius * math.sin(angle)
+        east = self.radius * (1 - math.cos(angle))
+        return (
+            self.lat + math.degrees(north / _EARTH_RADIUS),
+            self.lon + math.degrees(east / (_EARTH_RADIUS * math.cos(math.radians(self.lat)))),
+        )
+
+    def altitude(self, point: int) -> float:
+        """
+        Compute the altitude of a point of the track, a triangle wave around the base altitude.
+        :param point: The index of the point.
+        :return: The altitude, in meters.
+        """
+        phase = point % (2 * self.period)
+        return self.base_altitude + self.climb * (phase if phase <= self.period else 2 * self.period - phase)
+
+    def elevation(self) -> tuple:
+        """
+        Compute the elevation gain and loss of the track.
+        :return: The elevation up and down, in meters.
+        """
+        cycles, rest = divmod(self.points - 1, 2 * self.period)
+        up = cycles * self.period + min(rest, self.period)
+        down = cycles * self.period + max(0, rest - self.period)
+        return up * self.climb, down * self.climb
+
+
+class SyntheticAccount:
+    def __init__(
+        self,
+        tours: int = 100_000,
+        points: int = 1000,
+        spread: float = 0.5,
+        seed: int = 0,
+        username: str = '1234567890',
+        base_url: str = 'https://api.komoot.de',
+    ):
+        """
+        Synthetic Komoot account.
+        :param tours: The number of tours of the account.
+        :param points: The average number of points of the tracks.
+        :param spread: The relative variation of the number of points between tracks, each track has between
+        `points * (1 - spread)` and `points * (1 + spread)` points.
+        :param seed: The seed of the account, the same seed always generates the same account.
+        :param username: The user identifier of the account.
+        :param base_url: The url of the API, used in the links of the documents.
+        """
+        if tours < 0 or points < 2:
+            raise ValueError(f'Invalid account size provided: {tours} tours of {points} points.')
+        if not 0 <= spread < 1:
+            raise ValueError(f'Invalid spread provided: {spread}. Please provide a value between 0 and 1.')
+        self.tours = tours
+        self.points = points
+        self.spread = spread
+        self.seed = seed
+        self.username = username
+        self.base_url = base_url
+
+    def tour_id(self, index: int) -> str:
+        """
+        Get the id of a tour.
+        :param index: The index of the tour.
+        :return: The id of the tour.
+        """
+        return str(FIRST_TOUR_ID + index)
+
+    def tour_index(self, tour_id: str) -> int:
+        """
+        Get the index of a tour.
+        :param tour_id: The id of the tour.
+        :return: The index of the tour, or -1 if the tour is not part of the account.
+        """
+        if not str(tour_id).isdigit():
+            return -1
+        index = int(tour_id) - FIRST_TOUR_ID
+        return index if 0 <= index < self.tours else -1
+
+    def _parameters(self, index: int) -> _TourParameters:
+        if not 0 <= index < self.tours:
+            raise IndexError(f'Invalid tour index provided: {index}. The account has {self.tours} tours.')
+        return _TourParameters(account=self, index=index)
+
+    def summary(self, index: int) -> Dict[str, Any]:
+        """
+        Generate the tour list entry of a tour.
+        :param index: The index of the tour.
+        :return: The tour document, as returned by the tour list endpoint.
+        """
+        return self._summary(self._parameters(index))
+
+    def _summary(self, tour: _TourParameters) -> Dict[str, Any]:
+        date = tour.date.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+        changed_at = (tour.date + timedelta(seconds=tour.duration + 600)).isoformat(timespec='milliseconds')
+        elevation_up, elevation_down = tour.elevation()
+        url = f'{self.base_url}/v007/tours/{tour.tour_id}'
+        return {
+            'id': tour.tour_id,
+            'type': TourTypes.TOUR_RECORDED,
+            'status': 'private',
+            'date': date,
+            'changed_at': changed_at.replace('+00:00', 'Z'),
+            'name': f'Synthetic {tour.sport} {tour.index}',
+            'source': '{"api":"de.komoot.synthetic","type":"tour_recorded"}',
+            'sport': tour.sport,
+            'distance': tour.distance,
+            'duration': tour.duration,
+            'time_in_motion': round(tour.duration * 0.9),
+            'elevation_up': elevation_up,
+            'elevation_down': elevation_down,
+            'kcal_active': round(tour.distance / 20),
+            'kcal_resting': round(tour.duration / 40),
+            'start_point': {'lat': tour.lat, 'lng': tour.lon, 'alt': tour.base_altitude},
+            'vector_map_image': {
+                'src': f'{self.base_url}/maps/{tour.tour_id}.png?width={{width}}&height={{height}}&crop={{crop}}',
+                'templated': True,
+                'type': 'image/*',
+            },
+            '_links': {
+                'self': {'href': url},
+                'coordinates': {'href': f'{url}/coordinates'},
+            },
+        }
+
+    def detail(self, index: int) -> Dict[str, Any]:
+        """
+        Generate the detail document of a tour.
+        :param index: The index of the tour.
+        :return: The tour document, as returned by the tour endpoint.
+        """
+        tour = self._parameters(index)
+        document = self._summary(tour)
+        rng = tour.rng
+        last = tour.points - 1
+        indices = sorted({0, last} | {rng.randrange(1, last) for _ in range(min(_WAYPOINTS, last - 1))})
+        path = []
+        for position, point in enumerate(indices):
+            lat, lon = tour.position(point)
+            waypoint = {'location': {'lat': lat, 'lng': lon}, 'index': point}
+            if 0 < position < len(indices) - 1 and rng.random() < 0.3:
+                waypoint['reference'] = f'hlp:{rng.randrange(10 ** 8)}'
+            path.append(waypoint)
+        segments = [
+            {'type': SegmentType.ROUTED if rng.random() < 0.8 else SegmentType.MANUAL, 'from': start, 'to': end}
+            for start, end in zip(indices, indices[1:])
+        ]
+        information = []
+        for start, end in zip(indices, indices[1:]):
+            if end - start > 10 and rng.random() < 0.2:
+                information.append({'from': start + (end - start) // 4, 'to': end - (end - start) // 4})
+        document.update(
+            path=path,
+            segments=segments,
+            tour_information=[{'type': 'MODERATE_DANGER', 'segments': information}] if information else [],
+            summary={
+                'surfaces': self._amounts(rng, [f'{tour.surface_prefix}#{surface}' for surface in _SURFACES]),
+                'way_types': self._amounts(rng, list(_WAY_TYPES)),
+            },
+            difficulty={
+                'grade': rng.choice(DifficultyGrade.list_all()),
+                'explanation_technical': f'dh#t{rng.randrange(1, 6)}',
+                'explanation_fitness': f'd#c{rng.randrange(1, 6)}',
+            },
+            constitution=rng.randrange(1, 6),
+            query=f'synthetic-{self.seed}-{tour.index}',
+        )
+        return document
+
+    @staticmethod
+    def _amounts(rng: random.Random, types: List[str]) -> List[Dict[str, Any]]:
+        chosen = rng.sample(types, rng.randrange(1, len(types) + 1))
+        weights = [rng.random() + 0.01 for _ in chosen]
+        total = sum(weights)
+        return sorted(
+            ({'type': kind, 'amount': weight / total} for kind, weight in zip(chosen, weights)),
+            key=lambda amount: amount['amount'],
+        )
+
+    def page(self, page: int, size: int = 50) -> Dict[str, Any]:
+        """
+        Generate a page of the tour list.
+        :param page: The number of the page.
+        :param size: The number of tours per page.
+        :return: The page document, as returned by the tour list endpoint.
+        """
+        start = page * size
+        return {
+            '_embedded': {'tours': [self.summary(index) for index in range(start, min(start + size, self.tours))]},
+            'page': {
+                'size': size,
+                'totalElements': self.tours,
+                'totalPages': max(1, math.ceil(self.tours / size)),
+                'number': page,
+            },
+        }
+
+    def iter_pages(self, size: int = 50) -> Iterator[Dict[str, Any]]:
+        """
+        Generate all the pages of the tour list.
+        :param size: The number of tours per page.
+        :return: An iterator over the page documents.
+        """
+        for page in range(max(1, math.ceil(self.tours / size))):
+            yield self.page(page=page, size=size)
+
+    def track(self, index: int) -> CoordinateArray:
+        """
+        Generate the track of a tour. Times are offsets in milliseconds from the start date of the tour.
+        :param index: The index of the tour.
+        :return: The track.
+        """
+        tour = self._parameters(index)
+        points = range(tour.points)
+        lat = array('d', bytes(8 * tour.points))
+        lon = array('d', lat)
+        position = tour.position
+        for point in points:
+            lat[point], lon[point] = position(point)
+        altitude = tour.altitude
+        return CoordinateArray(
+            lat=lat,
+            lon=lon,
+            alt=array('d', [altitude(point) for point in points]),
+            time=array('d', [point * tour.interval * 1000 for point in points]),
+        )
+
+    def coordinates_document(self, index: int) -> bytes:
+        """
+        Generate the coordinates endpoint document of a tour.
+        :param index: The index of the tour.
+        :return: The encoded document.
+        """
+        track = self.track(index)
+        items = ','.join(
+            f'{{"lat":{lat!r},"lng":{lon!r},"alt":{alt!r},"t":{int(time)}}}'
+            for lat, lon, alt, time in zip(track.lat, track.lon, track.alt, track.time)
+        )
+        return f'{{"items":[{items}]}}'.encode('utf-8')
+
+    def gpx(self, index: int) -> bytes:
+        """
+        Generate the GPX export of a tour.
+        :param index: The index of the tour.
+        :return: The GPX document.
+        """
+        tour = self._parameters(index)
+        destination = io.BytesIO()
+        write_gpx(
+            destination=destination,
+            coordinates=self.track(index),
+            name=f'Synthetic {tour.sport} {tour.index}',
+            start_time=tour.date,
+        )
+        return destination.getvalue()
+
+    def fit(self, index: int) -> bytes:
+        """
+        Generate the FIT export of a tour, an activity file with a record message per point.
+        :param index: The index of the tour.
+        :return: The FIT file.
+        """
+        tour = self._parameters(index)
+        track = self.track(index)
+        start = int(tour.date.timestamp()) - _FIT_EPOCH_OFFSET
+        semicircles = 2 ** 31 / 180
+        # Definitions: file_id (local 0, global 0) and record (local 1, global 20).
+        body = [
+            struct.pack('<BBBHB', 0x40, 0, 0, 0, 3) + bytes([0, 1, 0x00, 1, 2, 0x84, 4, 4, 0x86]),
+            struct.pack('<BBHI', 0x00, 4, 1, start),
+            struct.pack('<BBBHB', 0x41, 0, 0, 20, 5)
+            + bytes([253, 4, 0x86, 0, 4, 0x85, 1, 4, 0x85, 2, 2, 0x84, 3, 1, 0x02]),
+        ]
+        record = struct.Struct('<BIiiHB')
+        heart_rate = tour.rng.randrange(100, 140)
+        for point, (lat, lon, alt) in enumerate(zip(track.lat, track.lon, track.alt)):
+            body.append(record.pack(
+                0x01,
+                start + round(point * tour.interval),
+                round(lat * semicircles),
+                round(lon * semicircles),
+                round((alt + 500) * 5),
+                heart_rate + point % 30,
+            ))
+        data = b''.join(body)
+        header = struct.pack('<BBHI4s', 14, 0x20, 2132, len(data), b'.FIT')
+        header += struct.pack('<H', fit_crc(header))
+        content = header + data
+        return content + struct.pack('<H', fit_crc(content))
+
+
+def write_account(
+    account: SyntheticAccount,
+    directory: str,
+    page_size: int = 50,
+    exports: Iterable[str] = (),
+) -> None:
+    """
+    Write a synthetic account to a directory: the tour list pages in `pages`, the detail documents in `tours`, the
+    tracks in the coordinate archive `tracks.kca`, and the requested exports in `gpx` and `fit`.
+    :param account: The account.
+    :param directory: The directory, created if needed.
+    :param page_size: The number of tours per page.
+    :param exports: The exports to write, among 'gpx' and 'fit'.
+    """
+    for name in ('pages', 'tours', *exports):
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+    for number, page in enumerate(account.iter_pages(size=page_size)):
+        with open(os.path.join(directory, 'pages', f'{number:06d}.json'), 'w') as f:
+            json.dump(page, f)
+    with CoordinateArchive(os.path.join(directory, 'tracks.kca')) as archive:
+        for index in range(account.tours):
+            tour_id = account.tour_id(index)
+            with open(os.path.join(directory, 'tours', f'{tour_id}.json'), 'w') as f:
+                json.dump(account.detail(index), f)
+            for export in exports:
+                with open(os.path.join(directory, export, f'{tour_id}.{export}'), 'wb') as f:
+                    f.write(getattr(account, export)(index))
+        archive.extend((account.tour_id(index), account.track(index)) for index in range(account.tours))
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arguments.add_argument('--tours', type=int, default=1000, help='number of tours of the account')
+    arguments.add_argument('--points', type=int, default=1000, help='average number of points of the tracks')
+    arguments.add_argument('--spread', type=float, default=0.5, help='relative variation of the number of points')
+    arguments.add_argument('--seed', type=int, default=0, help='seed of the account')
+    arguments.add_argument('--page-size', type=int, default=50, help='number of tours per page')
+    arguments.add_argument('--export', action='append', choices=('gpx', 'fit'), default=[], help='export to write')
+    arguments.add_argument('--output', required=True, help='directory the account is written to')
+    options = arguments.parse_args()
+
+    account = SyntheticAccount(tours=options.tours, points=options.points, spread=options.spread, seed=options.seed)
+    start = time.perf_counter()
+    write_account(account=account, directory=options.output, page_size=options.page_size, exports=options.export)
+    print(f'{options.tours} tours of about {options.points} points written to {options.output} '
+          f'in {time.perf_counter() - start:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+from kompy import KomootConnector
+from kompy.cassette import Cassette
+from kompy.constants.cassette_modes import CassetteModes
+from kompy.constants.hydration_targets import HydrationTargets
+from kompy.constants.tour_constants import TourSortField
+from kompy.constants.tour_object_types import TourObjectTypes
+from kompy.errors.cassette_errors import CassetteMissError
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.config = ServerConfig(tours=6, points=100, page_size=4, latency=0.02, compression=True)
+        self.server = KomootServer(self.config)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'account.cassette')
+        self.tour_id = self.server.dataset.tour_ids[0]
+
+    def _connector(self, cassette: Cassette) -> KomootConnector:
+        return KomootConnector(email=self.config.email, password=self.config.password, cassette=cassette)
+
+    def _session(self, cassette: Cassette):
+        connector = self._connector(cassette)
+        tours = connector.get_tours(user_identifier=self.config.username, sort_field=TourSortField.DATE)
+        errors = connector.hydrate(tours, what=[HydrationTargets.COORDINATES, HydrationTargets.GPX_COLUMNS])
+        self.assertEqual(errors, {})
+        records = connector.get_tour_by_id(self.tour_id, object_type=TourObjectTypes.FIT_RECORDS)
+        columns = connector.get_tour_by_id(self.tour_id, object_type=TourObjectTypes.GPX_COLUMNS)
+        return tours, records, columns
+
+    def test_record_and_replay(self):
+        with Cassette(self.path, mode=CassetteModes.RECORD) as cassette:
+            start = time.perf_counter()
+            tours, records, columns = self._session(cassette)
+            recording = time.perf_counter() - start
+            self.assertEqual(cassette.recorded, self.server.requests)
+        requests = self.server.requests
+        with Cassette(self.path) as cassette:
+            start = time.perf_counter()
+            replayed_tours, replayed_records, replayed_columns = self._session(cassette)
+            replaying = time.perf_counter() - start
+            self.assertEqual(cassette.replayed, requests)
+        self.assertEqual(self.server.requests, requests)
+        self.assertLess(replaying, recording / 2)
+        self.assertEqual([tour.id for tour in replayed_tours], [tour.id for tour in tours])
+        self.assertEqual([point.lat for point in replayed_tours[0].coordinates],
+                         [point.lat for point in tours[0].coordinates])
+        self.assertEqual(replayed_tours[0].gpx_columns.lat, tours[0].gpx_columns.lat)
+        self.assertEqual(replayed_records.lat, records.lat)
+        self.assertEqual(replayed_columns.lat, columns.lat)
+
+    def test_unrecorded_request(self):
+        with Cassette(self.path, mode=CassetteModes.RECORD) as cassette:
+            self._connector(cassette)
+        with Cassette(self.path) as cassette:
+            connector = self._connector(cassette)
+            with self.assertRaises(CassetteMissError):
+                connector.get_tour_by_id(self.tour_id)
+
+    def test_replay_or_record(self):
+        with Cassette(self.path, mode=CassetteModes.RECORD) as cassette:
+            self._connector(cassette)
+        with Cassette(self.path, mode=CassetteModes.REPLAY_OR_RECORD) as cassette:
+            connector = self._connector(cassette)
+            connector.get_tour_by_id(self.tour_id)
+            self.assertEqual((cassette.replayed, cassette.recorded), (1, 1))
+        with Cassette(self.path) as cassette:
+            self.assertEqual(len(cassette), 2)
+            self._connector(cassette).get_tour_by_id(self.tour_id)
+
+    def test_repeated_requests_are_replayed_in_order(self):
+        with Cassette(self.path, mode=CassetteModes.RECORD) as cassette:
+            connector = self._connector(cassette)
+            before = connector.get_tour_by_id(self.tour_id)
+            connector.change_tour(self.tour_id, tour_name='Renamed')
+            after = connector.get_tour_by_id(self.tour_id)
+        with Cassette(self.path) as cassette:
+            connector = self._connector(cassette)
+            self.assertEqual(connector.get_tour_by_id(self.tour_id).name, before.name)
+            self.assertTrue(connector.change_tour(self.tour_id, tour_name='Renamed'))
+            self.assertEqual(connector.get_tour_by_id(self.tour_id).name, after.name)
+            self.assertEqual(connector.get_tour_by_id(self.tour_id).name, 'Renamed')
+
+    def test_query_matching(self):
+        with Cassette(self.path, mode=CassetteModes.RECORD) as cassette:
+            self._connector(cassette).get_tour_by_id(self.tour_id, share_token='first')
+        with Cassette(self.path) as cassette:
+            connector = self._connector(cassette)
+            with self.assertRaises(CassetteMissError):
+                connector.get_tour_by_id(self.tour_id, share_token='second')
+        with Cassette(self.path, ignore_parameters=['share_token']) as cassette:
+            self._connector(cassette).get_tour_by_id(self.tour_id, share_token='second')
+        with Cassette(self.path, match_query=False) as cassette:
+            self._connector(cassette).get_tour_by_id(self.tour_id)
+
+    def test_invalid_cassette(self):
+        with self.assertRaises(ValueError):
+            Cassette(self.path, mode='rewind')
+        with self.assertRaises(FileNotFoundError):
+            Cassette(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import gzip
+import importlib.util
+import logging
+import unittest
+
+from kompy import KomootConnector
+from kompy.compression import (
+    accept_encoding,
+    compress,
+)
+from kompy.constants.activities import SupportedActivities
+from kompy.constants.content_encodings import ContentEncodings
+from kompy.constants.endpoints import Endpoints
+from kompy.constants.tour_constants import TourSortField
+from kompy.constants.tour_object_types import TourObjectTypes
+from kompy.metrics import (
+    InMemoryMetrics,
+    to_prometheus,
+)
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_gzip(self):
+        data = b'<trkpt lat="45.0" lon="7.0"></trkpt>' * 100
+        compressed = compress(data=data, encoding=ContentEncodings.GZIP)
+        self.assertLess(len(compressed), len(data) / 10)
+        self.assertEqual(gzip.decompress(compressed), data)
+
+    def test_invalid_encoding(self):
+        with self.assertRaises(ValueError):
+            compress(data=b'data', encoding='lzma')
+
+    @unittest.skipIf(importlib.util.find_spec('brotli') is not None, 'brotli is installed')
+    def test_missing_optional_dependency(self):
+        with self.assertRaises(ImportError):
+            compress(data=b'data', encoding=ContentEncodings.BROTLI)
+
+    def test_accept_encoding(self):
+        self.assertIn('gzip', accept_encoding())
+
+
+class TestConnectorCompression(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.config = ServerConfig(tours=3, points=500, compression=True)
+        self.server = KomootServer(self.config)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.tour_id = self.server.dataset.tour_ids[0]
+        self.metrics = InMemoryMetrics()
+
+    def _connector(self, **kwargs) -> KomootConnector:
+        return KomootConnector(email=self.config.email, password=self.config.password, metrics=self.metrics, **kwargs)
+
+    def test_downloads_are_compressed(self):
+        connector = self._connector()
+        gpx = connector.get_tour_by_id(self.tour_id, object_type=TourObjectTypes.GPX)
+        self.assertEqual(len(gpx.tracks[0].segments[0].points), 500)
+        decoded = self.metrics.bytes_received[Endpoints.TOUR_GPX]
+        self.assertEqual(decoded, len(self.server.dataset.gpx(self.tour_id)))
+        self.assertLess(self.metrics.wire_bytes_received[Endpoints.TOUR_GPX], decoded / 4)
+        self.assertIn('kompy_response_wire_bytes_total{endpoint="tour_gpx"}', to_prometheus(self.metrics))
+
+    def test_streamed_downloads_are_decoded(self):
+        connector = self._connector()
+        columns = connector.get_tour_by_id(self.tour_id, object_type=TourObjectTypes.GPX_COLUMNS)
+        self.assertEqual(len(columns), 500)
+        tours = connector.get_tours(user_identifier=self.config.username, sort_field=TourSortField.DATE)
+        self.assertEqual(connector.hydrate(tours), {})
+        self.assertEqual(len(tours[0].coordinates), 500)
+
+    def test_uploads_are_compressed(self):
+        data = self.server.dataset.gpx(self.tour_id)
+        connector = self._connector(upload_encoding=ContentEncodings.GZIP)
+        received = self.server.bytes_received
+        self.assertTrue(connector.upload_tour(data, activity_type=SupportedActivities.HIKING, tour_name='tour'))
+        self.assertEqual(self.server.dataset.uploads, 1)
+        self.assertLess(self.server.bytes_received - received, len(data) / 4)
+        self.assertEqual(self.metrics.bytes_sent[Endpoints.UPLOAD_TOUR], len(data))
+        self.assertEqual(self.metrics.wire_bytes_sent[Endpoints.UPLOAD_TOUR], self.server.bytes_received - received)
+
+    def test_uploads_are_not_compressed_by_default(self):
+        data = self.server.dataset.gpx(self.tour_id)
+        connector = self._connector()
+        self.assertTrue(connector.upload_tour(data, activity_type=SupportedActivities.HIKING, tour_name='tour'))
+        self.assertEqual(self.metrics.wire_bytes_sent[Endpoints.UPLOAD_TOUR], len(data))
+
+    def test_invalid_upload_encoding(self):
+        with self.assertRaises(ValueError):
+            self._connector(upload_encoding='lzma')
+
+
+if __name__ == '__main__':
+    unittest.main()
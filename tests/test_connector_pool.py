@@ -0,0 +1,132 @@
+import logging
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from kompy.connector_pool import ConnectorPool
+from kompy.constants.endpoints import Endpoints
+from kompy.constants.hydration_targets import HydrationTargets
+from kompy.constants.tour_object_types import TourObjectTypes
+from kompy.metrics import InMemoryMetrics
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+
+
+class TestConnectorPool(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.config = ServerConfig(tours=2, points=50)
+        self.server = KomootServer(self.config)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.tour_id = self.server.dataset.tour_ids[0]
+
+    def _pool(self, accounts: int = 1, **kwargs) -> ConnectorPool:
+        pool = ConnectorPool(**kwargs)
+        self.addCleanup(pool.close)
+        for account in range(accounts):
+            pool.add_account(f'account-{account}', email=self.config.email, password=self.config.password)
+        return pool
+
+    def test_login_is_lazy_and_cached(self):
+        pool = self._pool()
+        self.assertEqual(self.server.requests, 0)
+        connector = pool.get('account-0')
+        self.assertIs(pool.get('account-0'), connector)
+        self.assertEqual((pool.logins, self.server.requests), (1, 1))
+        self.assertEqual(pool.logged_in(), ['account-0'])
+
+    def test_concurrent_gets_share_a_login(self):
+        pool = self._pool()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            connectors = list(executor.map(lambda _: pool.get('account-0'), range(8)))
+        self.assertEqual(pool.logins, 1)
+        self.assertTrue(all(connector is connectors[0] for connector in connectors))
+
+    def test_accounts_share_connections(self):
+        pool = self._pool(accounts=50, pool_size=4)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            tours = list(executor.map(
+                lambda account: pool.get(account).get_tour_by_id(self.tour_id, object_type=TourObjectTypes.KOMPY),
+                pool.accounts(),
+            ))
+        self.assertEqual(len(tours), 50)
+        self.assertEqual(self.server.requests, 100)
+        self.assertLessEqual(self.server.connections, 4)
+
+    def test_hydrate_uses_the_pool_session(self):
+        metrics = InMemoryMetrics()
+        pool = self._pool(accounts=2, pool_size=2, metrics=metrics)
+        adapter = pool.session.get_adapter('http://')
+        send = adapter.send
+        sent = []
+
+        def counting_send(request, **kwargs):
+            sent.append(request.url)
+            return send(request, **kwargs)
+
+        adapter.send = counting_send
+        for account in pool.accounts():
+            connector = pool.get(account)
+            tours = [connector.get_tour_by_id(tour_id) for tour_id in self.server.dataset.tour_ids]
+            self.assertEqual(connector.hydrate(tours, what=[HydrationTargets.COORDINATES, HydrationTargets.GPX],
+                                               concurrency=2), {})
+            self.assertTrue(all(len(tour.coordinates) == 50 for tour in tours))
+        # Logins, tours and 2 tracks of each tour, for both accounts.
+        self.assertEqual(len(sent), 2 * (1 + 2 + 4))
+        self.assertEqual(self.server.requests, len(sent))
+        self.assertLessEqual(self.server.connections, 2)
+        self.assertEqual(metrics.requests[Endpoints.TOUR_COORDINATES, 'get', '200'], 4)
+        self.assertEqual(len(pool.session.hooks['response']), 0)
+
+    def test_per_account_rate_limit(self):
+        pool = self._pool(accounts=2, rate=20, burst=1)
+        start = time.perf_counter()
+        for account in pool.accounts():
+            pool.get(account).get_tour_by_id(self.tour_id)
+        # Each account starts its first two requests, the login and the fetch, one rate period apart.
+        self.assertLess(time.perf_counter() - start, 0.2)
+        start = time.perf_counter()
+        connector = pool.get('account-0')
+        for _ in range(3):
+            connector.get_tour_by_id(self.tour_id)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+
+    def test_idle_connectors_are_evicted(self):
+        pool = self._pool(accounts=2, idle_timeout=0.05)
+        first = pool.get('account-0')
+        time.sleep(0.1)
+        pool.get('account-1')
+        self.assertEqual(pool.logged_in(), ['account-1'])
+        self.assertEqual(pool.evictions, 1)
+        self.assertIsNot(pool.get('account-0'), first)
+        self.assertEqual(pool.logins, 3)
+        time.sleep(0.1)
+        self.assertEqual(pool.evict_idle(), 2)
+
+    def test_accounts_are_managed(self):
+        pool = self._pool()
+        connector = pool.get('account-0')
+        pool.add_account('account-0', email=self.config.email, password=self.config.password)
+        self.assertIs(pool.get('account-0'), connector)
+        pool.add_account('account-0', email='other@example.com', password='wrong')
+        self.assertEqual(pool.logged_in(), [])
+        with self.assertRaises(ConnectionError):
+            pool.get('account-0')
+        pool.remove_account('account-0')
+        with self.assertRaises(ValueError):
+            pool.get('account-0')
+
+    def test_invalid_pool(self):
+        with self.assertRaises(ValueError):
+            ConnectorPool(pool_size=0)
+        with self.assertRaises(ValueError):
+            ConnectorPool(idle_timeout=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import math
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from kompy import (
+    Coordinate,
+    CoordinateArray,
+)
+from kompy.coordinate_archive import CoordinateArchive
+from kompy.errors.codec_errors import CoordinateArchiveError
+
+
+def _track(points, shift=0.0):
+    return CoordinateArray(
+        lat=[44.2 + i * 1e-4 + shift for i in range(points)],
+        lon=[7.3 + i * 1e-4 for i in range(points)],
+        alt=[900.0 + i for i in range(points)],
+        time=[i * 1000.0 for i in range(points)],
+    )
+
+
+class TestCoordinateArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'tracks.kmpa')
+
+    def test_append_and_get(self):
+        with CoordinateArchive(self.path) as archive:
+            archive.extend([(str(tour_id), _track(tour_id + 1)) for tour_id in range(50)])
+            self.assertEqual(len(archive), 50)
+            for tour_id in range(50):
+                self.assertEqual(archive.get(str(tour_id)), _track(tour_id + 1))
+            self.assertNotIn('50', archive)
+            with self.assertRaises(KeyError):
+                archive.get('50')
+
+    def test_reopen_and_incremental_append(self):
+        with CoordinateArchive(self.path) as archive:
+            archive.append('1', _track(3))
+        with CoordinateArchive(self.path) as archive:
+            self.assertIn('1', archive)
+            archive.append('2', [Coordinate(lat=44.0, lon=7.0), Coordinate(lat=44.1, lon=7.1)])
+        with CoordinateArchive(self.path) as archive:
+            self.assertEqual(sorted(archive.tour_ids()), ['1', '2'])
+            self.assertEqual(archive.get('1'), _track(3))
+            track = archive.get('2')
+            self.assertEqual(track[1].lat, 44.1)
+            self.assertIsNone(track[1].alt)
+            self.assertIsNone(track[1].time)
+
+    def test_replace_track(self):
+        with CoordinateArchive(self.path) as archive:
+            archive.append('1', _track(3))
+            archive.append('1', _track(5, shift=1.0))
+            self.assertEqual(len(archive), 1)
+            self.assertEqual(archive.get('1'), _track(5, shift=1.0))
+
+    def test_view_is_kept_across_appends(self):
+        with CoordinateArchive(self.path) as archive:
+            archive.append('1', _track(4))
+            track = archive.view('1')
+            archive.append('2', _track(2))
+            self.assertEqual(len(track), 4)
+            self.assertEqual(track[3].alt, 903.0)
+            self.assertTrue(math.isclose(track.lat[3], 44.2003))
+            track.release()
+
+    def test_size_is_linear_in_single_appends(self):
+        # Preamble, then for each tour its padded id, its 4 columns of 10 points and its index entry.
+        compacted = 24 + 300 * (8 + 4 * 10 * 8 + 24)
+        with CoordinateArchive(self.path) as archive:
+            for tour_id in range(300):
+                archive.append(str(tour_id), _track(10))
+                self.assertLessEqual(os.path.getsize(self.path), 2 * (24 + (tour_id + 1) * (8 + 4 * 10 * 8 + 24)))
+            self.assertEqual(archive.get('299'), _track(10))
+            archive.compact()
+            self.assertEqual(os.path.getsize(self.path), compacted)
+            self.assertEqual(sorted(archive.tour_ids()), sorted(str(tour_id) for tour_id in range(300)))
+            self.assertEqual(archive.get('0'), _track(10))
+
+    def test_compact_replaced_tracks(self):
+        with CoordinateArchive(self.path) as archive:
+            archive.extend([(str(tour_id), _track(10)) for tour_id in range(10)])
+            archive.append('3', _track(20, shift=1.0))
+            track = archive.view('4')
+            archive.compact()
+            self.assertEqual(os.path.getsize(self.path), 24 + 9 * (8 + 320 + 24) + (8 + 640 + 24))
+            self.assertEqual(archive.get('3'), _track(20, shift=1.0))
+            # Views over the archive before it was compacted stay valid.
+            self.assertEqual(track[9].alt, 909.0)
+            track.release()
+        self.assertEqual(os.listdir(self.directory.name), ['tracks.kmpa'])
+
+    def test_failed_append_keeps_the_archive(self):
+        with CoordinateArchive(self.path) as archive:
+            archive.extend([(str(tour_id), _track(tour_id + 1)) for tour_id in range(5)])
+            with patch.object(CoordinateArchive, '_commit', side_effect=OSError('disk full')):
+                with self.assertRaises(OSError):
+                    archive.append('5', _track(100))
+            self.assertEqual(len(archive), 5)
+            self.assertEqual(archive.get('4'), _track(5))
+        with CoordinateArchive(self.path) as archive:
+            self.assertEqual(sorted(archive.tour_ids()), [str(tour_id) for tour_id in range(5)])
+            for tour_id in range(5):
+                self.assertEqual(archive.get(str(tour_id)), _track(tour_id + 1))
+            archive.append('5', _track(3))
+            self.assertEqual(archive.get('5'), _track(3))
+
+    def test_two_archives_on_the_same_file(self):
+        with CoordinateArchive(self.path) as writer, CoordinateArchive(self.path) as reader:
+            writer.extend([(str(tour_id), _track(10)) for tour_id in range(5)])
+            self.assertEqual(len(reader), 0)
+            self.assertTrue(reader.refresh())
+            self.assertFalse(reader.refresh())
+            track = reader.view('2')
+            # The reader keeps reading the archive it refreshed while the writer appends and replaces tracks.
+            for tour_id in range(50):
+                writer.append(str(tour_id % 7), _track(tour_id + 1, shift=1.0))
+                self.assertEqual(len(reader), 5)
+                self.assertEqual(reader.get('4'), _track(10))
+            self.assertEqual(track[9].alt, 909.0)
+            track.release()
+            self.assertTrue(reader.refresh())
+            self.assertEqual(len(reader), 7)
+            self.assertEqual(reader.get('6'), _track(49, shift=1.0))
+            # Tracks appended by the reader are appended to those of the writer.
+            reader.append('7', _track(2))
+            writer.compact()
+            reader.refresh()
+            for archive in (writer, reader):
+                self.assertEqual(sorted(archive.tour_ids()), [str(tour_id) for tour_id in range(8)])
+                self.assertEqual(archive.get('0'), _track(50, shift=1.0))
+
+    def test_invalid_archive(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not an archive at all, sorry')
+        with self.assertRaises(CoordinateArchiveError):
+            CoordinateArchive(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from kompy import (
+    Coordinate,
+    CoordinateArray,
+)
+
+
+class TestCoordinateArray(unittest.TestCase):
+
+    def test_from_coordinates(self):
+        """
+        Test packing Coordinate objects and unpacking them back.
+        """
+        coordinates = [Coordinate(30, 40, 500, 1000), Coordinate(31, 41)]
+        coordinate_array = CoordinateArray.from_coordinates(coordinates)
+        self.assertEqual(len(coordinate_array), 2)
+        self.assertEqual(
+            [c.__dict__ for c in coordinate_array.to_coordinates()],
+            [c.__dict__ for c in coordinates],
+        )
+
+    def test_initialization_without_optional_columns(self):
+        """
+        Test initialization with only latitudes and longitudes.
+        """
+        coordinate_array = CoordinateArray(lat=[30, 31], lon=[40, 41])
+        self.assertIsNone(coordinate_array[1].alt)
+        self.assertIsNone(coordinate_array[1].time)
+
+    def test_columns_of_different_lengths(self):
+        """
+        Test that columns of different lengths are rejected.
+        """
+        with self.assertRaises(ValueError):
+            CoordinateArray(lat=[30, 31], lon=[40])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import unittest
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from requests import Response
+
+from kompy import (
+    CoordinateArray,
+    Tour,
+)
+from kompy.coordinates_reader import (
+    iter_coordinate_items,
+    read_coordinates,
+)
+
+
+class TestCoordinatesReader(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a coordinates response for the tests.
+        """
+        self.items = [
+            {'lat': 44.243656, 'lng': 7.322228, 'alt': 983.6, 't': 0},
+            {'lat': 44.243529, 'lng': 7.2275, 'alt': 990.1, 't': 1500},
+            {'lat': -44.2, 'lng': -7.3},
+        ]
+        self.content = json.dumps({
+            'items': self.items,
+            '_links': {'self': {'href': 'https://api.komoot.de/v007/tours/1/coordinates', 'title': 'Été'}},
+        }, ensure_ascii=False).encode('utf-8')
+
+    def test_small_chunks(self):
+        """
+        Test that items split across chunks are decoded.
+        """
+        for chunk_size in [1, 7, 1024]:
+            self.assertEqual(list(iter_coordinate_items(self.content, chunk_size=chunk_size)), self.items)
+
+    def test_items_after_other_keys(self):
+        """
+        Test that keys before the items are skipped.
+        """
+        content = json.dumps({'count': 12345, 'items': self.items}).encode('utf-8')
+        self.assertEqual(list(iter_coordinate_items(content, chunk_size=3)), self.items)
+
+    def test_read_coordinates(self):
+        """
+        Test decoding the response into a CoordinateArray.
+        """
+        received = []
+        coordinates = read_coordinates(self.content, item_callback=received.append)
+        self.assertIsInstance(coordinates, CoordinateArray)
+        self.assertEqual(received, self.items)
+        self.assertEqual(coordinates[1].time, 1500)
+        self.assertIsNone(coordinates[2].alt)
+
+    def test_truncated_response(self):
+        """
+        Test that a truncated response raises an error.
+        """
+        with self.assertRaises(ValueError):
+            list(iter_coordinate_items(self.content[:-30]))
+
+    @patch('requests.get')
+    def test_generate_coordinates(self, mock_get: MagicMock):
+        """
+        Test fetching the coordinates of a tour.
+        """
+        mock_response = Response()
+        mock_response.status_code = 200
+        mock_response._content = self.content
+        mock_response._content_consumed = True
+        mock_get.return_value = mock_response
+        with open(f'{os.path.dirname(os.path.realpath(__file__))}/resources/get_tour_by_id_response.json') as f:
+            tour = Tour(json.load(f))
+
+        self.assertTrue(tour.generate_coordinates(authentication=MagicMock()))
+        self.assertEqual([c.lat for c in tour.coordinates], [item['lat'] for item in self.items])
+        self.assertTrue(tour.generate_coordinates(authentication=MagicMock(), as_array=True))
+        self.assertIsInstance(tour.coordinates, CoordinateArray)
+        self.assertEqual(len(tour.coordinates), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import logging
+import unittest
+
+from kompy import (
+    KomootConnector,
+    Tour,
+)
+from kompy.authentication import Authentication
+from kompy.constants.hydration_targets import HydrationTargets
+from kompy.constants.tour_constants import TourSortField
+from kompy.constants.tour_object_types import TourObjectTypes
+from kompy.gpx_reader import GpxColumns
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+
+
+class TestEndToEnd(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.config = ServerConfig(tours=5, points=50, page_size=2)
+        self.server = KomootServer(self.config)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.connector = KomootConnector(email=self.config.email, password=self.config.password)
+
+    def test_one_server_at_a_time(self):
+        server = KomootServer(self.config)
+        self.addCleanup(server.stop)
+        with self.assertRaises(RuntimeError):
+            server.start()
+
+    def test_get_tours_paginates(self):
+        tours = self.connector.get_tours(user_identifier=self.config.username, sort_field=TourSortField.DATE)
+        self.assertEqual([tour.id for tour in tours], self.server.dataset.tour_ids)
+
+    def test_get_tour_and_tracks(self):
+        tour_id = self.server.dataset.tour_ids[1]
+        tour = self.connector.get_tour_by_id(tour_identifier=tour_id)
+        self.assertIsInstance(tour, Tour)
+        self.assertTrue(tour.generate_coordinates(authentication=self.connector.authentication, as_array=True))
+        self.assertEqual(len(tour.coordinates), 50)
+        columns = self.connector.get_tour_by_id(tour_identifier=tour_id, object_type=TourObjectTypes.GPX_COLUMNS)
+        self.assertIsInstance(columns, GpxColumns)
+        self.assertEqual(len(columns), 50)
+
+    def test_coordinates_of_unavailable_tour(self):
+        tour_id = self.server.dataset.tour_ids[1]
+        tour = self.connector.get_tour_by_id(tour_identifier=tour_id)
+        forbidden = Authentication(email_address=self.config.email, password='wrong')
+        with self.assertRaises(ConnectionError):
+            tour.generate_coordinates(authentication=forbidden, coalesce=False)
+        self.assertTrue(self.connector.delete_tour(tour_id=tour_id))
+        for as_array in (False, True):
+            with self.assertRaises(ValueError):
+                tour.generate_coordinates(authentication=self.connector.authentication, as_array=as_array)
+        self.assertEqual(tour.coordinates, [])
+
+    def test_hydrate(self):
+        tours = self.connector.get_tours(user_identifier=self.config.username, sort_field=TourSortField.DATE)
+        errors = self.connector.hydrate(tours=tours, what=[HydrationTargets.COORDINATES, HydrationTargets.GPX_COLUMNS])
+        self.assertEqual(errors, {})
+        self.assertTrue(all(len(tour.coordinates) == 50 for tour in tours))
+
+    def test_hydrate_tour(self):
+        tours = self.connector.get_tours(user_identifier=self.config.username, sort_field=TourSortField.DATE)
+        self.assertIs(self.connector.hydrate_tour(tours[0]), tours[0])
+        self.assertEqual(len(tours[0].coordinates), 50)
+        with self.connector.hydration_session(pool_size=2) as session:
+            self.connector.hydrate_tour(tours[1], what=[HydrationTargets.GPX_COLUMNS], session=session)
+        self.assertEqual(len(tours[1].gpx_columns), 50)
+        self.assertTrue(self.connector.delete_tour(tour_id=tours[2].id))
+        with self.assertRaises(ValueError):
+            self.connector.hydrate_tour(tours[2])
+        with self.assertRaises(ValueError):
+            self.connector.hydrate_tour(tours[3], what=['photos'])
+
+    def test_hydrate_deleted_tour(self):
+        tours = self.connector.get_tours(user_identifier=self.config.username, sort_field=TourSortField.DATE)
+        self.assertTrue(self.connector.delete_tour(tour_id=tours[2].id))
+        progress = []
+        errors = self.connector.hydrate(
+            tours=tours,
+            what=[HydrationTargets.COORDINATES],
+            progress_callback=lambda completed, total, tour, target, error: progress.append((tour.id, error)),
+        )
+        self.assertEqual(list(errors), [tours[2].id])
+        self.assertIsInstance(errors[tours[2].id][HydrationTargets.COORDINATES], ValueError)
+        self.assertEqual([tour_id for tour_id, error in progress if error is not None], [tours[2].id])
+        self.assertEqual(len(progress), 5)
+        self.assertEqual(tours[2].coordinates, [])
+
+    def test_upload_change_and_delete(self):
+        gpx = self.server.dataset.gpx(self.server.dataset.tour_ids[0])
+        self.assertTrue(self.connector.upload_tour(tour_object=gpx, activity_type='hike', tour_name='Upload'))
+        tour_id = self.server.dataset.tour_ids[0]
+        self.assertTrue(self.connector.change_tour(tour_id=tour_id, tour_name='Renamed'))
+        self.assertEqual(self.connector.get_tour_by_id(tour_identifier=tour_id).name, 'Renamed')
+        self.assertTrue(self.connector.delete_tour(tour_id=tour_id))
+        with self.assertRaises(ValueError):
+            self.connector.get_tour_by_id(tour_identifier=tour_id)
+
+    def test_invalid_credentials(self):
+        with self.assertRaises(ConnectionError):
+            KomootConnector(email=self.config.email, password='wrong')
+
+
+if __name__ == '__main__':
+    unittest.main()
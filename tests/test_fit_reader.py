@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from fit_tool.fit_file import FitFile
+from fit_tool.profile.messages.record_message import RecordMessage
+
+from kompy.fit_reader import (
+    FitRecords,
+    read_fit_records,
+)
+from tests.resources.fit_file_builder import fit_file_builder
+
+
+class TestFitReader(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a FIT file with record messages for the tests.
+        """
+        self.content = fit_file_builder(records=5)
+
+    def test_matches_fit_tool(self):
+        """
+        Test that the decoded columns match the records decoded by fit_tool.
+        """
+        records = read_fit_records(self.content)
+        self.assertIsInstance(records, FitRecords)
+        expected = [r.message for r in FitFile.from_bytes(self.content).records
+                    if isinstance(r.message, RecordMessage)]
+        self.assertEqual(len(records), len(expected))
+        self.assertEqual(list(records.timestamp), [m.timestamp / 1000 for m in expected])
+        self.assertEqual(list(records.lat), [m.position_lat for m in expected])
+        self.assertEqual(list(records.lon), [m.position_long for m in expected])
+        self.assertEqual(list(records.altitude), [m.altitude for m in expected])
+        self.assertEqual(list(records.heart_rate), [m.heart_rate for m in expected])
+        self.assertEqual(list(records.cadence), [m.cadence for m in expected])
+        self.assertEqual(records.power[1], 200)
+        self.assertNotEqual(records.power[0], records.power[0])
+
+    def test_memory_mapped_file(self):
+        """
+        Test decoding a FIT file from its path and building the full FitFile on demand.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'activity.fit')
+            with open(path, 'wb') as f:
+                f.write(self.content)
+            records = read_fit_records(path)
+            self.assertEqual(len(records), 5)
+            self.assertIsInstance(records.to_fit_file(), FitFile)
+
+    def test_invalid_file(self):
+        """
+        Test that invalid FIT files raise an error.
+        """
+        with self.assertRaises(ValueError):
+            read_fit_records(b'not a fit file')
+        with self.assertRaises(ValueError):
+            read_fit_records(self.content[:40])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import unittest
+
+import gpxpy
+
+from kompy.gpx_reader import (
+    GpxColumns,
+    read_gpx,
+)
+
+
+class TestGpxReader(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up the example GPX file for the tests.
+        """
+        self.path = f'{os.path.dirname(os.path.realpath(__file__))}/resources/example.gpx'
+        with open(self.path, 'rb') as f:
+            self.content = f.read()
+
+    def test_matches_gpxpy(self):
+        """
+        Test that the columns contain the same points as the gpxpy document.
+        """
+        columns = read_gpx(self.content, chunk_size=64)
+        self.assertIsInstance(columns, GpxColumns)
+        points = gpxpy.parse(self.content.decode('utf-8')).tracks[0].segments[0].points
+        self.assertEqual(len(columns), len(points))
+        self.assertEqual(list(columns.lat), [p.latitude for p in points])
+        self.assertEqual(list(columns.lon), [p.longitude for p in points])
+        self.assertEqual(list(columns.ele), [p.elevation for p in points])
+        self.assertEqual(list(columns.time), [p.time.timestamp() for p in points])
+        self.assertEqual(columns.name, 'Example gpx')
+        self.assertEqual(len(columns.waypoints), 1)
+
+    def test_point_callback(self):
+        """
+        Test that the callback is called for every point.
+        """
+        points = []
+        columns = read_gpx(self.path, point_callback=lambda *point: points.append(point), store_points=False)
+        self.assertEqual(len(points), 7)
+        self.assertEqual(len(columns), 0)
+
+    def test_to_coordinate_array(self):
+        """
+        Test the conversion to a CoordinateArray with times relative to the start.
+        """
+        coordinates = read_gpx(self.content).to_coordinate_array()
+        self.assertEqual(coordinates[0].time, 0)
+        self.assertEqual(coordinates[1].time, 55000)
+        self.assertEqual(coordinates[1].alt, 2375)
+
+    def test_invalid_document(self):
+        """
+        Test that a malformed document raises an error.
+        """
+        with self.assertRaises(ValueError):
+            read_gpx(self.content[:200])
+
+
+if __name__ == '__main__':
+    unittest.main()
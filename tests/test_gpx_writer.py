@@ -0,0 +1,94 @@
+import io
+import os
+import tempfile
+import unittest
+from datetime import (
+    datetime,
+    timezone,
+)
+
+import gpxpy
+
+from kompy import (
+    Coordinate,
+    CoordinateArray,
+)
+from kompy.constants.waypoint import Waypoint
+from kompy.gpx_writer import (
+    iter_gpx,
+    write_gpx,
+)
+
+
+class TestGpxWriter(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a track for the tests.
+        """
+        self.coordinates = [
+            Coordinate(lat=46.57608333, lon=8.89241667, alt=2376.0, time=0),
+            Coordinate(lat=46.57619444, lon=8.89252778, alt=2375.0, time=55500),
+            Coordinate(lat=46.57641667, lon=8.89266667),
+        ]
+        self.start_time = datetime(2007, 10, 14, 10, 9, 57, tzinfo=timezone.utc)
+
+    def test_round_trip_with_gpxpy(self):
+        """
+        Test that the written document is read back by gpxpy.
+        """
+        destination = io.BytesIO()
+        written = write_gpx(
+            destination=destination,
+            coordinates=self.coordinates,
+            waypoints=[Waypoint(location=Coordinate(lat=46.5, lon=8.8), index=0, reference='hl:1 & 2')],
+            name='Example <gpx>',
+            start_time=self.start_time,
+            chunk_points=1,
+        )
+        self.assertEqual(written, len(destination.getvalue()))
+        gpx = gpxpy.parse(destination.getvalue().decode('utf-8'))
+        self.assertEqual(gpx.tracks[0].name, 'Example <gpx>')
+        self.assertEqual(gpx.waypoints[0].name, 'hl:1 & 2')
+        points = gpx.tracks[0].segments[0].points
+        self.assertEqual(
+            [(p.latitude, p.longitude, p.elevation) for p in points],
+            [(c.lat, c.lon, c.alt) for c in self.coordinates],
+        )
+        self.assertEqual(points[0].time, self.start_time)
+        self.assertEqual(points[1].time, datetime(2007, 10, 14, 10, 10, 52, 500000, tzinfo=timezone.utc))
+        self.assertIsNone(points[2].time)
+
+    def test_chunks(self):
+        """
+        Test that the document is split in chunks of the requested number of points.
+        """
+        coordinates = CoordinateArray.from_coordinates(self.coordinates)
+        chunks = list(iter_gpx(coordinates=coordinates, chunk_points=2))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(len(gpxpy.parse(b''.join(chunks).decode('utf-8')).tracks[0].segments[0].points), 3)
+
+    def test_invalid_chunk_size(self):
+        """
+        Test that an invalid chunk size raises an error.
+        """
+        with self.assertRaises(ValueError):
+            iter_gpx(coordinates=self.coordinates, chunk_points=0)
+
+    def test_invalid_chunk_size_keeps_the_destination(self):
+        """
+        Test that an invalid chunk size raises an error before the destination file is opened.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'track.gpx')
+            write_gpx(path, coordinates=self.coordinates)
+            with open(path, 'rb') as f:
+                document = f.read()
+            with self.assertRaises(ValueError):
+                write_gpx(path, coordinates=self.coordinates, chunk_points=-1)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), document)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+import unittest
+
+from kompy import KomootConnector
+from kompy.constants.endpoints import Endpoints
+from kompy.constants.hydration_targets import HydrationTargets
+from kompy.constants.tour_object_types import TourObjectTypes
+from kompy.hedging import HedgingPolicy
+from kompy.metrics import (
+    InMemoryMetrics,
+    to_prometheus,
+)
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+
+
+class _SlowFirstCall:
+    def __init__(self, slow: float, fail_first: bool = False):
+        """
+        Function whose first call is slow, or fails, and whose next calls answer at once.
+        """
+        self.slow = slow
+        self.fail_first = fail_first
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> int:
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if call == 1:
+            time.sleep(self.slow)
+            if self.fail_first:
+                raise ConnectionError('first call failed')
+        return call
+
+
+class TestHedgingPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = HedgingPolicy(budget=1.0, burst=1, initial_delay=0.02)
+        self.addCleanup(self.policy.close)
+
+    def test_slow_call_is_hedged(self):
+        function = _SlowFirstCall(slow=0.5)
+        discarded = []
+        start = time.perf_counter()
+        self.assertEqual(self.policy.call(Endpoints.TOUR, function, discard=discarded.append), 2)
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertEqual((self.policy.hedges, self.policy.hedge_wins), (1, 1))
+        time.sleep(0.6)
+        self.assertEqual(discarded, [1])
+
+    def test_fast_call_is_not_hedged(self):
+        self.assertEqual(self.policy.call(Endpoints.TOUR, lambda: 'fast'), 'fast')
+        self.assertEqual(self.policy.hedges, 0)
+
+    def test_failed_call_falls_back_to_hedge(self):
+        function = _SlowFirstCall(slow=0.05, fail_first=True)
+        self.assertEqual(self.policy.call(Endpoints.TOUR, function), 2)
+
+    def test_budget_caps_hedges(self):
+        policy = HedgingPolicy(budget=0.25, burst=1, initial_delay=0.0, min_samples=100)
+        self.addCleanup(policy.close)
+        for _ in range(20):
+            policy.call(Endpoints.TOUR, lambda: time.sleep(0.002))
+        self.assertEqual(policy.requests, 20)
+        self.assertEqual(policy.hedges, 5)
+
+    def test_delay_follows_observed_latencies(self):
+        policy = HedgingPolicy(percentile=90, min_samples=10)
+        self.addCleanup(policy.close)
+        self.assertIsNone(policy.delay(Endpoints.TOUR))
+        for latency in range(1, 11):
+            policy.observe(Endpoints.TOUR, latency / 100)
+        self.assertAlmostEqual(policy.delay(Endpoints.TOUR), 0.09)
+        self.assertIsNone(policy.delay(Endpoints.TOUR_GPX))
+
+    def test_applies_to_tour_gets(self):
+        self.assertTrue(self.policy.applies('GET', 'https://api.komoot.de/v007/tours/1.gpx'))
+        self.assertTrue(self.policy.applies('get', 'https://api.komoot.de/v007/tours/1/coordinates'))
+        self.assertFalse(self.policy.applies('PATCH', 'https://api.komoot.de/v007/tours/1'))
+        self.assertFalse(self.policy.applies('GET', 'https://api.komoot.de/v007/users/1/tours/'))
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            HedgingPolicy(percentile=100)
+        with self.assertRaises(ValueError):
+            HedgingPolicy(budget=2)
+
+
+class TestConnectorHedging(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.config = ServerConfig(tours=2, points=50, tail_rate=0.3, tail_latency=0.3, seed=1)
+        self.server = KomootServer(self.config)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_hedged_fetches(self):
+        policy = HedgingPolicy(budget=1.0, initial_delay=0.05)
+        self.addCleanup(policy.close)
+        connector = KomootConnector(email=self.config.email, password=self.config.password, hedging=policy)
+        tour_id = self.server.dataset.tour_ids[0]
+        for _ in range(10):
+            records = connector.get_tour_by_id(tour_id, object_type=TourObjectTypes.FIT_RECORDS)
+            self.assertEqual(len(records), 50)
+        tour = connector.get_tour_by_id(tour_id)
+        self.assertTrue(tour.generate_coordinates(authentication=connector.authentication, as_array=True,
+                                                  session=policy.session()))
+        self.assertEqual(len(tour.coordinates), 50)
+        self.assertEqual(policy.requests, 12)
+        self.assertGreater(policy.hedges, 0)
+
+    def test_hedges_are_reported_as_retries(self):
+        policy = HedgingPolicy(budget=1.0, initial_delay=0.05)
+        self.addCleanup(policy.close)
+        metrics = InMemoryMetrics()
+        connector = KomootConnector(email=self.config.email, password=self.config.password, hedging=policy,
+                                    metrics=metrics)
+        tour_id = self.server.dataset.tour_ids[0]
+        for _ in range(10):
+            connector.get_tour_by_id(tour_id, object_type=TourObjectTypes.FIT_RECORDS)
+        tours = [connector.get_tour_by_id(tour_id) for tour_id in self.server.dataset.tour_ids]
+        for _ in range(5):
+            self.assertEqual(connector.hydrate(tours, what=[HydrationTargets.COORDINATES]), {})
+        self.assertGreater(policy.hedges, 0)
+        self.assertEqual(sum(metrics.retries.values()), policy.hedges)
+        self.assertGreater(metrics.retries[Endpoints.TOUR_FIT], 0)
+        self.assertIn('kompy_retries_total{endpoint="tour_fit"}', to_prometheus(metrics))
+
+
+if __name__ == '__main__':
+    unittest.main()
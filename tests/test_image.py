@@ -1,12 +1,24 @@
+import tempfile
 import unittest
+from io import BytesIO
 from unittest.mock import (
     Mock,
     patch,
 )
 
 import requests
+from PIL import Image
 
 from kompy import KomootImage
+from kompy.image_cache import ImageCache
+
+TEMPLATED_URL = 'https://example.com/image.jpg?width={width}&height={height}&crop={crop}'
+
+
+def _jpeg(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color=(200, 100, 50)).save(buffer, format='JPEG')
+    return buffer.getvalue()
 
 
 class TestKomootImage(unittest.TestCase):
@@ -41,6 +53,81 @@ class TestKomootImage(unittest.TestCase):
         komoot_image.load_image()
         self.assertIsNone(komoot_image.image)
 
+    def test_expand_url(self):
+        komoot_image = KomootImage(TEMPLATED_URL, True)
+        self.assertEqual(
+            komoot_image.expand_url(width=200, height=100, crop=True),
+            'https://example.com/image.jpg?width=200&height=100&crop=true',
+        )
+        self.assertEqual(komoot_image.expand_url(width=200), 'https://example.com/image.jpg?width=200&crop=false')
+        self.assertEqual(komoot_image.expand_url(), 'https://example.com/image.jpg')
+
+    def test_expand_url_not_templated(self):
+        komoot_image = KomootImage('https://example.com/image.jpg?width={width}', False)
+        self.assertEqual(komoot_image.expand_url(width=200), 'https://example.com/image.jpg?width={width}')
+
+    @patch('requests.get')
+    def test_load_image_reduced(self, mock_get):
+        mock_response = Mock()
+        mock_response.content = _jpeg(800, 400)
+        mock_get.return_value = mock_response
+
+        komoot_image = KomootImage('https://example.com/image.jpg', False)
+        komoot_image.load_image(width=200)
+
+        self.assertLessEqual(komoot_image.image.width, 400)
+        self.assertGreaterEqual(komoot_image.image.width, 200)
+
+    @patch('requests.get')
+    def test_load_image_cached(self, mock_get):
+        mock_response = Mock()
+        mock_response.content = _jpeg(64, 32)
+        mock_get.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ImageCache(directory=directory)
+            for _ in range(3):
+                komoot_image = KomootImage(TEMPLATED_URL, True, client_hash='hash')
+                komoot_image.load_image(width=64, height=32, cache=cache)
+                self.assertEqual(komoot_image.image.size, (64, 32))
+
+        mock_get.assert_called_once_with('https://example.com/image.jpg?width=64&height=32&crop=false')
+
+    @patch('requests.get')
+    def test_invalid_image_is_not_cached(self, mock_get):
+        mock_response = Mock()
+        mock_get.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ImageCache(directory=directory)
+            for content in (b'<html>Not found</html>', _jpeg(64, 32)[:200]):
+                mock_response.content = content
+                komoot_image = KomootImage(TEMPLATED_URL, True, client_hash='hash')
+                with self.assertLogs(level='ERROR'):
+                    self.assertFalse(komoot_image.load_image(cache=cache))
+                self.assertIsNone(komoot_image.image)
+                self.assertEqual(len(cache), 0)
+
+            mock_response.content = _jpeg(64, 32)
+            self.assertTrue(KomootImage(TEMPLATED_URL, True, client_hash='hash').load_image(cache=cache))
+            self.assertEqual(mock_get.call_count, 3)
+
+    @patch('requests.get')
+    def test_invalid_cached_image_is_downloaded_again(self, mock_get):
+        mock_response = Mock()
+        mock_response.content = _jpeg(64, 32)
+        mock_get.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ImageCache(directory=directory)
+            cache.put(ImageCache.key(url='https://example.com/image.jpg', client_hash='hash'), b'corrupt')
+            komoot_image = KomootImage(TEMPLATED_URL, True, client_hash='hash')
+            with self.assertLogs(level='WARNING'):
+                self.assertTrue(komoot_image.load_image(cache=cache))
+            self.assertEqual(komoot_image.image.size, (64, 32))
+            self.assertTrue(KomootImage(TEMPLATED_URL, True, client_hash='hash').load_image(cache=cache))
+            mock_get.assert_called_once_with('https://example.com/image.jpg')
+
 
 if __name__ == '__main__':
     unittest.main()
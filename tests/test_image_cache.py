@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from kompy.image_cache import ImageCache
+
+
+class TestImageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_put_and_get(self):
+        cache = ImageCache(directory=self.directory.name, max_bytes=1024)
+        key = ImageCache.key(url='https://example.com/a.jpg', client_hash='hash')
+        self.assertIsNone(cache.get(key))
+        cache.put(key, b'image_data')
+        self.assertEqual(cache.get(key), b'image_data')
+        self.assertEqual(cache.size, len(b'image_data'))
+
+    def test_key_depends_on_client_hash(self):
+        self.assertNotEqual(
+            ImageCache.key(url='https://example.com/a.jpg', client_hash='a'),
+            ImageCache.key(url='https://example.com/a.jpg', client_hash='b'),
+        )
+
+    def test_evicts_least_recently_used(self):
+        cache = ImageCache(directory=self.directory.name, max_bytes=20)
+        cache.put('a', b'0' * 8)
+        cache.put('b', b'1' * 8)
+        cache.get('a')
+        cache.put('c', b'2' * 8)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'0' * 8)
+        self.assertEqual(cache.get('c'), b'2' * 8)
+        self.assertLessEqual(cache.size, 20)
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, 'b.img')))
+
+    def test_persists_across_instances(self):
+        ImageCache(directory=self.directory.name, max_bytes=1024).put('a', b'image_data')
+        cache = ImageCache(directory=self.directory.name, max_bytes=1024)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get('a'), b'image_data')
+
+    def test_skips_images_larger_than_the_cache(self):
+        cache = ImageCache(directory=self.directory.name, max_bytes=4)
+        cache.put('a', b'image_data')
+        self.assertIsNone(cache.get('a'))
+
+    def test_clear(self):
+        cache = ImageCache(directory=self.directory.name, max_bytes=1024)
+        cache.put('a', b'image_data')
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get('a'))
+
+    def test_invalid_max_bytes(self):
+        with self.assertRaises(ValueError):
+            ImageCache(directory=self.directory.name, max_bytes=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
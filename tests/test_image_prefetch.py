@@ -0,0 +1,77 @@
+import unittest
+from io import BytesIO
+from unittest.mock import (
+    MagicMock,
+    patch,
+)
+
+from PIL import Image
+from requests import Response
+
+from kompy import KomootImage
+from kompy.image_prefetch import (
+    ImageMemoryBudget,
+    decoded_size,
+    prefetch_images,
+)
+
+
+def _png_response(width, height):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color=(10, 20, 30)).save(buffer, format='PNG')
+    response = Response()
+    response.status_code = 200
+    response._content = buffer.getvalue()
+    return response
+
+
+class TestImagePrefetch(unittest.TestCase):
+
+    @patch('requests.Session.get')
+    def test_prefetch_images(self, mock_session_get: MagicMock):
+        mock_session_get.return_value = _png_response(8, 4)
+        images = [KomootImage(f'https://example.com/{index}.png', False) for index in range(5)]
+        progress = []
+
+        failed = prefetch_images(
+            images=images,
+            concurrency=3,
+            progress_callback=lambda completed, total, *_: progress.append((completed, total)),
+        )
+
+        self.assertEqual(failed, [])
+        self.assertTrue(all(image.image.size == (8, 4) for image in images))
+        self.assertEqual(sorted(progress), [(index, 5) for index in range(1, 6)])
+
+    @patch('requests.Session.get')
+    def test_prefetch_images_failure(self, mock_session_get: MagicMock):
+        response = Response()
+        response.status_code = 404
+        mock_session_get.return_value = response
+        images = [KomootImage('https://example.com/missing.png', False)]
+
+        failed = prefetch_images(images=images)
+
+        self.assertEqual(failed, images)
+        self.assertIsNone(images[0].image)
+
+    @patch('requests.Session.get')
+    def test_prefetch_images_memory_budget(self, mock_session_get: MagicMock):
+        mock_session_get.return_value = _png_response(8, 4)
+        images = [KomootImage(f'https://example.com/{index}.png', False) for index in range(5)]
+        budget = ImageMemoryBudget(max_bytes=2 * 8 * 4 * 3)
+
+        prefetch_images(images=images, budget=budget, concurrency=1)
+
+        self.assertEqual(len(budget), 2)
+        self.assertEqual(budget.size, 2 * 8 * 4 * 3)
+        self.assertEqual(sum(image.image is not None for image in images), 2)
+        self.assertEqual(decoded_size(images[0]), 0)
+
+    def test_invalid_memory_budget(self):
+        with self.assertRaises(ValueError):
+            ImageMemoryBudget(max_bytes=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import subprocess
+import sys
+import unittest
+
+HEAVY_MODULES = ('requests', 'gpxpy', 'PIL', 'fit_tool', 'dateutil')
+
+
+def _loaded_heavy_modules(statement: str):
+    output = subprocess.run(
+        [sys.executable, '-c', f'import sys\n{statement}\nprint(sorted(set(sys.modules) & {set(HEAVY_MODULES)!r}))'],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return eval(output)
+
+
+class TestImports(unittest.TestCase):
+
+    def test_import_kompy_is_lazy(self):
+        self.assertEqual(_loaded_heavy_modules('import kompy'), [])
+
+    def test_models_do_not_load_heavy_dependencies(self):
+        statement = 'from kompy import Coordinate, CoordinateArray, KomootImage, Tour\nimport kompy.constants'
+        self.assertEqual(_loaded_heavy_modules(statement), [])
+
+    def test_connector_loads_requests(self):
+        self.assertIn('requests', _loaded_heavy_modules('from kompy import KomootConnector'))
+
+    def test_unknown_attribute(self):
+        import kompy
+
+        with self.assertRaises(AttributeError):
+            kompy.NotAnAttribute
+
+
+if __name__ == '__main__':
+    unittest.main()
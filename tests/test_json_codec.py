@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import patch
+
+from requests import Response
+
+from kompy import json_codec
+from kompy.json_codec import (
+    JsonCodec,
+    OrjsonCodec,
+)
+
+DOCUMENT = {'id': '12345', 'name': 'Gita al lago', 'distance': 10.5, 'tags': [1, None, True]}
+
+
+class TestJsonCodec(unittest.TestCase):
+
+    def _check_codec(self, codec):
+        encoded = codec.dumps(DOCUMENT)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(codec.loads(encoded), DOCUMENT)
+        self.assertEqual(codec.loads(encoded.decode('utf-8')), DOCUMENT)
+        self.assertEqual(codec.loads(memoryview(encoded)), DOCUMENT)
+
+    def test_stdlib_codec(self):
+        self._check_codec(JsonCodec())
+
+    def test_orjson_codec(self):
+        try:
+            codec = OrjsonCodec()
+        except ImportError:
+            self.skipTest('orjson is not installed')
+        self._check_codec(codec)
+
+    def test_set_codec(self):
+        previous = json_codec.get_codec()
+        self.addCleanup(json_codec.set_codec, previous)
+        codec = JsonCodec()
+        json_codec.set_codec(codec)
+        self.assertIs(json_codec.get_codec(), codec)
+
+    def test_response_json_decodes_body_once(self):
+        response = Response()
+        response.status_code = 200
+        response._content = JsonCodec().dumps(DOCUMENT)
+        with patch.object(json_codec.get_codec(), 'loads', wraps=json_codec.get_codec().loads) as mock_loads:
+            self.assertEqual(json_codec.response_json(response), DOCUMENT)
+        mock_loads.assert_called_once_with(response.content)
+
+
+if __name__ == '__main__':
+    unittest.main()
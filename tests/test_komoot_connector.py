@@ -1,10 +1,15 @@
+import json
 import os
 import unittest
 from unittest.mock import patch, MagicMock
 import gpxpy
+from requests import Response
 
 from kompy import KomootConnector, Tour
+from kompy.constants.hydration_targets import HydrationTargets
 from kompy.constants.privacy_status import PrivacyStatus
+from kompy.constants.tour_object_types import TourObjectTypes
+from kompy.gpx_reader import GpxColumns
 from tests.resources.mock_response_builder import mock_response_builder
 
 
@@ -82,6 +87,21 @@ class TestKomootConnector(unittest.TestCase):
         tour = self.connector.get_tour_by_id(tour_identifier=self.valid_id)
         self.assertIsInstance(tour, Tour)
 
+    @patch('requests.get')
+    def test_get_tour_by_id_as_gpx_columns(self, mock_get: MagicMock):
+        mock_response = Response()
+        mock_response.status_code = 200
+        with open(f'{os.path.dirname(os.path.realpath(__file__))}/resources/example.gpx', 'rb') as f:
+            mock_response._content = f.read()
+        mock_response._content_consumed = True
+        mock_get.return_value = mock_response
+        columns = self.connector.get_tour_by_id(
+            tour_identifier=self.valid_id,
+            object_type=TourObjectTypes.GPX_COLUMNS,
+        )
+        self.assertIsInstance(columns, GpxColumns)
+        self.assertEqual(len(columns), 7)
+
     @patch('requests.post')
     def test_upload_tour(self, mock_get: MagicMock):
         mock_response_builder(
@@ -93,6 +113,20 @@ class TestKomootConnector(unittest.TestCase):
         ret = self.connector.upload_tour(gpx_data, "Example gpx", "hike", PrivacyStatus.PRIVATE)
         self.assertEqual(ret, True)
 
+    @patch('requests.post')
+    def test_upload_tour_from_bytes(self, mock_post: MagicMock):
+        mock_response_builder(
+            mock_get=mock_post,
+            mock_status_code=201,
+            json_file_path=f'{os.path.dirname(os.path.realpath(__file__))}/resources/dummy_response_with_id.json',
+        )
+        with open(f'{os.path.dirname(os.path.realpath(__file__))}/resources/example.gpx', 'rb') as f:
+            gpx_bytes = f.read()
+        ret = self.connector.upload_tour(gpx_bytes, "hike", "Example gpx", status=PrivacyStatus.PRIVATE)
+        self.assertEqual(ret, True)
+        self.assertEqual(mock_post.call_args.kwargs['params']['data_type'], 'gpx')
+        self.assertEqual(mock_post.call_args.kwargs['data'], gpx_bytes)
+
     @patch('requests.patch')
     def test_change_tour(self, mock_get: MagicMock):
         mock_response_builder(
@@ -112,9 +146,9 @@ class TestKomootConnector(unittest.TestCase):
             '_embedded': {'tours': valid_tours + [malformed_tour]},
             'page': {'totalPages': 1, 'number': 0},
         }
-        mock_response = MagicMock()
+        mock_response = Response()
         mock_response.status_code = 200
-        mock_response.json.return_value = page_response
+        mock_response._content = json.dumps(page_response).encode('utf-8')
         mock_get.return_value = mock_response
 
         tours = self.connector.get_tours(limit=10)
@@ -124,6 +158,35 @@ class TestKomootConnector(unittest.TestCase):
         for tour in tours:
             self.assertIsInstance(tour, Tour)
 
+    @patch('requests.Session.get')
+    def test_hydrate(self, mock_session_get: MagicMock):
+        mock_response = Response()
+        mock_response.status_code = 200
+        mock_response._content = json.dumps({'items': [{'lat': 44.2, 'lng': 7.3, 'alt': 900.0, 't': 0}]}).encode()
+        mock_response._content_consumed = True
+        mock_session_get.return_value = mock_response
+        tours = [Tour(_minimal_valid_tour(tour_id)) for tour_id in range(3)]
+        for tour in tours[:2]:
+            tour.coordinates_link = f'https://api.komoot.de/v007/tours/{tour.id}/coordinates'
+        progress = []
+
+        errors = self.connector.hydrate(
+            tours=tours,
+            what=[HydrationTargets.COORDINATES],
+            concurrency=2,
+            progress_callback=lambda completed, total, *_: progress.append((completed, total)),
+        )
+
+        self.assertEqual(len(tours[0].coordinates), 1)
+        self.assertEqual(len(tours[1].coordinates), 1)
+        self.assertEqual(list(errors), [tours[2].id])
+        self.assertIn(HydrationTargets.COORDINATES, errors[tours[2].id])
+        self.assertEqual(sorted(progress), [(1, 3), (2, 3), (3, 3)])
+
+    def test_hydrate_invalid_target(self):
+        with self.assertRaises(ValueError):
+            self.connector.hydrate(tours=[], what=['invalid'])
+
     @patch('requests.delete')
     def test_delete_tour(self, mock_get: MagicMock):
         mock_response_builder(
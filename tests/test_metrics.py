@@ -0,0 +1,122 @@
+import logging
+import math
+import unittest
+
+from kompy import KomootConnector
+from kompy.constants.endpoints import Endpoints
+from kompy.constants.hydration_targets import HydrationTargets
+from kompy.constants.tour_constants import TourSortField
+from kompy.constants.tour_object_types import TourObjectTypes
+from kompy.metrics import (
+    Histogram,
+    InMemoryMetrics,
+    MetricsHook,
+    to_prometheus,
+)
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_observe(self):
+        histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+        for value in (0.5, 1.0, 1.5, 3.0, 10.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1, 1])
+        self.assertEqual(histogram.cumulative_counts(), [2, 3, 4, 5])
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.sum, 16.0)
+
+    def test_quantile(self):
+        histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+        self.assertTrue(math.isnan(histogram.quantile(0.5)))
+        for value in (0.5, 0.5, 1.5, 1.5):
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 1.0)
+        self.assertEqual(histogram.quantile(0.75), 1.5)
+        histogram.observe(100.0)
+        self.assertEqual(histogram.quantile(1.0), 4.0)
+        with self.assertRaises(ValueError):
+            histogram.quantile(2)
+
+
+class TestInMemoryMetrics(unittest.TestCase):
+
+    def test_record_and_export(self):
+        metrics = InMemoryMetrics(buckets=(0.1, 1.0))
+        metrics.record_request(Endpoints.TOUR, 'get', 200, 0.05, 0, 1000)
+        metrics.record_request(Endpoints.TOUR, 'get', None, 2.0, 0, 0)
+        metrics.record_retry(Endpoints.TOUR)
+        metrics.record_operation('get_tour_by_id', 0.5, failed=True)
+        metrics.record_parse('get_tour_by_id_kompy', 0.01, items=1)
+        self.assertEqual(metrics.requests, {('tour', 'get', '200'): 1, ('tour', 'get', 'error'): 1})
+        self.assertEqual(metrics.bytes_received, {'tour': 1000})
+        self.assertEqual(metrics.operation_errors, {'get_tour_by_id': 1})
+
+        exported = to_prometheus(metrics)
+        self.assertIn('# TYPE kompy_request_duration_seconds histogram', exported)
+        self.assertIn('kompy_request_duration_seconds_bucket{endpoint="tour",method="get",le="0.1"} 1', exported)
+        self.assertIn('kompy_request_duration_seconds_bucket{endpoint="tour",method="get",le="+Inf"} 2', exported)
+        self.assertIn('kompy_request_duration_seconds_count{endpoint="tour",method="get"} 2', exported)
+        self.assertIn('kompy_requests_total{endpoint="tour",method="get",status="error"} 1', exported)
+        self.assertIn('kompy_response_bytes_total{endpoint="tour"} 1000', exported)
+        self.assertIn('kompy_retries_total{endpoint="tour"} 1', exported)
+        self.assertIn('kompy_parsed_items_total{operation="get_tour_by_id_kompy"} 1', exported)
+
+        metrics.reset()
+        self.assertEqual(metrics.requests, {})
+
+    def test_label_escaping(self):
+        metrics = InMemoryMetrics()
+        metrics.record_operation('a "quoted"\nname', 0.1, failed=False)
+        self.assertIn('operation="a \\"quoted\\"\\nname"', to_prometheus(metrics))
+
+    def test_base_hook_ignores_measurements(self):
+        hook = MetricsHook()
+        hook.record_request(Endpoints.TOUR, 'get', 200, 0.1, 0, 0)
+        hook.record_operation('get_tours', 0.1, failed=False)
+
+
+class TestConnectorMetrics(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.config = ServerConfig(tours=5, points=50, page_size=2)
+        self.server = KomootServer(self.config)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.metrics = InMemoryMetrics()
+        self.connector = KomootConnector(email=self.config.email, password=self.config.password, metrics=self.metrics)
+
+    def test_operations_are_measured(self):
+        tours = self.connector.get_tours(user_identifier=self.config.username, sort_field=TourSortField.DATE)
+        self.connector.get_tour_by_id(tour_identifier=tours[0].id, object_type=TourObjectTypes.FIT_RECORDS)
+        with self.assertRaises(ValueError):
+            self.connector.get_tour_by_id(tour_identifier='1')
+        self.connector.hydrate(tours=tours, what=[HydrationTargets.COORDINATES])
+
+        self.assertEqual(self.metrics.requests[Endpoints.LOGIN, 'get', '200'], 1)
+        self.assertEqual(self.metrics.requests[Endpoints.LIST_TOURS, 'get', '200'], 3)
+        self.assertEqual(self.metrics.requests[Endpoints.TOUR_FIT, 'get', '200'], 1)
+        self.assertEqual(self.metrics.requests[Endpoints.TOUR, 'get', '404'], 1)
+        self.assertEqual(self.metrics.requests[Endpoints.TOUR_COORDINATES, 'get', '200'], 5)
+        self.assertEqual(self.metrics.bytes_received[Endpoints.TOUR_FIT], len(self.server.dataset.fit(tours[0].id)))
+        self.assertEqual(self.metrics.parsed_items, {'get_tours': 5, 'get_tour_by_id_fit_records': 1})
+        self.assertEqual(self.metrics.operation_errors, {'get_tour_by_id': 1})
+        self.assertEqual(self.metrics.operation_duration['hydrate_coordinates'].count, 5)
+        for operation in ('login', 'get_tours', 'get_tour_by_id', 'hydrate'):
+            self.assertIn(operation, self.metrics.operation_duration)
+
+    def test_upload_is_measured(self):
+        gpx = self.server.dataset.gpx(self.server.dataset.tour_ids[0])
+        self.connector.upload_tour(tour_object=gpx, activity_type='hike', tour_name='Upload')
+        self.assertEqual(self.metrics.requests[Endpoints.UPLOAD_TOUR, 'post', '201'], 1)
+        self.assertEqual(self.metrics.bytes_sent[Endpoints.UPLOAD_TOUR], len(gpx))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,299 @@
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from kompy import KomootConnector
+from kompy.constants.hydration_targets import HydrationTargets
+from kompy.constants.tour_constants import TourSortField
+from kompy.coordinate_archive import CoordinateArchive
+from kompy.pipeline import (
+    Pipeline,
+    Stage,
+    archive_stage,
+    hydrate_stage,
+    parse_stage,
+    tour_pages_stage,
+)
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def test_stages(self):
+        pipeline = Pipeline([
+            Stage('square', lambda x: x * x, workers=3),
+            Stage('odd', lambda x: x if x % 2 else None),
+            Stage('digits', lambda x: str(x), expand=True),
+        ])
+        digits = list(pipeline.run(range(10)))
+        self.assertEqual(sorted(digits), sorted('1' '9' '25' '49' '81'))
+        self.assertEqual(pipeline.stats['square'].received, 10)
+        self.assertEqual(pipeline.stats['odd'].emitted, 5)
+        self.assertEqual(pipeline.stats['digits'].emitted, 8)
+        self.assertFalse(pipeline.cancelled)
+
+    def test_stages_run_concurrently(self):
+        # The first stage holds items 2 and 3 and the second stage items 0 and 1 until all four are being processed,
+        # which only happens if both workers of both stages run at the same time.
+        barrier = threading.Barrier(4, timeout=10)
+
+        def wait_for(held):
+            def function(x):
+                if x in held:
+                    barrier.wait()
+                return x
+            return function
+
+        pipeline = Pipeline([Stage('first', wait_for({2, 3}), workers=2), Stage('second', wait_for({0, 1}), workers=2)])
+        self.assertEqual(sorted(pipeline.run(range(8))), list(range(8)))
+        self.assertFalse(barrier.broken)
+        self.assertEqual(pipeline.stats['second'].received, 8)
+        self.assertGreater(pipeline.stats['first'].utilization, 0.0)
+
+    def test_backpressure(self):
+        produced = []
+
+        def items():
+            for item in range(1000):
+                produced.append(item)
+                yield item
+
+        pipeline = Pipeline([Stage('identity', lambda x: x)], queue_size=2)
+        results = pipeline.run(items())
+        self.assertEqual(next(results), 0)
+        time.sleep(0.1)
+        # The input queue, the worker and the output queue hold a few items, the others are not produced yet.
+        self.assertLess(len(produced), 10)
+        results.close()
+        self.assertTrue(pipeline.cancelled)
+        self.assertLess(len(produced), 10)
+
+    def test_cancel(self):
+        pipeline = Pipeline([Stage('identity', lambda x: x, workers=2)], queue_size=4)
+        results = []
+        for item in pipeline.run(iter(range(1000))):
+            results.append(item)
+            if len(results) == 3:
+                pipeline.cancel()
+        self.assertLess(len(results), 20)
+        self.assertTrue(pipeline.cancelled)
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name.startswith('kompy-pipeline')])
+
+    def test_error_cancels_the_pipeline(self):
+        pipeline = Pipeline([Stage('invert', lambda x: 1 / x, workers=2), Stage('identity', lambda x: x)])
+        with self.assertRaises(ZeroDivisionError):
+            list(pipeline.run(range(-100, 100)))
+        self.assertTrue(pipeline.cancelled)
+        # The pipeline can be run again.
+        self.assertEqual(list(pipeline.run([2])), [0.5])
+
+    def test_skip_errors(self):
+        pipeline = Pipeline([Stage('invert', lambda x: 1 / x, skip_errors=True)])
+        self.assertEqual(sorted(pipeline.run([-1, 0, 1])), [-1, 1])
+        self.assertEqual(pipeline.stats['invert'].failed, 1)
+
+    def test_on_close(self):
+        closed = []
+        pipeline = Pipeline([Stage('identity', lambda x: x, workers=3, on_close=lambda: closed.append(True))])
+        list(pipeline.run(range(5)))
+        self.assertEqual(closed, [True])
+
+    def test_on_open(self):
+        events = []
+        pipeline = Pipeline([
+            Stage('first', events.append, on_open=lambda: events.append('open'),
+                  on_close=lambda: events.append('close')),
+        ])
+        for _ in range(2):
+            list(pipeline.run([1]))
+        self.assertEqual(events, ['open', 1, 'close', 'open', 1, 'close'])
+
+    def test_failed_open_closes_the_opened_stages(self):
+        closed = []
+
+        def fail():
+            raise OSError('no connection')
+
+        pipeline = Pipeline([
+            Stage('first', lambda x: x, on_open=lambda: None, on_close=lambda: closed.append('first')),
+            Stage('second', lambda x: x, on_open=fail, on_close=lambda: closed.append('second')),
+        ])
+        with self.assertRaises(OSError):
+            list(pipeline.run([1]))
+        self.assertEqual(closed, ['first'])
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name.startswith('kompy-pipeline')])
+
+    def test_flush(self):
+        batch = []
+
+        def pairs(x):
+            batch.append(x)
+            if len(batch) < 2:
+                return []
+            pair = tuple(batch)
+            batch.clear()
+            return [pair]
+
+        pipeline = Pipeline([
+            Stage('pairs', pairs, expand=True, flush=lambda: [tuple(batch)] if batch else []),
+            Stage('identity', lambda x: x),
+        ])
+        self.assertEqual(list(pipeline.run(range(5))), [(0, 1), (2, 3), (4,)])
+        self.assertEqual(pipeline.stats['pairs'].emitted, 3)
+
+    def test_already_running(self):
+        pipeline = Pipeline([Stage('identity', lambda x: x)])
+        results = pipeline.run(range(100))
+        next(results)
+        with self.assertRaises(RuntimeError):
+            next(pipeline.run(range(3)))
+        results.close()
+
+    def test_invalid_pipeline(self):
+        with self.assertRaises(ValueError):
+            Pipeline([])
+        with self.assertRaises(ValueError):
+            Pipeline([Stage('identity', lambda x: x), Stage('identity', lambda x: x)])
+        with self.assertRaises(ValueError):
+            Pipeline([Stage('identity', lambda x: x)], queue_size=0)
+        with self.assertRaises(ValueError):
+            Stage('identity', lambda x: x, workers=0)
+
+
+class TestConnectorPipeline(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.config = ServerConfig(tours=40, points=100, page_size=5, latency=0.02)
+        self.server = KomootServer(self.config)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.connector = KomootConnector(email=self.config.email, password=self.config.password)
+
+    def _pipeline(self, **kwargs) -> Pipeline:
+        return Pipeline([
+            tour_pages_stage(self.connector, sort_field=TourSortField.DATE),
+            parse_stage(),
+            hydrate_stage(self.connector, **kwargs),
+        ])
+
+    def test_account(self):
+        pipeline = self._pipeline(what=[HydrationTargets.COORDINATES, HydrationTargets.GPX_COLUMNS])
+        tours = list(pipeline.run([self.config.username]))
+        self.assertEqual(sorted(tour.id for tour in tours), sorted(self.server.dataset.tour_ids))
+        self.assertTrue(all(len(tour.coordinates) == len(tour.gpx_columns) for tour in tours))
+        self.assertEqual(pipeline.stats['pages'].emitted, 8)
+        self.assertEqual(pipeline.stats['parse'].emitted, 40)
+        self.assertEqual(pipeline.stats['hydrate'].emitted, 40)
+
+    def test_stages_overlap(self):
+        first_tour = threading.Event()
+        overlapped = []
+
+        def pages(user_identifier):
+            listing = self.connector.iter_tour_pages(user_identifier=user_identifier, sort_field=TourSortField.DATE)
+            for number, page in enumerate(listing):
+                if number == 1:
+                    # The next pages are only fetched once the first tour went through all the stages, which never
+                    # happens if the stages run one after the other.
+                    overlapped.append(first_tour.wait(timeout=10))
+                yield page
+
+        pipeline = Pipeline([
+            Stage('pages', pages, expand=True),
+            parse_stage(),
+            hydrate_stage(self.connector, what=[HydrationTargets.COORDINATES, HydrationTargets.GPX_COLUMNS]),
+        ])
+        tours = pipeline.run([self.config.username])
+        next(tours)
+        first_tour.set()
+        self.assertEqual(len(list(tours)), 39)
+        self.assertEqual(overlapped, [True])
+        self.assertEqual(pipeline.stats['pages'].emitted, 8)
+
+    def test_hydration_errors(self):
+        deleted = self.server.dataset.tour_ids[-1]
+
+        def delete(tour):
+            # The tour is deleted after the last page was listed, while the account is processed.
+            if tour.id == deleted:
+                self.server.dataset.deleted.add(deleted)
+            return tour
+
+        def pipeline(skip_errors: bool) -> Pipeline:
+            return Pipeline([
+                tour_pages_stage(self.connector, sort_field=TourSortField.DATE),
+                parse_stage(),
+                Stage('delete', delete),
+                hydrate_stage(self.connector, skip_errors=skip_errors),
+            ])
+
+        skipping = pipeline(skip_errors=True)
+        tours = list(skipping.run([self.config.username]))
+        self.assertEqual(len(tours), 39)
+        self.assertNotIn(deleted, [tour.id for tour in tours])
+        self.assertEqual(skipping.stats['hydrate'].failed, 1)
+        self.server.dataset.deleted.clear()
+        with self.assertRaises(ValueError):
+            list(pipeline(skip_errors=False).run([self.config.username]))
+
+    def test_store(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with CoordinateArchive(os.path.join(directory.name, 'tracks.kmpa')) as archive:
+            pipeline = Pipeline([
+                tour_pages_stage(self.connector, sort_field=TourSortField.DATE),
+                parse_stage(),
+                hydrate_stage(self.connector),
+                archive_stage(archive, batch_size=16),
+            ])
+            tours = list(pipeline.run([self.config.username]))
+            self.assertEqual(len(tours), 40)
+            self.assertEqual(sorted(archive.tour_ids()), sorted(self.server.dataset.tour_ids))
+            self.assertEqual(list(archive.get(tours[0].id).lat), [point.lat for point in tours[0].coordinates])
+            self.assertEqual(pipeline.stats['store'].emitted, 40)
+        with self.assertRaises(ValueError):
+            archive_stage(archive, batch_size=0)
+
+    def test_run_twice(self):
+        hydration_session = self.connector.hydration_session
+        events = []
+
+        @contextlib.contextmanager
+        def record_session(pool_size):
+            with hydration_session(pool_size=pool_size) as session:
+                events.append('open')
+                yield session
+            events.append('close')
+
+        self.connector.hydration_session = record_session
+        pipeline = self._pipeline()
+        for _ in range(2):
+            self.assertEqual(len(list(pipeline.run([self.config.username]))), 40)
+        # Each run hydrates the tours over its own session.
+        self.assertEqual(events, ['open', 'close', 'open', 'close'])
+
+    def test_invalid_filters(self):
+        pipeline = Pipeline([tour_pages_stage(self.connector, sort_field='altitude')])
+        with self.assertRaises(ValueError):
+            list(pipeline.run([self.config.username]))
+
+    def test_invalid_hydration_target(self):
+        with self.assertRaises(ValueError):
+            hydrate_stage(self.connector, what=['photos'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+from kompy import (
+    Coordinate,
+    CoordinateArray,
+)
+from kompy.constants.waypoint import Waypoint
+from kompy.polyline import (
+    decode_coordinates,
+    decode_tracks,
+    decode_waypoints,
+    encode_coordinates,
+    encode_waypoints,
+)
+
+
+class TestPolyline(unittest.TestCase):
+
+    def test_reference_polyline(self):
+        """
+        Test encoding and decoding the reference polyline of the Google documentation.
+        """
+        coordinates = CoordinateArray(lat=[38.5, 40.7, 43.252], lon=[-120.2, -120.95, -126.453])
+        encoded = encode_coordinates(coordinates)
+        self.assertEqual(encoded, '_p~iF~ps|U_ulLnnqC_mqNvxq`@')
+        self.assertEqual(decode_coordinates(encoded), coordinates)
+
+    def test_altitude_and_time(self):
+        """
+        Test encoding the altitude and time as additional dimensions.
+        """
+        coordinates = [
+            Coordinate(lat=44.24366, lon=7.32223, alt=983.6, time=0),
+            Coordinate(lat=44.24371, lon=7.32208, alt=985.1, time=1500),
+        ]
+        encoded = encode_coordinates(coordinates, with_altitude=True, with_time=True)
+        decoded = decode_tracks({'1': encoded}, with_altitude=True, with_time=True)['1']
+        self.assertEqual(
+            [c.__dict__ for c in decoded],
+            [c.__dict__ for c in coordinates],
+        )
+
+    def test_missing_dimension(self):
+        """
+        Test that requesting a dimension missing from the coordinates raises an error.
+        """
+        with self.assertRaises(ValueError):
+            encode_coordinates([Coordinate(lat=44.2, lon=7.3)], with_altitude=True)
+
+    def test_waypoints(self):
+        """
+        Test encoding and decoding waypoints.
+        """
+        waypoints = [
+            Waypoint(location=Coordinate(lat=44.24366, lon=7.32223), index=0),
+            Waypoint(location=Coordinate(lat=44.24353, lon=7.2275), index=447),
+        ]
+        decoded = decode_waypoints(encode_waypoints(waypoints))
+        self.assertEqual(
+            [(w.location.lat, w.location.lon, w.index) for w in decoded],
+            [(w.location.lat, w.location.lon, w.index) for w in waypoints],
+        )
+
+    def test_invalid_polyline(self):
+        """
+        Test that truncated polylines are rejected.
+        """
+        with self.assertRaises(ValueError):
+            decode_coordinates('_p~iF~ps|U_ulL')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+import unittest
+
+from kompy import KomootConnector
+from kompy.constants.priority_classes import PriorityClasses
+from kompy.constants.tour_constants import TourSortField
+from kompy.scheduler import RequestScheduler
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+
+
+class TestRequestScheduler(unittest.TestCase):
+
+    def _queue(self, scheduler: RequestScheduler, priorities, granted):
+        threads = []
+        for priority in priorities:
+            def request(priority=priority):
+                with scheduler.slot(priority):
+                    granted.append(priority)
+
+            waiting = scheduler.waiting()
+            thread = threading.Thread(target=request)
+            thread.start()
+            while scheduler.waiting() == waiting:
+                time.sleep(0.001)
+            threads.append(thread)
+        return threads
+
+    def test_weighted_fair_order(self):
+        scheduler = RequestScheduler(max_concurrency=1)
+        granted = []
+        with scheduler.slot(PriorityClasses.BULK):
+            threads = self._queue(scheduler, [PriorityClasses.BULK] * 9 + [PriorityClasses.INTERACTIVE] * 9, granted)
+        for thread in threads:
+            thread.join()
+        # The bulk requests queued first do not delay the interactive ones by more than one slot.
+        self.assertEqual(granted[:9].count(PriorityClasses.INTERACTIVE), 8)
+        self.assertEqual(scheduler.granted, {PriorityClasses.INTERACTIVE: 9, PriorityClasses.BULK: 10})
+
+    def test_custom_weights(self):
+        scheduler = RequestScheduler(max_concurrency=1, weights={PriorityClasses.INTERACTIVE: 1.0})
+        granted = []
+        with scheduler.slot(PriorityClasses.BULK):
+            threads = self._queue(scheduler, [PriorityClasses.BULK] * 4 + [PriorityClasses.INTERACTIVE] * 4, granted)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(granted[:4].count(PriorityClasses.INTERACTIVE), 2)
+
+    def test_rate_limit(self):
+        scheduler = RequestScheduler(rate=40, burst=1)
+        start = time.perf_counter()
+        for _ in range(5):
+            with scheduler.slot(PriorityClasses.BULK):
+                pass
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+
+    def test_nested_slots_are_reentrant(self):
+        scheduler = RequestScheduler(max_concurrency=1)
+        with scheduler.slot(PriorityClasses.INTERACTIVE):
+            with scheduler.slot(PriorityClasses.INTERACTIVE):
+                self.assertEqual(scheduler.active, 1)
+        self.assertEqual(scheduler.active, 0)
+
+    def test_slots_of_other_schedulers_are_taken(self):
+        first = RequestScheduler(max_concurrency=1)
+        second = RequestScheduler(max_concurrency=1)
+        with first.slot(PriorityClasses.INTERACTIVE):
+            with second.slot(PriorityClasses.INTERACTIVE):
+                self.assertEqual((first.active, second.active), (1, 1))
+                with first.slot(PriorityClasses.INTERACTIVE):
+                    self.assertEqual(first.active, 1)
+            self.assertEqual(second.active, 0)
+        self.assertEqual(first.active, 0)
+
+    def test_priority_override(self):
+        scheduler = RequestScheduler()
+        with scheduler.priority(PriorityClasses.BULK):
+            with scheduler.slot(PriorityClasses.INTERACTIVE):
+                pass
+        self.assertEqual(scheduler.granted[PriorityClasses.BULK], 1)
+        with self.assertRaises(ValueError):
+            with scheduler.priority('urgent'):
+                pass
+
+    def test_invalid_scheduler(self):
+        with self.assertRaises(ValueError):
+            RequestScheduler(max_concurrency=0)
+        with self.assertRaises(ValueError):
+            RequestScheduler(rate=0)
+        with self.assertRaises(ValueError):
+            RequestScheduler(weights={PriorityClasses.BULK: 0})
+
+
+class TestConnectorScheduling(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.config = ServerConfig(tours=30, points=50, latency=0.05)
+        self.server = KomootServer(self.config)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_interactive_requests_overtake_bulk_work(self):
+        scheduler = RequestScheduler(max_concurrency=2)
+        connector = KomootConnector(email=self.config.email, password=self.config.password, scheduler=scheduler)
+        tours = connector.get_tours(user_identifier=self.config.username, sort_field=TourSortField.DATE)
+        bulk = threading.Thread(target=connector.hydrate, kwargs={'tours': tours, 'concurrency': 8})
+        bulk_start = time.perf_counter()
+        bulk.start()
+        while scheduler.waiting() < 4:
+            time.sleep(0.001)
+        start = time.perf_counter()
+        connector.get_tour_by_id(tour_identifier=tours[0].id)
+        interactive = time.perf_counter() - start
+        bulk.join()
+        self.assertLess(interactive, 0.25)
+        self.assertGreater(time.perf_counter() - bulk_start, 0.6)
+        self.assertEqual(scheduler.active, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
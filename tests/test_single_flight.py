@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from kompy import KomootConnector
+from kompy.constants.tour_object_types import TourObjectTypes
+from kompy.single_flight import SingleFlight
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def _run_concurrently(self, flight: SingleFlight, function, callers: int = 5):
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait()
+            return function()
+
+        with ThreadPoolExecutor(max_workers=callers) as executor:
+            leader = executor.submit(flight.do, 'key', blocking)
+            started.wait()
+            followers = [executor.submit(flight.do, 'key', blocking) for _ in range(callers - 1)]
+            while flight.coalesced < callers - 1:
+                time.sleep(0.001)
+            release.set()
+            return [leader, *followers]
+
+    def test_concurrent_calls_share_the_result(self):
+        flight = SingleFlight()
+        calls = []
+        futures = self._run_concurrently(flight, lambda: calls.append(1) or object())
+        results = [future.result() for future in futures]
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(flight.coalesced, 4)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_concurrent_calls_share_the_error(self):
+        flight = SingleFlight()
+
+        def failing():
+            raise ValueError('boom')
+
+        for future in self._run_concurrently(flight, failing):
+            with self.assertRaises(ValueError):
+                future.result()
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_sequential_calls_are_not_shared(self):
+        flight = SingleFlight()
+        self.assertIsNot(flight.do('key', object), flight.do('key', object))
+        self.assertEqual(flight.coalesced, 0)
+
+
+class TestConnectorCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.config = ServerConfig(tours=2, points=50, latency=0.2)
+        self.server = KomootServer(self.config)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.tour_id = self.server.dataset.tour_ids[0]
+
+    def _fetch_concurrently(self, connector: KomootConnector, callers: int = 6):
+        requests = self.server.requests
+        with ThreadPoolExecutor(max_workers=callers) as executor:
+            results = list(executor.map(
+                lambda _: connector.get_tour_by_id(self.tour_id, object_type=TourObjectTypes.FIT_RECORDS),
+                range(callers),
+            ))
+        return results, self.server.requests - requests
+
+    def test_get_tour_by_id_is_coalesced(self):
+        connector = KomootConnector(email=self.config.email, password=self.config.password)
+        results, requests = self._fetch_concurrently(connector)
+        self.assertEqual(requests, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_coalescing_can_be_disabled(self):
+        connector = KomootConnector(email=self.config.email, password=self.config.password, coalesce=False)
+        _, requests = self._fetch_concurrently(connector)
+        self.assertEqual(requests, 6)
+
+    def test_track_fetches_are_coalesced(self):
+        connector = KomootConnector(email=self.config.email, password=self.config.password)
+        tours = [connector.get_tour_by_id(self.tour_id, object_type=TourObjectTypes.KOMPY) for _ in range(4)]
+        requests = self.server.requests
+        with ThreadPoolExecutor(max_workers=len(tours)) as executor:
+            fetched = list(executor.map(
+                lambda tour: tour.generate_coordinates(authentication=connector.authentication, as_array=True),
+                tours,
+            ))
+        self.assertEqual(fetched, [True] * 4)
+        self.assertEqual(self.server.requests - requests, 1)
+        self.assertEqual(len(tours[3].coordinates), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
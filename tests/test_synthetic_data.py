@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import unittest
+
+from kompy import Tour
+from kompy.coordinate_archive import CoordinateArchive
+from kompy.fit_reader import read_fit_records
+from kompy.gpx_reader import read_gpx
+from tests.resources.synthetic_data import (
+    SyntheticAccount,
+    fit_crc,
+    write_account,
+)
+
+
+class TestSyntheticData(unittest.TestCase):
+
+    def setUp(self):
+        self.account = SyntheticAccount(tours=40, points=300, seed=7)
+
+    def test_documents_are_valid_tours(self):
+        for index in range(self.account.tours):
+            detail = Tour(self.account.detail(index))
+            summary = Tour(self.account.summary(index))
+            self.assertEqual(detail.id, summary.id)
+            self.assertTrue(detail.path)
+            self.assertTrue(detail.segments)
+            self.assertTrue(detail.summary.surfaces)
+            self.assertAlmostEqual(sum(surface.amount for surface in detail.summary.surfaces), 1.0)
+
+    def test_generation_is_deterministic(self):
+        other = SyntheticAccount(tours=40, points=300, seed=7)
+        self.assertEqual(self.account.detail(3), other.detail(3))
+        self.assertEqual(self.account.fit(3), other.fit(3))
+        self.assertNotEqual(self.account.detail(3), SyntheticAccount(tours=40, points=300, seed=8).detail(3))
+
+    def test_pages(self):
+        pages = list(self.account.iter_pages(size=15))
+        self.assertEqual(len(pages), 3)
+        tours = [tour['id'] for page in pages for tour in page['_embedded']['tours']]
+        self.assertEqual(tours, [self.account.tour_id(index) for index in range(40)])
+        self.assertEqual(pages[0]['page']['totalElements'], 40)
+
+    def test_track_matches_document(self):
+        document = self.account.detail(5)
+        track = self.account.track(5)
+        self.assertEqual(track.lat[0], document['start_point']['lat'])
+        self.assertAlmostEqual(track.lat[-1], document['start_point']['lat'])
+        elevation_up = sum(max(0.0, b - a) for a, b in zip(track.alt, track.alt[1:]))
+        self.assertAlmostEqual(elevation_up, document['elevation_up'], places=6)
+        for waypoint in document['path']:
+            self.assertAlmostEqual(track.lat[waypoint['index']], waypoint['location']['lat'])
+
+    def test_exports_match_track(self):
+        track = self.account.track(2)
+        records = read_fit_records(self.account.fit(2))
+        self.assertEqual(len(records), len(track))
+        self.assertAlmostEqual(records.lat[10], track.lat[10], places=6)
+        self.assertAlmostEqual(records.altitude[10], track.alt[10], delta=0.1)
+        columns = read_gpx(self.account.gpx(2))
+        self.assertEqual(len(columns), len(track))
+        self.assertEqual(list(columns.ele), list(track.alt))
+        coordinates = json.loads(self.account.coordinates_document(2))['items']
+        self.assertEqual(len(coordinates), len(track))
+
+    def test_fit_crc(self):
+        self.assertEqual(fit_crc(b'123456789'), 0xBB3D)
+
+    def test_invalid_account(self):
+        with self.assertRaises(ValueError):
+            SyntheticAccount(tours=1, points=1)
+        with self.assertRaises(IndexError):
+            self.account.detail(40)
+
+    def test_write_account(self):
+        account = SyntheticAccount(tours=3, points=50)
+        with tempfile.TemporaryDirectory() as directory:
+            write_account(account=account, directory=directory, page_size=2, exports=['fit'])
+            self.assertEqual(sorted(os.listdir(os.path.join(directory, 'pages'))), ['000000.json', '000001.json'])
+            self.assertEqual(len(os.listdir(os.path.join(directory, 'fit'))), 3)
+            with CoordinateArchive(os.path.join(directory, 'tracks.kca')) as archive:
+                self.assertEqual(len(archive), 3)
+                self.assertEqual(list(archive.get(account.tour_id(1)).alt), list(account.track(1).alt))
+
+
+if __name__ == '__main__':
+    unittest.main()
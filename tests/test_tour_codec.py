@@ -0,0 +1,117 @@
+import json
+import os
+import struct
+import unittest
+
+from kompy import (
+    Coordinate,
+    CoordinateArray,
+    Tour,
+)
+from kompy.errors.codec_errors import TourCodecError
+from kompy.tour_codec import (
+    decode_coordinates,
+    decode_tour,
+    decode_tour_header,
+    encode_tour,
+)
+
+
+class TestTourCodec(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a tour with a track for the tests.
+        """
+        with open(f'{os.path.dirname(os.path.realpath(__file__))}/resources/get_tour_by_id_response.json') as f:
+            self.tour = Tour(json.load(f))
+        self.tour.coordinates = [
+            Coordinate(lat=44.2 + i * 1e-5, lon=7.3 + i * 1e-5, alt=980.0 + i, time=i * 1000)
+            for i in range(100)
+        ]
+        self.tour.coordinates.append(Coordinate(lat=44.3, lon=7.4))
+
+    def test_round_trip(self):
+        """
+        Test that a decoded tour matches the encoded one.
+        """
+        decoded = decode_tour(encode_tour(self.tour))
+        self.assertIsInstance(decoded, Tour)
+        for attribute in ['id', 'type', 'source', 'start_date', 'changed_at', 'name', 'kcal_active', 'distance',
+                          'total_duration', 'elevation_up', 'sport', 'constitution', 'query', 'coordinates_link',
+                          'links_dict']:
+            self.assertEqual(getattr(decoded, attribute), getattr(self.tour, attribute))
+        self.assertEqual(decoded.start_point.__dict__, self.tour.start_point.__dict__)
+        self.assertEqual(decoded.difficulty.__dict__, self.tour.difficulty.__dict__)
+        self.assertEqual(decoded.vector_map_image.image_url, self.tour.vector_map_image.image_url)
+        self.assertEqual(
+            [(w.location.lat, w.location.lon, w.index, w.end_index, w.reference) for w in decoded.path],
+            [(w.location.lat, w.location.lon, w.index, w.end_index, w.reference) for w in self.tour.path],
+        )
+        self.assertEqual(
+            [(s.segment_type, s.segment_boundaries.__dict__) for s in decoded.segments],
+            [(s.segment_type, s.segment_boundaries.__dict__) for s in self.tour.segments],
+        )
+        self.assertEqual(
+            [s.__dict__ for s in decoded.summary.surfaces],
+            [s.__dict__ for s in self.tour.summary.surfaces],
+        )
+        self.assertEqual(
+            [c.__dict__ for c in decoded.coordinates],
+            [c.__dict__ for c in self.tour.coordinates],
+        )
+
+    def test_decode_header(self):
+        """
+        Test decoding only the header of an encoded tour.
+        """
+        header = decode_tour_header(encode_tour(self.tour))
+        self.assertEqual(header['id'], self.tour.id)
+        self.assertEqual(header['name'], self.tour.name)
+        self.assertEqual(header['sport'], self.tour.sport)
+        self.assertEqual(header['coordinates_count'], len(self.tour.coordinates))
+
+    def test_decode_coordinates(self):
+        """
+        Test decoding only the track of an encoded tour.
+        """
+        coordinates = decode_coordinates(encode_tour(self.tour))
+        self.assertIsInstance(coordinates, CoordinateArray)
+        self.assertEqual(coordinates, CoordinateArray.from_coordinates(self.tour.coordinates))
+
+    def test_invalid_payload(self):
+        """
+        Test that invalid payloads are rejected.
+        """
+        encoded = encode_tour(self.tour)
+        with self.assertRaises(TourCodecError):
+            decode_tour(b'XXXX' + encoded[4:])
+        with self.assertRaises(TourCodecError):
+            decode_tour(encoded[:10])
+        with self.assertRaises(TourCodecError):
+            decode_tour(encoded[:-8])
+
+    def test_corrupt_header(self):
+        """
+        Test that corrupt header bytes, e.g. string references outside the string table, are rejected.
+        """
+        encoded = encode_tour(self.tour)
+        strings_length, header_length = struct.unpack_from('<II', encoded, 8)
+        header_start = 16 + strings_length
+        for position in range(header_start, header_start + header_length):
+            for value in (0x7F, 0xFF):
+                corrupt = bytearray(encoded)
+                corrupt[position] = value
+                for decode in (decode_tour, decode_tour_header, decode_coordinates):
+                    try:
+                        decode(corrupt)
+                    except TourCodecError:
+                        pass
+        corrupt = bytearray(encoded)
+        corrupt[header_start] = 0x7F
+        with self.assertRaises(TourCodecError):
+            decode_tour_header(corrupt)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import json
+import os
+import unittest
+
+from kompy import Tour
+from kompy.tour_parsing import parse_tours
+
+
+class TestTourParsing(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(f'{os.path.dirname(os.path.realpath(__file__))}/resources/fetch_tours.json') as f:
+            cls.tour_dicts = json.load(f)['_embedded']['tours']
+        malformed_tour = dict(cls.tour_dicts[0], id='999', sport='UNKNOWN_SPORT_XYZ')
+        cls.tour_dicts = cls.tour_dicts[:3] + [malformed_tour] + cls.tour_dicts[3:]
+
+    def test_parse_tours(self):
+        tours, failures = parse_tours(self.tour_dicts)
+        self.assertEqual(len(tours), len(self.tour_dicts) - 1)
+        self.assertEqual([failed_id for failed_id, _ in failures], ['999'])
+
+    def test_parse_tours_in_processes(self):
+        tours, failures = parse_tours(self.tour_dicts, processes=2, chunk_size=2)
+        serial_tours, _ = parse_tours(self.tour_dicts)
+        self.assertTrue(all(isinstance(tour, Tour) for tour in tours))
+        self.assertEqual([tour.id for tour in tours], [tour.id for tour in serial_tours])
+        self.assertEqual([tour.start_date for tour in tours], [tour.start_date for tour in serial_tours])
+        self.assertEqual([failed_id for failed_id, _ in failures], ['999'])
+
+    def test_invalid_processes(self):
+        with self.assertRaises(ValueError):
+            parse_tours(self.tour_dicts, processes=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from kompy import KomootConnector
+from kompy.constants.hydration_targets import HydrationTargets
+from kompy.constants.tour_constants import TourSortField
+from kompy.tracing import (
+    Tracer,
+    maybe_span,
+)
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_nested_spans(self):
+        tracer = Tracer()
+        with tracer.span('outer', answer=42) as outer:
+            with tracer.span('inner', category='http') as inner:
+                pass
+            extra = tracer.add_span('request', duration=0.001, category='http')
+        self.assertIsNone(outer.parent)
+        self.assertIs(inner.parent, outer)
+        self.assertIs(extra.parent, outer)
+        self.assertEqual(outer.attributes, {'answer': 42})
+        self.assertLessEqual(outer.start, inner.start)
+        self.assertLessEqual(inner.end, outer.end)
+        self.assertAlmostEqual(extra.duration, 0.001)
+
+    def test_error_is_recorded(self):
+        tracer = Tracer()
+        with self.assertRaises(ValueError):
+            with tracer.span('failing'):
+                raise ValueError('boom')
+        self.assertIn('boom', tracer.spans[0].attributes['error'])
+        self.assertIsNotNone(tracer.spans[0].end)
+
+    def test_maybe_span_without_tracer(self):
+        with maybe_span(None, 'ignored') as span:
+            self.assertIsNone(span)
+
+    def test_chrome_trace(self):
+        tracer = Tracer()
+        with tracer.span('outer'):
+            with tracer.span('inner', path=os.sep):
+                pass
+        trace = tracer.to_chrome_trace()
+        events = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+        self.assertEqual([event['name'] for event in events], ['outer', 'inner'])
+        self.assertEqual(events[1]['args']['parent_id'], events[0]['args']['span_id'])
+        self.assertGreaterEqual(events[0]['dur'], events[1]['dur'])
+        self.assertTrue(any(event['ph'] == 'M' for event in trace['traceEvents']))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            tracer.write_chrome_trace(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f), json.loads(json.dumps(trace)))
+
+
+class TestConnectorTracing(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.config = ServerConfig(tours=5, points=50, page_size=2)
+        self.server = KomootServer(self.config)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.tracer = Tracer()
+        self.connector = KomootConnector(email=self.config.email, password=self.config.password, tracer=self.tracer)
+
+    def _children(self, span):
+        return [child for child in self.tracer.spans if child.parent is span]
+
+    def test_get_tours_spans(self):
+        self.tracer.clear()
+        self.connector.get_tours(user_identifier=self.config.username, sort_field=TourSortField.DATE)
+        (operation,) = [span for span in self.tracer.spans if span.parent is None]
+        self.assertEqual(operation.name, 'get_tours')
+        children = self._children(operation)
+        self.assertEqual([span.name for span in children], ['page', 'page', 'page', 'parse'])
+        self.assertEqual([span.attributes.get('page') for span in children[:3]], [0, 1, 2])
+        (request,) = self._children(children[0])
+        self.assertEqual(request.name, 'request')
+        self.assertEqual(request.attributes['status_code'], 200)
+
+    def test_hydrate_spans(self):
+        tours = self.connector.get_tours(user_identifier=self.config.username, sort_field=TourSortField.DATE)
+        self.tracer.clear()
+        self.connector.hydrate(tours=tours, what=[HydrationTargets.COORDINATES], concurrency=2)
+        (operation,) = [span for span in self.tracer.spans if span.parent is None]
+        self.assertEqual(operation.name, 'hydrate')
+        jobs = self._children(operation)
+        self.assertEqual(len(jobs), 5)
+        for job in jobs:
+            self.assertEqual(job.name, 'hydrate_coordinates')
+            self.assertEqual([span.name for span in self._children(job)], ['request'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from kompy import KomootConnector
+from kompy.constants.activities import SupportedActivities
+from kompy.constants.import_outcomes import ImportOutcomes
+from kompy.constants.tour_constants import TourSortField
+from kompy.upload_index import (
+    UploadIndex,
+    content_fingerprint,
+    file_track_fingerprint,
+    track_fingerprint,
+)
+from tests.resources.komoot_server import (
+    KomootServer,
+    ServerConfig,
+)
+from tests.resources.synthetic_data import SyntheticAccount
+
+
+class TestFingerprints(unittest.TestCase):
+
+    def setUp(self):
+        self.account = SyntheticAccount(tours=2, points=200)
+
+    def test_track_fingerprint_ignores_the_format(self):
+        track = self.account.track(0)
+        fingerprint = track_fingerprint(lat=track.lat, lon=track.lon)
+        self.assertEqual(file_track_fingerprint(self.account.gpx(0)), fingerprint)
+        self.assertEqual(file_track_fingerprint(self.account.fit(0)), fingerprint)
+        self.assertNotEqual(file_track_fingerprint(self.account.gpx(1)), fingerprint)
+
+    def test_track_fingerprint_samples_points(self):
+        fingerprint = track_fingerprint(lat=[45.0 + point / 1000 for point in range(100)], lon=[7.0] * 100)
+        count, _, values = fingerprint.partition(':')
+        self.assertEqual(count, '100')
+        self.assertEqual(len(values.split(',')), 32)
+        self.assertEqual(track_fingerprint(lat=[45.0, float('nan'), 45.1], lon=[7.0, 7.0, 7.1]),
+                         '2:4500000,700000,4510000,710000')
+        self.assertIsNone(track_fingerprint(lat=[45.0], lon=[7.0]))
+
+    def test_tracks_match_within_a_rounding_step(self):
+        index = UploadIndex()
+        index.add(tour_id=1, track=track_fingerprint(lat=[45.0, 45.1], lon=[7.0, 7.1]))
+        self.assertEqual(index.find(track=track_fingerprint(lat=[45.000006, 45.1], lon=[7.0, 7.1])), '1')
+        self.assertIsNone(index.find(track=track_fingerprint(lat=[45.00002, 45.1], lon=[7.0, 7.1])))
+        self.assertIsNone(index.find(track=track_fingerprint(lat=[45.0, 45.05, 45.1], lon=[7.0, 7.05, 7.1])))
+
+    def test_unreadable_file(self):
+        self.assertIsNone(file_track_fingerprint(b'not a track'))
+
+
+class TestUploadIndex(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, 'index.tsv')
+
+    def test_index_is_persisted(self):
+        with UploadIndex(self.path) as index:
+            index.add(tour_id=1, content='a', track='b')
+            index.add(tour_id=2, track='c')
+        with open(self.path, 'a') as f:
+            f.write('content\tinterrupted')
+        with UploadIndex(self.path) as index:
+            self.assertEqual(index.find(content='a'), '1')
+            self.assertEqual(index.find(track='c'), '2')
+            self.assertEqual(index.find(content='x', track='b'), '1')
+            self.assertIsNone(index.find(content='x', track='y'))
+            self.assertEqual(len(index), 2)
+
+    def test_unchanged_files_are_not_read(self):
+        path = os.path.join(self.directory, 'tour.gpx')
+        with open(path, 'wb') as f:
+            f.write(b'first')
+        with UploadIndex(self.path) as index:
+            self.assertEqual(index.file_fingerprint(path), content_fingerprint(b'first'))
+        with UploadIndex(self.path) as index, mock.patch('kompy.upload_index.content_fingerprint') as fingerprint:
+            self.assertEqual(index.file_fingerprint(path), content_fingerprint(b'first'))
+            fingerprint.assert_not_called()
+        with open(path, 'wb') as f:
+            f.write(b'second')
+        with UploadIndex(self.path) as index:
+            self.assertEqual(index.file_fingerprint(path), content_fingerprint(b'second'))
+
+
+class TestImportFiles(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.config = ServerConfig(tours=3, points=100)
+        self.server = KomootServer(self.config)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.connector = KomootConnector(email=self.config.email, password=self.config.password)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.index_path = os.path.join(self.directory, 'index.tsv')
+        self.account = SyntheticAccount(tours=10, points=100, seed=7)
+
+    def _write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def _import(self, paths):
+        with UploadIndex(self.index_path) as index:
+            return self.connector.import_files(paths=paths, activity_type=SupportedActivities.HIKING, index=index)
+
+    def test_rerun_makes_no_upload(self):
+        paths = [self._write(f'{index}.gpx', self.account.gpx(index)) for index in range(8)]
+        outcomes = self._import(paths)
+        self.assertEqual(list(outcomes.values()), [ImportOutcomes.UPLOADED] * 8)
+        self.assertEqual(self.server.dataset.uploads, 8)
+        requests = self.server.requests
+        outcomes = self._import(paths)
+        self.assertEqual(list(outcomes.values()), [ImportOutcomes.DUPLICATE] * 8)
+        self.assertEqual(self.server.requests, requests)
+
+    def test_same_track_in_another_format_is_skipped(self):
+        self._import([self._write('0.gpx', self.account.gpx(0))])
+        outcomes = self._import([self._write('0.fit', self.account.fit(0)), self._write('1.fit', self.account.fit(1))])
+        self.assertEqual(list(outcomes.values()), [ImportOutcomes.DUPLICATE, ImportOutcomes.UPLOADED])
+        self.assertEqual(self.server.dataset.uploads, 2)
+
+    def test_existing_tours_are_skipped(self):
+        tours = self.connector.get_tours(user_identifier=self.config.username, sort_field=TourSortField.DATE)
+        self.assertEqual(self.connector.hydrate(tours), {})
+        with UploadIndex(self.index_path) as index:
+            self.assertEqual(index.add_tours(tours), 3)
+        path = self._write('existing.gpx', self.server.dataset.gpx(tours[0].id))
+        outcomes = self._import([path, os.path.join(self.directory, 'missing.gpx')])
+        self.assertEqual(list(outcomes.values()), [ImportOutcomes.DUPLICATE, ImportOutcomes.FAILED])
+        self.assertEqual(self.server.dataset.uploads, 0)
+
+    def test_invalid_upload_response(self):
+        post_tour = self.connector._post_tour
+        invalid = {'1.gpx': b'<html>Bad gateway</html>', '2.gpx': b'{"status": "ok"}'}
+
+        def post_with_invalid_responses(**kwargs):
+            response = post_tour(**kwargs)
+            content = invalid.get(f'{kwargs["tour_name"]}.gpx')
+            if content is not None:
+                response._content = content
+            return response
+
+        paths = [self._write(f'{index}.gpx', self.account.gpx(index)) for index in range(4)]
+        with mock.patch.object(self.connector, '_post_tour', side_effect=post_with_invalid_responses):
+            outcomes = self._import(paths)
+        self.assertEqual(list(outcomes.values()), [ImportOutcomes.UPLOADED, ImportOutcomes.FAILED,
+                                                   ImportOutcomes.FAILED, ImportOutcomes.UPLOADED])
+        # The files uploaded after the invalid responses are recorded in the index.
+        with UploadIndex(self.index_path) as index:
+            self.assertEqual(len(index), 2)
+            self.assertIsNotNone(index.find(content=index.file_fingerprint(paths[3])))
+
+
+if __name__ == '__main__':
+    unittest.main()